@@ -11,11 +11,14 @@
 //   - Visa kontaktmeddelanden
 //   - Skapa, redigera, ta bort och sätta bild på event
 //   - Ladda upp och ta bort bilder i galleriet
+//   - Visa statistik per månad (bokningar, beläggning, ledtid, nya medlemmar)
 //
 // HUR FUNGERAR DEN?
 //   Allting sker i en DOMContentLoaded-lyssnare.
 //   showAdmin() respektive showLogin() växlar synligheten på de två sektionerna.
 //   Varje datakälla har en egen load*()-funktion som renderar HTML i ett container-element.
+//   Bokningar, meddelanden och medlemmar hålls i Maps och uppdateras efter en ändring
+//   med bara det som ändrats (syncChanges → GET /api/changes?since=).
 // =============================================================================
 
 document.addEventListener("DOMContentLoaded", () => {
@@ -37,9 +40,18 @@ document.addEventListener("DOMContentLoaded", () => {
   // Kontaktmeddelanden
   const messagesEl     = document.getElementById("messagesList");
 
+  // Sök
+  const searchForm     = document.getElementById("searchForm");
+  const searchResults  = document.getElementById("searchResults");
+
   // Medlemsanmälningar
   const membersEl      = document.getElementById("membersList");
 
+  // Statistik
+  const statsForm      = document.getElementById("statsForm");
+  const statsYear      = document.getElementById("statsYear");
+  const statsTable     = document.getElementById("statsTable");
+
   // Styrelsen
   const boardList      = document.getElementById("boardList");
   const addBoardForm   = document.getElementById("addBoardForm");
@@ -80,6 +92,12 @@ document.addEventListener("DOMContentLoaded", () => {
   let currentEventImageId   = null;
   let currentSponsorImageId = null;
 
+  // Deltasynkade listor: id → rad, samt position i ändringsloggen (seq)
+  const bookingItems = new Map();
+  const messageItems = new Map();
+  const memberItems  = new Map();
+  let changeSeq = null;
+
 
   // ─────────────────────────────
   // Hjälpfunktioner
@@ -127,6 +145,7 @@ document.addEventListener("DOMContentLoaded", () => {
     loadEvents();
     loadGalleryAdmin();
     loadMembers();
+    loadStats();
     loadBoard();
     loadLinks();
     loadInfo();
@@ -181,6 +200,76 @@ document.addEventListener("DOMContentLoaded", () => {
   });
 
 
+  // ─────────────────────────────
+  // Deltasynk
+  // ─────────────────────────────
+
+  // entity i /api/changes → lista som ska uppdateras
+  const SYNCED_LISTS = {
+    bookings: { items: bookingItems, render: () => renderList() },
+    messages: { items: messageItems, render: () => renderMessages() },
+    members:  { items: memberItems,  render: () => renderMembers() },
+  };
+
+  /**
+   * VARFÖR: Varje lista laddas med sitt eget seq — synken måste börja från det äldsta
+   *         så att ingen ändring missas (att få en ändring två gånger är ofarligt).
+   */
+  function noteSeq(seq) {
+    changeSeq = changeSeq === null ? seq : Math.min(changeSeq, seq);
+  }
+
+  /** Ersätter innehållet i en Map med raderna från en fullständig lista. */
+  function fillItems(map, items) {
+    map.clear();
+    items.forEach(item => map.set(String(item.id), item));
+  }
+
+  /** Rader nyast först (som serverns ORDER BY created_at DESC). */
+  function newestFirst(map) {
+    return [...map.values()].sort((a, b) =>
+      (b.created_at || "").localeCompare(a.created_at || "") || b.id - a.id);
+  }
+
+  /** Laddar om alla deltasynkade listor från början (ny startpunkt i loggen). */
+  async function reloadSyncedLists() {
+    changeSeq = null;
+    await Promise.all([loadList(), loadMessages(), loadMembers()]);
+  }
+
+  /**
+   * VARFÖR: Efter en ändring ska bara det som ändrats hämtas, inte hela listorna.
+   * VAD: Hämtar GET /api/changes?since=<changeSeq>, uppdaterar Maps och ritar om
+   *      de listor som berördes.
+   * HUR: Fortsätter så länge has_more är true. Saknas startpunkt, eller är reset=true
+   *      (loggen har rensats), laddas alla tre listorna om från början.
+   */
+  async function syncChanges() {
+    const touched = new Set();
+
+    for (let more = true; more; ) {
+      if (changeSeq === null) return reloadSyncedLists();
+
+      const res  = await fetch(`/api/changes?since=${changeSeq}`);
+      const data = await res.json();
+      if (!data.ok) throw new Error(data.error || "Kunde inte hämta ändringar");
+      if (data.reset) return reloadSyncedLists();
+
+      data.changes.forEach(ch => {
+        const list = SYNCED_LISTS[ch.entity];
+        if (!list) return;
+        if (ch.op === "delete") list.items.delete(ch.key);
+        else                    list.items.set(ch.key, ch.row);
+        touched.add(list);
+      });
+      changeSeq = data.seq;
+      more      = data.has_more;
+    }
+
+    touched.forEach(list => list.render());
+  }
+
+
   // ─────────────────────────────
   // Bokningslista
   // ─────────────────────────────
@@ -188,8 +277,7 @@ document.addEventListener("DOMContentLoaded", () => {
   /**
    * VARFÖR: Admin behöver se och hantera alla bokningar.
    * VAD: Hämtar GET /api/admin/bookings och renderar dem som kort med statusknapper.
-   * HUR: Varje bokning visas med metadata och tre knappar: godkänn, pending, avslå.
-   *      Event delegation används på listEl för att slippa sätta lyssnare per knapp.
+   * HUR: Raderna sparas i bookingItems; senare ändringar kommer via syncChanges.
    */
   async function loadList() {
     listEl.textContent = "Laddar…";
@@ -199,41 +287,52 @@ document.addEventListener("DOMContentLoaded", () => {
       const data = await res.json();
       if (!data.ok) throw new Error(data.error || "Kunde inte ladda");
 
-      if (data.items.length === 0) {
-        listEl.innerHTML = "<p class='muted'>Inga bokningar än.</p>";
-        return;
-      }
-
-      listEl.innerHTML = data.items.map(item => {
-        const meta = [
-          `<strong>Status:</strong> ${esc(item.status)}`,
-          `<strong>Datum:</strong> ${esc(item.start)}${item.end ? " → " + esc(item.end) : ""}`,
-          item.name         ? `<strong>Namn:</strong> ${esc(item.name)}`            : "",
-          item.email        ? `<strong>E-post:</strong> ${esc(item.email)}`         : "",
-          item.phone        ? `<strong>Telefon:</strong> ${esc(item.phone)}`        : "",
-          item.booking_type ? `<strong>Typ:</strong> ${esc(item.booking_type)}`    : "",
-          item.message      ? `<strong>Meddelande:</strong> ${esc(item.message)}`  : "",
-        ].filter(Boolean).join("<br>");
-
-        return `
-          <div class="admin-booking-row">
-            <div class="admin-booking-title">${esc(item.title)} <span class="muted small">#${item.id}</span></div>
-            <div class="admin-booking-meta">${meta}</div>
-            <div class="admin-booking-actions">
-              <button class="btn" data-action="approved" data-id="${item.id}">Godkänn</button>
-              <button class="btn" data-action="pending"  data-id="${item.id}">Pending</button>
-              <button class="btn btn-danger" data-action="denied"  data-id="${item.id}">Avslå</button>
-              <button class="btn btn-danger" data-action="delete"  data-id="${item.id}">Ta bort</button>
-            </div>
-          </div>
-        `;
-      }).join("");
-
+      fillItems(bookingItems, data.items);
+      noteSeq(data.seq);
+      renderList();
     } catch (err) {
       listEl.innerHTML = `<p class="muted">${esc(err.message)}</p>`;
     }
   }
 
+  /**
+   * VAD: Ritar bokningslistan från bookingItems.
+   * HUR: Varje bokning visas med metadata och tre knappar: godkänn, pending, avslå.
+   *      Event delegation används på listEl för att slippa sätta lyssnare per knapp.
+   */
+  function renderList() {
+    if (bookingItems.size === 0) {
+      listEl.innerHTML = "<p class='muted'>Inga bokningar än.</p>";
+      return;
+    }
+
+    listEl.innerHTML = newestFirst(bookingItems).map(item => {
+      const meta = [
+        `<strong>Status:</strong> ${esc(item.status)}${item.archived ? " (arkiverad)" : ""}`,
+        `<strong>Datum:</strong> ${esc(item.start)}${item.end ? " → " + esc(item.end) : ""}`,
+        item.resource     ? `<strong>Resurs:</strong> ${esc(item.resource)}`      : "",
+        item.name         ? `<strong>Namn:</strong> ${esc(item.name)}`            : "",
+        item.email        ? `<strong>E-post:</strong> ${esc(item.email)}`         : "",
+        item.phone        ? `<strong>Telefon:</strong> ${esc(item.phone)}`        : "",
+        item.booking_type ? `<strong>Typ:</strong> ${esc(item.booking_type)}`    : "",
+        item.message      ? `<strong>Meddelande:</strong> ${esc(item.message)}`  : "",
+      ].filter(Boolean).join("<br>");
+
+      return `
+        <div class="admin-booking-row">
+          <div class="admin-booking-title">${esc(item.title)} <span class="muted small">#${item.id}</span></div>
+          <div class="admin-booking-meta">${meta}</div>
+          <div class="admin-booking-actions">
+            <button class="btn" data-action="approved" data-id="${item.id}">Godkänn</button>
+            <button class="btn" data-action="pending"  data-id="${item.id}">Pending</button>
+            <button class="btn btn-danger" data-action="denied"  data-id="${item.id}">Avslå</button>
+            <button class="btn btn-danger" data-action="delete"  data-id="${item.id}">Ta bort</button>
+          </div>
+        </div>
+      `;
+    }).join("");
+  }
+
   // Statusknapparna använder event delegation — ett lyssnare på hela listan
   listEl.addEventListener("click", async (e) => {
     const btn = e.target.closest("button[data-action]");
@@ -249,7 +348,7 @@ document.addEventListener("DOMContentLoaded", () => {
         const res  = await fetch(`/api/admin/bookings/${id}`, { method: "DELETE" });
         const data = await res.json();
         if (!data.ok) throw new Error(data.error || "Kunde inte ta bort");
-        await loadList();
+        await syncChanges();
       } catch (err) {
         alert(err.message);
       }
@@ -265,7 +364,7 @@ document.addEventListener("DOMContentLoaded", () => {
       });
       const data = await res.json();
       if (!data.ok) throw new Error(data.error || "Kunde inte uppdatera");
-      await loadList();
+      await syncChanges();
     } catch (err) {
       alert(err.message);
     }
@@ -293,7 +392,7 @@ document.addEventListener("DOMContentLoaded", () => {
 
       showMsg(addMsg, "Bokning tillagd!");
       addForm.reset();
-      await loadList();
+      await syncChanges();
     } catch (err) {
       showMsg(addMsg, err.message, false);
     }
@@ -301,44 +400,130 @@ document.addEventListener("DOMContentLoaded", () => {
 
 
   // ─────────────────────────────
-  // Kontaktmeddelanden
+  // Sök
   // ─────────────────────────────
 
+  // Läsbara namn på träfftyperna från /api/admin/search
+  const SEARCH_TYPE_LABELS = {
+    messages:      "Meddelande",
+    members:       "Medlem",
+    bookings:      "Bokning",
+    bookings_archive: "Arkiverad bokning",
+    events:        "Event",
+    page_sections: "Sidinnehåll",
+  };
+
+  // Antal träffar per sida och aktuell sökning (för "Visa fler")
+  const SEARCH_PAGE_SIZE = 20;
+  let searchQuery  = "";
+  let searchOffset = 0;
+
   /**
-   * VARFÖR: Admin behöver läsa meddelanden som skickats via kontaktformuläret.
-   * VAD: Hämtar GET /api/admin/messages och renderar dem som en lista.
+   * VARFÖR: Admin ska hitta gamla ärenden utan att bläddra igenom hela listor.
+   * VAD: Hämtar en sida träffar från GET /api/admin/search och renderar dem.
+   * HUR: append=false ersätter listan, append=true lägger till nästa sida.
+   *      Snippets escapas och endast <mark>-taggarna från servern återställs.
    */
-  async function loadMessages() {
-    messagesEl.textContent = "Laddar…";
+  async function runSearch(append = false) {
+    if (!append) {
+      searchOffset = 0;
+      searchResults.innerHTML = "<p class='muted'>Söker…</p>";
+    }
 
     try {
-      const res  = await fetch("/api/admin/messages");
+      const params = new URLSearchParams({ q: searchQuery, limit: SEARCH_PAGE_SIZE, offset: searchOffset });
+      const res  = await fetch(`/api/admin/search?${params}`);
       const data = await res.json();
-      if (!data.ok) throw new Error(data.error || "Kunde inte ladda");
+      if (!data.ok) throw new Error(data.error || "Kunde inte söka");
 
-      if (data.items.length === 0) {
-        messagesEl.innerHTML = "<p class='muted'>Inga meddelanden än.</p>";
-        return;
-      }
-
-      messagesEl.innerHTML = data.items.map(item => `
+      const html = data.items.map(item => `
         <div class="admin-msg-row">
           <div class="admin-msg-header">
             <div>
-              <strong>${esc(item.name)}</strong> &lt;${esc(item.email)}&gt;
-              <span class="muted small"> · ${esc(item.created_at.slice(0, 16).replace("T", " "))}</span>
+              <span class="member-nr-badge">${esc(SEARCH_TYPE_LABELS[item.type] || item.type)}</span>
+              <strong>${esc(item.label)}</strong>
+              <span class="muted small"> #${item.id} · ${esc((item.created_at || "").slice(0, 16).replace("T", " "))}</span>
             </div>
-            <button class="btn btn-danger btn-small" data-del-msg="${item.id}" title="Ta bort meddelande">Ta bort</button>
           </div>
-          <div style="margin-top:.35rem;">${esc(item.message)}</div>
+          <div style="margin-top:.35rem;">${esc(item.snippet).replaceAll("&lt;mark&gt;", "<mark>").replaceAll("&lt;/mark&gt;", "</mark>")}</div>
         </div>
       `).join("");
 
+      searchResults.querySelector("[data-search-more]")?.remove();
+
+      if (append) {
+        searchResults.insertAdjacentHTML("beforeend", html);
+      } else {
+        searchResults.innerHTML = html || "<p class='muted'>Inga träffar.</p>";
+      }
+
+      searchOffset += data.items.length;
+      if (data.has_more) {
+        searchResults.insertAdjacentHTML("beforeend",
+          `<button class="btn" data-search-more>Visa fler</button>`);
+      }
+    } catch (err) {
+      searchResults.innerHTML = `<p class="muted">${esc(err.message)}</p>`;
+    }
+  }
+
+  searchForm.addEventListener("submit", (e) => {
+    e.preventDefault();
+    searchQuery = searchForm.querySelector('[name="q"]').value.trim();
+    if (searchQuery) runSearch();
+  });
+
+  searchResults.addEventListener("click", (e) => {
+    if (e.target.closest("[data-search-more]")) runSearch(true);
+  });
+
+
+  // ─────────────────────────────
+  // Kontaktmeddelanden
+  // ─────────────────────────────
+
+  /**
+   * VARFÖR: Admin behöver läsa meddelanden som skickats via kontaktformuläret.
+   * VAD: Hämtar GET /api/admin/messages och renderar dem som en lista.
+   * HUR: Raderna sparas i messageItems; senare ändringar kommer via syncChanges.
+   */
+  async function loadMessages() {
+    messagesEl.textContent = "Laddar…";
+
+    try {
+      const res  = await fetch("/api/admin/messages");
+      const data = await res.json();
+      if (!data.ok) throw new Error(data.error || "Kunde inte ladda");
+
+      fillItems(messageItems, data.items);
+      noteSeq(data.seq);
+      renderMessages();
     } catch (err) {
       messagesEl.innerHTML = `<p class="muted">${esc(err.message)}</p>`;
     }
   }
 
+  /** Ritar meddelandelistan från messageItems. */
+  function renderMessages() {
+    if (messageItems.size === 0) {
+      messagesEl.innerHTML = "<p class='muted'>Inga meddelanden än.</p>";
+      return;
+    }
+
+    messagesEl.innerHTML = newestFirst(messageItems).map(item => `
+      <div class="admin-msg-row">
+        <div class="admin-msg-header">
+          <div>
+            <strong>${esc(item.name)}</strong> &lt;${esc(item.email)}&gt;
+            <span class="muted small"> · ${esc(item.created_at.slice(0, 16).replace("T", " "))}</span>
+          </div>
+          <button class="btn btn-danger btn-small" data-del-msg="${item.id}" title="Ta bort meddelande">Ta bort</button>
+        </div>
+        <div style="margin-top:.35rem;">${esc(item.message)}</div>
+      </div>
+    `).join("");
+  }
+
   // Delete-knappar på meddelanden via event delegation
   messagesEl.addEventListener("click", async (e) => {
     const btn = e.target.closest("[data-del-msg]");
@@ -349,7 +534,7 @@ document.addEventListener("DOMContentLoaded", () => {
       const res  = await fetch(`/api/admin/messages/${id}`, { method: "DELETE" });
       const data = await res.json();
       if (!data.ok) throw new Error(data.error || "Kunde inte ta bort");
-      await loadMessages();
+      await syncChanges();
     } catch (err) {
       alert(err.message);
     }
@@ -364,7 +549,8 @@ document.addEventListener("DOMContentLoaded", () => {
    * VARFÖR: Admin behöver se och hantera inkomna medlemsanmälningar.
    * VAD: Hämtar GET /api/admin/members och renderar dem med delete-knappar.
    * HUR: Varje anmälan visas med namn, e-post, telefon och datum.
-   *      Delete-knapp finns för GDPR-radering.
+   *      Delete-knapp finns för GDPR-radering. Raderna sparas i memberItems;
+   *      senare ändringar kommer via syncChanges.
    */
   async function loadMembers() {
     membersEl.innerHTML = "<p class='muted'>Laddar…</p>";
@@ -374,30 +560,36 @@ document.addEventListener("DOMContentLoaded", () => {
       const data = await res.json();
       if (!data.ok) throw new Error(data.error || "Kunde inte ladda");
 
-      if (data.items.length === 0) {
-        membersEl.innerHTML = "<p class='muted'>Inga anmälningar än.</p>";
-        return;
-      }
-
-      membersEl.innerHTML = data.items.map(item => `
-        <div class="admin-msg-row">
-          <div class="admin-msg-header">
-            <div>
-              <span class="member-nr-badge">#${esc(item.member_number || "–")}</span>
-              <strong>${esc(item.name)}</strong> &lt;${esc(item.email)}&gt;
-              ${item.phone ? ` · ${esc(item.phone)}` : ""}
-              <span class="muted small"> · ${esc(item.created_at.slice(0, 16).replace("T", " "))}</span>
-            </div>
-            <button class="btn btn-danger btn-small" data-del-member="${item.id}" title="Radera (GDPR)">Radera</button>
-          </div>
-        </div>
-      `).join("");
-
+      fillItems(memberItems, data.items);
+      noteSeq(data.seq);
+      renderMembers();
     } catch (err) {
       membersEl.innerHTML = `<p class="muted">${esc(err.message)}</p>`;
     }
   }
 
+  /** Ritar medlemslistan från memberItems. */
+  function renderMembers() {
+    if (memberItems.size === 0) {
+      membersEl.innerHTML = "<p class='muted'>Inga anmälningar än.</p>";
+      return;
+    }
+
+    membersEl.innerHTML = newestFirst(memberItems).map(item => `
+      <div class="admin-msg-row">
+        <div class="admin-msg-header">
+          <div>
+            <span class="member-nr-badge">#${esc(item.member_number || "–")}</span>
+            <strong>${esc(item.name)}</strong> &lt;${esc(item.email)}&gt;
+            ${item.phone ? ` · ${esc(item.phone)}` : ""}
+            <span class="muted small"> · ${esc(item.created_at.slice(0, 16).replace("T", " "))}</span>
+          </div>
+          <button class="btn btn-danger btn-small" data-del-member="${item.id}" title="Radera (GDPR)">Radera</button>
+        </div>
+      </div>
+    `).join("");
+  }
+
   // Delete-knappar på medlemsanmälningar via event delegation
   membersEl.addEventListener("click", async (e) => {
     const btn = e.target.closest("[data-del-member]");
@@ -408,13 +600,81 @@ document.addEventListener("DOMContentLoaded", () => {
       const res  = await fetch(`/api/admin/members/${id}`, { method: "DELETE" });
       const data = await res.json();
       if (!data.ok) throw new Error(data.error || "Kunde inte radera");
-      await loadMembers();
+      await syncChanges();
     } catch (err) {
       alert(err.message);
     }
   });
 
 
+  // ─────────────────────────────
+  // Statistik
+  // ─────────────────────────────
+
+  const MONTH_NAMES = ["jan", "feb", "mar", "apr", "maj", "jun", "jul", "aug", "sep", "okt", "nov", "dec"];
+
+  /** Andel (0–1) som procent med en decimal, eller – om värdet saknas. */
+  function percent(value) {
+    return value == null ? "–" : `${(value * 100).toFixed(1).replace(".", ",")} %`;
+  }
+
+  /**
+   * VARFÖR: Styrelsen vill se hur ofta lokalen hyrs ut utan att räkna i bokningslistan.
+   * VAD: Hämtar GET /api/admin/stats för valt år och ritar en tabell per månad.
+   * HUR: Servern läser ur färdiga summeringstabeller, så anropet är billigt även för
+   *      många år av bokningar. Standard är innevarande år.
+   */
+  async function loadStats() {
+    const year = statsYear.value || String(new Date().getFullYear());
+    statsYear.value = year;
+    statsTable.innerHTML = "<p class='muted'>Laddar…</p>";
+
+    try {
+      const res  = await fetch(`/api/admin/stats?from=${year}-01-01&to=${year}-12-31`);
+      const data = await res.json();
+      if (!data.ok) throw new Error(data.error || "Kunde inte ladda statistik");
+
+      const members = new Map(data.members.map(m => [m.month, m.members]));
+      const row = (label, s, newMembers) => `
+        <tr>
+          <td>${esc(label)}</td>
+          <td>${s.bookings}</td>
+          <td>${s.by_type["2h"] || 0}</td>
+          <td>${s.by_type.heldag || 0}</td>
+          <td>${s.by_type.helg || 0}</td>
+          <td>${s.by_type.manuell || 0}</td>
+          <td>${percent(s.occupancy)}</td>
+          <td>${s.lead_days_avg ?? "–"}</td>
+          <td>${newMembers}</td>
+        </tr>`;
+
+      statsTable.innerHTML = `
+        <table class="stats-table">
+          <thead>
+            <tr>
+              <th>Månad</th><th>Bokningar</th><th>2h</th><th>Heldag</th><th>Helg</th><th>Manuella</th>
+              <th>Beläggning</th><th>Ledtid (dagar)</th><th>Nya medlemmar</th>
+            </tr>
+          </thead>
+          <tbody>
+            ${data.months.map(m => row(MONTH_NAMES[Number(m.month.slice(5)) - 1], m, members.get(m.month) || 0)).join("")}
+          </tbody>
+          <tfoot>
+            ${row("Totalt", data.totals, data.members.reduce((sum, m) => sum + m.members, 0))}
+          </tfoot>
+        </table>
+      `;
+    } catch (err) {
+      statsTable.innerHTML = `<p class="muted">${esc(err.message)}</p>`;
+    }
+  }
+
+  statsForm.addEventListener("submit", (e) => {
+    e.preventDefault();
+    loadStats();
+  });
+
+
   // ─────────────────────────────
   // Styrelsen
   // ─────────────────────────────
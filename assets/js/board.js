@@ -11,6 +11,7 @@
 //
 // HUR FUNGERAR DEN?
 //   DOMContentLoaded → fetch /api/board → rendera kort eller tomt-state.
+//   Om servern redan renderat korten (data-ssr på #boardGrid) görs inget mer.
 // =============================================================================
 
 document.addEventListener("DOMContentLoaded", async () => {
@@ -18,6 +19,9 @@ document.addEventListener("DOMContentLoaded", async () => {
   const empty   = document.getElementById("boardEmpty");
   const grid    = document.getElementById("boardGrid");
 
+  // Server-renderad sida (data-ssr) — korten finns redan i HTML:en
+  if (grid.hasAttribute("data-ssr")) return;
+
   try {
     const res  = await fetch("/api/board");
     const data = await res.json();
@@ -6,11 +6,14 @@
 //   direkt utan att skicka en förfrågan som måste godkännas.
 //
 // VAD GÖR DEN?
-//   - Renderar FullCalendar med befintliga bokningar från /api/bookings
+//   - Renderar FullCalendar med befintliga bokningar från /api/bookings/<resurs>
 //   - Klick på datum öppnar en bokningsmodal
 //   - 2h-bokningar har tidsluckor (09-11, 12-14, 15-17, 18-20), flera per dag
 //   - Heldag/helg blockerar hela dagen och kan inte bokas om 2h-bokningar finns
+//   - Reserverar vald tid (POST /api/holds) medan formuläret fylls i, så att ingen
+//     annan hinner boka den; reservationen släpps när modalen stängs
 //   - Skickar bokningsdata till POST /api/book och uppdaterar kalendern
+//   - Resursväljaren (lokalen, köket, utomhus) styr vilken kalender som visas och bokas
 //
 // HUR FUNGERAR DEN?
 //   currentEvents cachelar laddade bokningar så att kollisionskollen kan ske
@@ -38,9 +41,13 @@ document.addEventListener("DOMContentLoaded", () => {
   const bookSlot     = document.getElementById("bookSlot");
   const timeSlotRow  = document.getElementById("timeSlotRow");
   const bookMsg      = document.getElementById("bookMsg");
+  const resourceSelect = document.getElementById("resourceSelect");
 
   let selectedDate  = "";
+  let resource      = "";  // vald resurs-slug; tom sträng = serverns standardresurs
   let currentEvents = [];  // cachelade bokningar från senaste API-anrop
+  let holdToken     = "";  // egen reservation av vald tid (från /api/holds)
+  let holdSeq       = 0;   // ökar vid varje hold-anrop; äldre svar ignoreras
 
 
   // ─────────────────────────────
@@ -61,7 +68,9 @@ document.addEventListener("DOMContentLoaded", () => {
     // Hämtar bokningar från API varje gång kalendern byter vy eller uppdateras
     events: async (info, success, failure) => {
       try {
-        const res  = await fetch("/api/bookings");
+        const res  = await fetch(
+          `/api/bookings/${encodeURIComponent(resource)}?hold=${encodeURIComponent(holdToken)}`
+        );
         const data = await res.json();
         if (!data.ok) throw new Error(data.error || "Kunde inte hämta bokningar");
         currentEvents = data.events;
@@ -81,6 +90,39 @@ document.addEventListener("DOMContentLoaded", () => {
   calendar.render();
 
 
+  // ─────────────────────────────
+  // Resursväljare
+  // ─────────────────────────────
+
+  /**
+   * VARFÖR: Lokalen, köket och utomhusområdet bokas var för sig med egna kalendrar.
+   * VAD: Fyller resursväljaren från GET /api/resources och byter kalender vid ändring.
+   * HUR: Om anropet misslyckas döljs väljaren och serverns standardresurs används.
+   */
+  async function loadResources() {
+    try {
+      const res  = await fetch("/api/resources");
+      const data = await res.json();
+      if (!data.ok) throw new Error(data.error);
+
+      resourceSelect.innerHTML = data.resources.map(r =>
+        `<option value="${r.slug}">${r.name.replaceAll("<", "&lt;")}</option>`
+      ).join("");
+      resourceSelect.value = data.default;
+      resource = resourceSelect.value;
+    } catch {
+      resourceSelect.closest("label").style.display = "none";
+    }
+  }
+
+  resourceSelect.addEventListener("change", () => {
+    resource = resourceSelect.value;
+    calendar.refetchEvents();
+  });
+
+  loadResources();
+
+
   // ─────────────────────────────
   // Kollisionskoll (klientsidan)
   // ─────────────────────────────
@@ -133,6 +175,61 @@ document.addEventListener("DOMContentLoaded", () => {
   }
 
 
+  // ─────────────────────────────
+  // Reservation (hold)
+  // ─────────────────────────────
+
+  /**
+   * VARFÖR: Någon annan ska inte hinna boka tiden medan besökaren fyller i formuläret.
+   * VAD: Reserverar vald datum/bokningstyp/tidslucka i några minuter via POST /api/holds.
+   *      En tidigare reservation skickas med och ersätts.
+   * HUR: Misslyckas reservationen visas felet, men formuläret går fortfarande att skicka
+   *      (servern gör den slutgiltiga kontrollen). Svar på äldre anrop (användaren hann
+   *      byta tid) ignoreras och deras reservation släpps direkt.
+   */
+  async function takeHold() {
+    const seq = ++holdSeq;
+    const payload = { date: selectedDate, booking_type: bookType.value, resource, hold: holdToken };
+    if (bookType.value === "2h") payload.time_slot = bookSlot.value;
+
+    try {
+      const res  = await fetch("/api/holds", {
+        method:  "POST",
+        headers: { "Content-Type": "application/json" },
+        body:    JSON.stringify(payload),
+      });
+      const data = await res.json();
+
+      if (seq !== holdSeq) {
+        if (data.ok) fetch(`/api/holds/${encodeURIComponent(data.hold)}`, { method: "DELETE" });
+        return;
+      }
+      if (data.ok) {
+        holdToken = data.hold;
+      } else {
+        bookMsg.style.color = "#f87171";
+        bookMsg.textContent = data.error || "Tiden kunde inte reserveras.";
+      }
+    } catch {
+      // Utan reservation fungerar bokningen som förut
+    }
+  }
+
+  /**
+   * VARFÖR: En stängd modal ska inte spärra tiden för andra i onödan.
+   * VAD: Släpper den egna reservationen (DELETE /api/holds/<token>).
+   * HUR: keepalive så att anropet går iväg även när sidan lämnas.
+   */
+  function releaseHold() {
+    holdSeq++;
+    if (!holdToken) return;
+    fetch(`/api/holds/${encodeURIComponent(holdToken)}`, { method: "DELETE", keepalive: true }).catch(() => {});
+    holdToken = "";
+  }
+
+  window.addEventListener("pagehide", releaseHold);
+
+
   // ─────────────────────────────
   // Modal
   // ─────────────────────────────
@@ -144,7 +241,7 @@ document.addEventListener("DOMContentLoaded", () => {
    * HUR:
    *   - Fyller i rubrik och datum
    *   - Om heldag/helg täcker datumet: visa "redan bokat"-meddelande
-   *   - Annars: fyll tidslucke-väljaren med lediga/bokade alternativ
+   *   - Annars: fyll tidslucke-väljaren med lediga/bokade alternativ och reservera tiden
    */
   function openModal(dateStr) {
     const fullDayBlocked = isFullDayOccupied(dateStr);
@@ -165,6 +262,7 @@ document.addEventListener("DOMContentLoaded", () => {
       modalOccupied.style.display = "none";
       bookingForm.style.display   = "";
       updateSlotPicker(taken, dateStr);
+      takeHold();
     }
 
     modal.style.display = "flex";
@@ -210,10 +308,18 @@ document.addEventListener("DOMContentLoaded", () => {
       bookMsg.textContent   = "Obs: Det finns 2h-bokningar detta datum. Heldag/helg kan inte bokas.";
     } else {
       bookMsg.textContent = "";
+      takeHold();
     }
   });
 
+  // Ny tidslucka → flytta reservationen dit
+  bookSlot.addEventListener("change", () => {
+    bookMsg.textContent = "";
+    takeHold();
+  });
+
   function closeModal() {
+    releaseHold();
     modal.style.display = "none";
     bookingForm.reset();
     bookMsg.textContent = "";
@@ -253,6 +359,8 @@ document.addEventListener("DOMContentLoaded", () => {
       phone:        document.getElementById("bookPhone").value.trim(),
       date:         selectedDate,
       booking_type,
+      resource,
+      hold:         holdToken,
     };
 
     // Skicka med vald tidslucka för 2h-bokningar
@@ -276,6 +384,7 @@ document.addEventListener("DOMContentLoaded", () => {
       const data = await res.json();
 
       if (data.ok) {
+        holdToken = "";  // servern har släppt reservationen
         bookMsg.style.color = "var(--accent)";
         bookMsg.textContent = data.message || "Bokning bekräftad!";
         calendar.refetchEvents();
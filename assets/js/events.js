@@ -10,6 +10,7 @@
 //   Visar skelettkort under laddning och ett tomt-state om inga event finns.
 //
 // HUR FUNGERAR DEN?
+//   0. Om servern redan renderat korten (data-ssr på #eventsGrid) görs inget mer
 //   1. DOMContentLoaded → hämta /api/events
 //   2. Rendera kort (renderEvents) eller visa tomt-state
 //   3. Dölj skeleton-loader när klart
@@ -96,6 +97,9 @@ function renderEvents(events) {
  *      i skeleton-loadern istället för att krascha tyst.
  */
 document.addEventListener("DOMContentLoaded", async () => {
+  // Server-renderad sida (data-ssr) — korten finns redan i HTML:en
+  if (document.getElementById("eventsGrid").hasAttribute("data-ssr")) return;
+
   try {
     const res  = await fetch("/api/events");
     const data = await res.json();
@@ -49,6 +49,8 @@ function openLightbox(url) {
  * HUR: Bilderna infogas i en CSS-columns-container (.gallery-masonry).
  *      Varje bild-wrapper har click-handler för att öppna lightbox.
  *      loading="lazy" används för att inte ladda alla bilder på en gång.
+ *      width/height från API:et ger rätt proportioner innan bilden laddats,
+ *      så att griddet inte hoppar när bilderna kommer in.
  */
 function renderGallery(images) {
   const loading = document.getElementById("galleryLoading");
@@ -64,7 +66,7 @@ function renderGallery(images) {
 
   grid.innerHTML = images.map(img => `
     <div class="gallery-item" data-url="${img.url}" role="button" tabindex="0" aria-label="Förstora bild">
-      <img src="${img.url}" alt="Galleribild" loading="lazy" />
+      <img src="${img.url}" alt="Galleribild" loading="lazy"${img.width && img.height ? ` width="${img.width}" height="${img.height}"` : ""} />
       <div class="gallery-overlay">
         <span class="gallery-zoom-icon">⤢</span>
       </div>
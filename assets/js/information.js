@@ -10,6 +10,7 @@
 //
 // HUR FUNGERAR DEN?
 //   DOMContentLoaded → fetch → rendera kort eller tomt-state.
+//   Om servern redan renderat sektionerna (data-ssr på #infoGrid) görs inget mer.
 // =============================================================================
 
 document.addEventListener("DOMContentLoaded", async () => {
@@ -17,6 +18,9 @@ document.addEventListener("DOMContentLoaded", async () => {
   const empty   = document.getElementById("infoEmpty");
   const grid    = document.getElementById("infoGrid");
 
+  // Server-renderad sida (data-ssr) — sektionerna finns redan i HTML:en
+  if (grid.hasAttribute("data-ssr")) return;
+
   try {
     const res  = await fetch("/api/page-sections/information");
     const data = await res.json();
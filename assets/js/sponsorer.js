@@ -12,6 +12,7 @@
 // HUR FUNGERAR DEN?
 //   DOMContentLoaded → fetch /api/sponsors → renderSponsors()
 //   Visar skelettkort under laddning och ett tomt-state om inga sponsors finns.
+//   Om servern redan renderat korten (data-ssr på #sponsorsGrid) görs inget mer.
 // =============================================================================
 
 
@@ -88,6 +89,9 @@ function renderSponsors(sponsors) {
  * HUR: Async fetch med try/catch — fel visas i skeleton-elementet.
  */
 document.addEventListener("DOMContentLoaded", async () => {
+  // Server-renderad sida (data-ssr) — korten finns redan i HTML:en
+  if (document.getElementById("sponsorsGrid").hasAttribute("data-ssr")) return;
+
   try {
     const res  = await fetch("/api/sponsors");
     const data = await res.json();
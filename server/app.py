@@ -9,24 +9,66 @@ from __future__ import annotations
 #
 # VAD GÖR DEN?
 #   - Autentisering: session-baserad inloggning för admin
-#   - Bokningsflöde: direktbokning med kollisionskontroll
+#   - Bokningsflöde: direktbokning med kollisionskontroll, återkommande bokningar
+#   - Reservationer: tillfälliga holds på en tid medan bokningsformuläret fylls i
 #   - Kontaktformulär: sparar meddelanden i SQLite
+#   - Notiser: e-post/webhook till admin om nya bokningar, meddelanden och medlemmar (outbox)
 #   - Events: admin kan skapa/redigera/ta bort event med bild
 #   - Galleri: admin kan ladda upp/ta bort bilder i ett bildgalleri
-#   - Statiska filer: serverar HTML, CSS, JS och uppladdade bilder
+#   - Sök: fulltextsökning (FTS5) i admin över meddelanden, medlemmar m.m.
+#   - Ändringsflöde: logg över alla ändringar, /api/changes?since= för deltasynk
+#   - Statistik: bokningar, beläggning, ledtid och nya medlemmar ur summeringstabeller
+#   - Export: valfri statisk ögonblicksbild av den publika sajten (EXPORT_DIR)
+#   - SSR: event-, styrelse-, sponsor- och informationssidan renderas på servern
+#   - Säkerhetskopior: online-backup av databasen + bilder, med verifiering
+#   - Underhåll: arkivering av gamla bokningar + ANALYZE/VACUUM/checkpoint + bildstädning
+#   - Komprimering: gzip + ETag på JSON- och HTML-svar
+#   - Skrivkö: en skrivtråd samlar samtidiga skrivningar till gemensamma transaktioner
+#   - Anropsbegränsning: token bucket per IP och endpoint för publika POST-anrop
+#   - Läsreplik: valfri kopia i RAM av de publika tabellerna för publika GET-anrop
+#   - Statiska filer: serverar HTML, CSS, JS och uppladdade bilder ur en tabell byggd vid start
+#   - Flera föreningar: valfritt en process för flera webbplatser, vald på Host (TENANTS_FILE)
 #
 # HUR FUNGERAR DEN?
 #   Flask-appen startas direkt med `python server/app.py`.
 #   All data sparas i SQLite (data/bookings.sqlite).
 #   Uppladdade bilder sparas under data/images/.
+#   Med TENANTS_FILE har varje förening samma layout i TENANTS_DIR/<namn>/.
 # =============================================================================
 
+import functools
+import getpass
+import gzip
+import hashlib
+import heapq
+import hmac
+import http.client
+import json
+import math
+import mimetypes
 import os
+import queue
+import re
+import secrets
+import shutil
+import smtplib
 import sqlite3
+import struct
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
 from pathlib import Path
+from urllib.parse import quote, urlsplit
 
-from flask import Flask, request, send_from_directory, jsonify, session
+from flask import Flask, abort, g, request, send_file, jsonify, session
+from markupsafe import escape
 from werkzeug.security import check_password_hash, generate_password_hash
 from werkzeug.utils import secure_filename
 
@@ -35,9 +77,10 @@ from werkzeug.utils import secure_filename
 # App + sökvägar
 # =========================
 
-# Flask-appen pekar på projektroten (..) som static folder så att alla
-# HTML/CSS/JS-filer serveras direkt utan en separat webbserver.
-app = Flask(__name__, static_folder="..", static_url_path="")
+# Flasks inbyggda static-route är avstängd — alla HTML/CSS/JS-filer och bilder
+# från projektroten serveras av static_files längst ner, så att samma
+# sökvägskontroll och eventuell avlastning (FILE_OFFLOAD) gäller för alla filer.
+app = Flask(__name__, static_folder=None)
 
 # Secret key måste vara stabil mellan omstarter — annars loggas admin ut
 # varje gång servern startas om (sessioner blir ogiltiga).
@@ -58,9 +101,6 @@ app.secret_key = _load_secret_key()
 PROJECT_ROOT = Path(__file__).parent.parent.resolve()
 DATA_DIR      = PROJECT_ROOT / "data"
 DB_PATH       = DATA_DIR / "bookings.sqlite"
-IMAGES_DIR    = DATA_DIR / "images"
-EVENTS_IMG    = IMAGES_DIR / "events"   # en mapp per event: events/<id>/bild.jpg
-GALLERY_DIR   = IMAGES_DIR / "gallery"  # platta mappar: gallery/bild.jpg
 
 # Tillåtna bildtyper vid uppladdning
 ALLOWED_EXTENSIONS = {"jpg", "jpeg", "png", "webp", "gif"}
@@ -69,6 +109,426 @@ ALLOWED_EXTENSIONS = {"jpg", "jpeg", "png", "webp", "gif"}
 # Ändra via: python -c "from werkzeug.security import generate_password_hash; print(generate_password_hash('ditt_lösenord'))"
 ADMIN_PASSWORD_HASH = generate_password_hash("kokobahia")
 
+# Flera föreningar i samma process (se Tenant). TENANTS_FILE är en JSON-fil:
+#   {"via": {"hosts": ["via.example.se", "www.via.example.se"],
+#            "admin_password_hash": "<python server/app.py hash-password>",
+#            "notify_email": ["styrelsen@example.se"]}, ...}
+# Host-headern väljer förening; varje förening har sin egen mapp TENANTS_DIR/<namn>/
+# med samma layout som projektets data/ (data/bookings.sqlite, data/images/).
+# Högst TENANT_MAX_OPEN föreningar har öppna anslutningar och cache samtidigt, med
+# högst TENANT_DB_POOL_SIZE lediga anslutningar var och TENANT_CACHE_KB sidcache per
+# anslutning. Läsrepliken och den statiska exporten används inte i det här läget.
+# Varje förenings cache för publika frågor (se cached) rymmer högst TENANT_CACHE_ENTRIES
+# nycklar; den som använts minst nyligen får ge plats (gäller även utan TENANTS_FILE).
+TENANTS_FILE         = Path(os.environ["TENANTS_FILE"]).resolve() if os.environ.get("TENANTS_FILE") else None
+TENANTS_DIR          = Path(os.environ.get("TENANTS_DIR") or (TENANTS_FILE.parent if TENANTS_FILE else DATA_DIR)).resolve()
+TENANT_MAX_OPEN      = int(os.environ.get("TENANT_MAX_OPEN", "16"))
+TENANT_DB_POOL_SIZE  = int(os.environ.get("TENANT_DB_POOL_SIZE", "2"))
+TENANT_CACHE_KB      = int(os.environ.get("TENANT_CACHE_KB", "2048"))
+TENANT_CACHE_ENTRIES = int(os.environ.get("TENANT_CACHE_ENTRIES", "256"))
+
+# Statisk export — om EXPORT_DIR är satt skrivs färdiga JSON-svar och sidans filer
+# dit efter varje lyckad skrivning, så att en vanlig filserver/CDN kan serva den
+# publika sajten. Python behövs då bara för admin och bokningar.
+EXPORT_DIR = Path(os.environ["EXPORT_DIR"]).resolve() if os.environ.get("EXPORT_DIR") and TENANTS_FILE is None else None
+
+# EXPORT_HTML=1 → exporten skriver server-renderade versioner av event-, styrelse-,
+# sponsor- och informationssidan istället för de tomma HTML-skalen.
+EXPORT_HTML = os.environ.get("EXPORT_HTML") == "1"
+
+# Statiska filer som får servas (relativt projektroten): *.html i roten, allt under
+# STATIC_ROOTS och bilder under UPLOADS_PREFIX. Inget annat — data/bookings.sqlite,
+# data/.secret_key, server/ och .git är aldrig nåbara. Tabellen byggs vid start;
+# uppladdningar läggs till när de sparas och mappen skannas om vid en miss, högst
+# var UPLOADS_RESCAN_SECONDS:e sekund (filer som lagts dit utifrån). I debugläge byggs
+# hela tabellen om vid en miss, högst var STATIC_RESCAN_SECONDS:e sekund.
+STATIC_ROOTS           = ("assets", "img")
+UPLOADS_PREFIX         = "data/images"
+UPLOADS_RESCAN_SECONDS = float(os.environ.get("UPLOADS_RESCAN_SECONDS", "60"))
+STATIC_RESCAN_SECONDS  = float(os.environ.get("STATIC_RESCAN_SECONDS", "5"))
+
+# Filer och mappar (relativt projektroten) som speglas till exportmappen.
+# OBS: data/ speglas bara via data/images — databasen och .secret_key följer aldrig med.
+EXPORT_STATIC_ROOTS = (*STATIC_ROOTS, UPLOADS_PREFIX)
+
+# Bokningsbara resurser. Resursen som används när en bokning inte anger någon
+# (kalendern och äldre klienter bokar alltid lokalen).
+DEFAULT_RESOURCE = "lokalen"
+
+# Resurser som skapas första gången databasen sätts upp: (slug, namn)
+DEFAULT_RESOURCES = (
+    ("lokalen", "Lokalen"),
+    ("koket",   "Lilla köket"),
+    ("utomhus", "Utomhusområdet"),
+)
+
+# Arkivering — bokningar vars datum passerats för mer än ARCHIVE_AFTER_DAYS dagar sedan
+# flyttas till bookings_archive så att den heta tabellen (kollisionskontroll, kalender)
+# hålls liten. Underhållsjobbet (arkivering, ANALYZE, VACUUM, WAL-checkpoint) körs
+# var MAINTENANCE_INTERVAL_HOURS:e timme; 0 stänger av schemat.
+ARCHIVE_AFTER_DAYS         = int(os.environ.get("ARCHIVE_AFTER_DAYS", "180"))
+MAINTENANCE_INTERVAL_HOURS = float(os.environ.get("MAINTENANCE_INTERVAL_HOURS", "24"))
+
+# Säkerhetskopior — roterade ögonblicksbilder av databasen + data/images.
+# BACKUP_PAGES_PER_STEP sidor kopieras per steg så att skrivare aldrig blockeras länge.
+BACKUP_DIR            = Path(os.environ.get("BACKUP_DIR") or DATA_DIR / "backups").resolve()
+BACKUP_KEEP           = int(os.environ.get("BACKUP_KEEP", "7"))
+BACKUP_PAGES_PER_STEP = int(os.environ.get("BACKUP_PAGES_PER_STEP", "256"))
+
+# Bildkategorier under data/images → tabellen vars image_path pekar dit.
+# Galleriet har ingen tabell: där är filen själva posten.
+IMAGE_CATEGORIES: dict[str, str | None] = {
+    "events":   "events",
+    "board":    "board_members",
+    "sponsors": "sponsors",
+    "gallery":  None,
+}
+
+# Städning av bilder som ingen rad pekar på. Högst SWEEP_BATCH_SIZE filer tas bort per
+# körning; filer yngre än SWEEP_MIN_AGE_SECONDS lämnas (uppladdningen kan pågå).
+# IMAGES_QUOTA_MB > 0 sätter ett tak för bildernas totala storlek vid uppladdning.
+SWEEP_BATCH_SIZE      = int(os.environ.get("SWEEP_BATCH_SIZE", "200"))
+SWEEP_MIN_AGE_SECONDS = int(os.environ.get("SWEEP_MIN_AGE_SECONDS", "3600"))
+IMAGES_QUOTA_BYTES    = int(float(os.environ.get("IMAGES_QUOTA_MB", "0")) * 1024 * 1024)
+
+# Avlastning av filleveranser till en framförliggande proxy:
+#   ""           → Python skickar filen själv (med Range- och villkorade requests)
+#   "x-accel"    → nginx: svaret får X-Accel-Redirect: FILE_OFFLOAD_PREFIX + sökväg
+#   "x-sendfile" → Apache/lighttpd: svaret får X-Sendfile med absolut sökväg
+# Exempel nginx: location /_files/ { internal; alias /sökväg/till/projektet/; }
+# Med TENANTS_FILE pekar en förenings uppladdade bilder på FILE_OFFLOAD_PREFIX + <namn>/
+# + sökväg relativt föreningens mapp, t.ex. /_files/via/data/images/gallery/bild.jpg:
+#   location ~ ^/_files/([^/]+)/(data/images/.*)$ { internal; alias /TENANTS_DIR/$1/$2; }
+FILE_OFFLOAD        = os.environ.get("FILE_OFFLOAD", "").strip().lower()
+FILE_OFFLOAD_PREFIX = os.environ.get("FILE_OFFLOAD_PREFIX", "/_files/")
+if FILE_OFFLOAD not in ("", "x-accel", "x-sendfile"):
+    raise ValueError(f"Okänt FILE_OFFLOAD-läge: {FILE_OFFLOAD!r}")
+
+# X-Sendfile stöds direkt av Flask: send_file sätter headern och skickar ingen body
+app.config["USE_X_SENDFILE"] = FILE_OFFLOAD == "x-sendfile"
+
+# Antal öppna SQLite-anslutningar som återanvänds mellan requests. Varje anslutning
+# behåller sin cache av förberedda satser (cached_statements).
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "8"))
+
+# Skrivkö — alla skrivningar från routes körs av en skrivtråd (se write), som samlar
+# skrivningar som kommer inom WRITE_BATCH_WINDOW_MS till en transaktion med en commit.
+# Högst WRITE_BATCH_MAX skrivningar per transaktion. WRITE_QUEUE=0 stänger av kön:
+# då körs varje skrivning i sin egen transaktion i requestens tråd.
+WRITE_QUEUE           = os.environ.get("WRITE_QUEUE", "1") != "0"
+WRITE_BATCH_WINDOW_MS = float(os.environ.get("WRITE_BATCH_WINDOW_MS", "2"))
+WRITE_BATCH_MAX       = int(os.environ.get("WRITE_BATCH_MAX", "64"))
+
+# Läsreplik — READ_REPLICA=1 håller en :memory:-kopia av de publika tabellerna som
+# publika GET-anrop läser från (se read_db). Egna skrivningar förs över direkt efter
+# commit; skrivningar från andra processer (flera WSGI-arbetare, underhållet) syns
+# inom READ_REPLICA_SYNC_SECONDS.
+READ_REPLICA              = os.environ.get("READ_REPLICA") == "1" and TENANTS_FILE is None
+READ_REPLICA_SYNC_SECONDS = float(os.environ.get("READ_REPLICA_SYNC_SECONDS", "1"))
+
+# Tabeller i läsrepliken: tabell (= entity i ändringsloggen) → (nyckelkolumn, villkor
+# för rader som är publika). Bildmetadata (images) följer med för raderna som pekar dit.
+REPLICA_TABLES: dict[str, tuple[str, str]] = {
+    "bookings":      ("id",   "status='approved'"),
+    "resources":     ("slug", "1"),
+    "events":        ("id",   "1"),
+    "board_members": ("id",   "1"),
+    "sponsors":      ("id",   "1"),
+    "page_sections": ("id",   "1"),
+}
+
+# Anropsbegränsning (token bucket) per klient-IP och endpoint. Värdet "N/S" betyder
+# högst N anrop i en följd och därefter N per S sekunder. RATE_LIMIT=0 stänger av
+# (t.ex. för stress_booking.py). Högst RATE_LIMIT_MAX_KEYS (IP, endpoint)-par hålls i
+# minnet; de som varit inaktiva längst släpps först. Bakom en proxy (nginx) anger
+# RATE_LIMIT_PROXY_HOPS hur många proxyer som lagt till sig i X-Forwarded-For.
+RATE_LIMIT            = os.environ.get("RATE_LIMIT", "1") != "0"
+RATE_LIMIT_MAX_KEYS   = int(os.environ.get("RATE_LIMIT_MAX_KEYS", "10000"))
+RATE_LIMIT_PROXY_HOPS = int(os.environ.get("RATE_LIMIT_PROXY_HOPS", "0"))
+
+
+def _rate_env(name: str, default: str) -> tuple[float, float]:
+    """Läser "N/S" ur miljövariabeln → (kapacitet, påfyllning per sekund)."""
+    value = os.environ.get(name, default)
+    count, _, seconds = value.partition("/")
+    try:
+        n, s = float(count), float(seconds or 1)
+    except ValueError:
+        n = s = 0.0
+    if not (0 < n < math.inf and 0 < s < math.inf):
+        raise SystemExit(f"{name}: förväntar N/S med positiva tal (t.ex. 10/60), fick {value!r}")
+    return n, n / s
+
+
+RATE_LIMITS: dict[str, tuple[float, float]] = {
+    "/api/book":    _rate_env("RATE_LIMIT_BOOK",    "10/60"),
+    "/api/contact": _rate_env("RATE_LIMIT_CONTACT", "5/300"),
+    "/api/members": _rate_env("RATE_LIMIT_MEMBERS", "5/300"),
+    "/api/login":   _rate_env("RATE_LIMIT_LOGIN",   "10/300"),
+    "/api/holds":   _rate_env("RATE_LIMIT_HOLDS",   "30/60"),
+}
+
+# Tillfälliga reservationer (holds) medan en besökare fyller i bokningsformuläret.
+# En hold spärrar tiden för andra i HOLD_SECONDS; en klient (IP) kan ha högst
+# HOLD_MAX_PER_IP samtidigt. HOLDS_MIRROR=1 speglar dem till tabellen holds så att
+# de överlever en omstart.
+HOLD_SECONDS    = int(os.environ.get("HOLD_SECONDS", "300"))
+HOLD_MAX_PER_IP = int(os.environ.get("HOLD_MAX_PER_IP", "3"))
+HOLDS_MIRROR    = os.environ.get("HOLDS_MIRROR") == "1"
+
+# Notiser till admin (se notify). NOTIFY_EMAIL = mottagare (kommaseparerade) som får ett
+# mejl via SMTP_HOST; NOTIFY_WEBHOOK_URL får en JSON-POST (signerad med HMAC-SHA256 i
+# X-Signature om NOTIFY_WEBHOOK_SECRET är satt). Utan någon av dem skrivs inga notiser.
+# Misslyckade leveranser försöks igen efter NOTIFY_RETRY_SECONDS, dubblat per försök
+# (högst NOTIFY_RETRY_MAX_SECONDS), och ges upp efter NOTIFY_MAX_ATTEMPTS.
+NOTIFY_EMAIL             = [a.strip() for a in os.environ.get("NOTIFY_EMAIL", "").split(",") if a.strip()]
+NOTIFY_WEBHOOK_URL       = os.environ.get("NOTIFY_WEBHOOK_URL", "")
+NOTIFY_WEBHOOK_SECRET    = os.environ.get("NOTIFY_WEBHOOK_SECRET", "")
+SMTP_HOST                = os.environ.get("SMTP_HOST", "localhost")
+SMTP_PORT                = int(os.environ.get("SMTP_PORT", "25"))
+SMTP_USER                = os.environ.get("SMTP_USER", "")
+SMTP_PASSWORD            = os.environ.get("SMTP_PASSWORD", "")
+SMTP_STARTTLS            = os.environ.get("SMTP_STARTTLS") == "1"
+SMTP_FROM                = os.environ.get("SMTP_FROM", "webbplatsen@localhost")
+NOTIFY_BATCH_SECONDS     = float(os.environ.get("NOTIFY_BATCH_SECONDS", "2"))
+NOTIFY_BATCH_MAX         = int(os.environ.get("NOTIFY_BATCH_MAX", "50"))
+NOTIFY_POLL_SECONDS      = float(os.environ.get("NOTIFY_POLL_SECONDS", "15"))
+NOTIFY_TIMEOUT           = float(os.environ.get("NOTIFY_TIMEOUT", "10"))
+NOTIFY_MAX_ATTEMPTS      = int(os.environ.get("NOTIFY_MAX_ATTEMPTS", "8"))
+NOTIFY_RETRY_SECONDS     = float(os.environ.get("NOTIFY_RETRY_SECONDS", "30"))
+NOTIFY_RETRY_MAX_SECONDS = float(os.environ.get("NOTIFY_RETRY_MAX_SECONDS", "3600"))
+
+# Antal rader per fetchmany när stora adminlistor strömmas (se stream_rows_response)
+STREAM_BATCH_ROWS = int(os.environ.get("STREAM_BATCH_ROWS", "500"))
+
+# Fulltextsökning (FTS5) — en sökbar skuggtabell per källtabell.
+# Nyckel: källtabell, värde: kolumner som indexeras. Skuggtabellen heter <tabell>_fts
+# och hålls i synk av triggers (se _ensure_fts).
+FTS_TABLES: dict[str, tuple[str, ...]] = {
+    "messages":      ("name", "email", "message"),
+    "members":       ("member_number", "name", "email", "phone"),
+    "bookings":      ("name", "email", "title"),
+    "bookings_archive": ("name", "email", "title"),
+    "events":        ("title", "description"),
+    "page_sections": ("title", "content"),
+}
+
+# Kolumn som visas som rubrik för en sökträff i adminpanelen
+FTS_LABEL_COLUMN: dict[str, str] = {
+    "messages":      "name",
+    "members":       "name",
+    "bookings":      "title",
+    "bookings_archive": "title",
+    "events":        "title",
+    "page_sections": "title",
+}
+
+# Ändringslogg — tabeller vars INSERT/UPDATE/DELETE skrivs till changes av triggers
+# (se _ensure_change_log). Nyckel: tabell, värde: (entity i /api/changes, nyckelkolumn).
+# Arkivet loggas som "bookings": en arkiverad bokning är samma bokning för adminpanelen.
+CHANGE_LOG_TABLES: dict[str, tuple[str, str]] = {
+    "bookings":         ("bookings",      "id"),
+    "bookings_archive": ("bookings",      "id"),
+    "messages":         ("messages",      "id"),
+    "members":          ("members",       "id"),
+    "events":           ("events",        "id"),
+    "board_members":    ("board_members", "id"),
+    "sponsors":         ("sponsors",      "id"),
+    "page_sections":    ("page_sections", "id"),
+    "resources":        ("resources",     "slug"),
+}
+
+# Komprimering av svar (gzip). COMPRESS_LEVEL 1–9, 0 stänger av. Svar mindre än
+# COMPRESS_MIN_BYTES skickas okomprimerade. Komprimerade varianter cachas per ETag
+# upp till COMPRESS_CACHE_BYTES totalt.
+COMPRESS_LEVEL       = int(os.environ.get("COMPRESS_LEVEL", "6"))
+COMPRESS_MIN_BYTES   = int(os.environ.get("COMPRESS_MIN_BYTES", "1024"))
+COMPRESS_CACHE_BYTES = int(os.environ.get("COMPRESS_CACHE_BYTES", str(4 * 1024 * 1024)))
+
+# Innehållstyper som lönar sig att komprimera. Bilder (utom SVG) är redan komprimerade.
+COMPRESSIBLE_TYPES = {
+    "application/json", "application/javascript", "text/html", "text/css",
+    "text/javascript", "text/plain", "text/xml", "application/xml", "image/svg+xml",
+}
+
+# Hur länge poster i ändringsloggen sparas (rensas av underhållet). En klient som
+# synkar mer sällan än så får reset=true och laddar om sina listor.
+CHANGES_KEEP_DAYS = int(os.environ.get("CHANGES_KEEP_DAYS", "90"))
+
+
+# =========================
+# Föreningar (tenants)
+# =========================
+#
+# Utan TENANTS_FILE finns en enda förening: projektets egen data/ (DB_PATH) och
+# ADMIN_PASSWORD_HASH. Med TENANTS_FILE väljer Host-headern förening innan någon
+# annan before_request-hook körs, och allt som rör föreningens data går via tenant():
+# sökvägar, admin-lösenord, anslutningspool, cache för publika frågor, uppladdade
+# bilder, holds och notiser. Bakgrundsjobb (skrivtråden, underhållet, notiserna)
+# väljer förening med using_tenant.
+#
+# Minnet hålls begränsat oavsett antal föreningar: bara de TENANT_MAX_OPEN senast
+# använda har öppna anslutningar och cachade frågeresultat. När ytterligare en öppnas
+# stängs den som legat oanvänd längst (datat ligger kvar på disk och öppnas igen vid
+# behov). gzip-cachen (COMPRESS_CACHE_BYTES) och anropsbegränsningen delas av alla.
+
+class Tenant:
+    """
+    En förening: var dess data ligger, dess admin-lösenord och det som hålls öppet för
+    den medan den används. image_path i databasen är relativ root (root/data/images/…).
+    """
+    __slots__ = (
+        "name", "root", "data_dir", "db_path", "images_dir", "events_img", "gallery_dir",
+        "backup_dir", "password_hash", "notify_email", "pool_size",
+        "is_open", "pool", "ready", "cache", "cache_generation", "inflight",
+        "upload_routes", "uploads_scanned",
+    )
+
+    def __init__(self, name: str, root: Path, db_path: Path, password_hash: str,
+                 notify_email: list[str], backup_dir: Path, pool_size: int):
+        self.name          = name
+        self.root          = root
+        self.data_dir      = root / "data"
+        self.db_path       = db_path
+        self.images_dir    = self.data_dir / "images"
+        self.events_img    = self.images_dir / "events"   # en mapp per event: events/<id>/bild.jpg
+        self.gallery_dir   = self.images_dir / "gallery"  # platta mappar: gallery/bild.jpg
+        self.backup_dir    = backup_dir
+        self.password_hash = password_hash
+        self.notify_email  = notify_email
+        self.pool_size     = pool_size
+
+        self.is_open          = True
+        self.pool: list[sqlite3.Connection] = []      # lediga anslutningar (se db)
+        self.ready            = False                 # ensure_db har körts
+        self.cache: OrderedDict[str, tuple[int, object]] = OrderedDict()  # LRU, se cached
+        self.cache_generation = 0
+        self.inflight: dict[tuple[str, int], _Flight] = {}
+        self.upload_routes: set[str] = set()          # se static_route
+        self.uploads_scanned  = 0.0
+
+    def close(self) -> None:
+        """Stänger lediga anslutningar och tömmer cacharna; öppnas igen vid nästa db()."""
+        with _db_pool_lock:
+            self.is_open = False
+            pool, self.pool = self.pool, []
+        for con in pool:
+            con.close()
+        with _cache_lock:
+            self.cache.clear()
+            self.cache_generation += 1
+        with _routes_lock:
+            self.upload_routes   = set()
+            self.uploads_scanned = 0.0
+
+
+_tenant_var: ContextVar[Tenant | None] = ContextVar("tenant", default=None)
+_default_tenant: Tenant | None = None
+_tenants: dict[str, Tenant] = {}          # namn → förening (ur TENANTS_FILE)
+_tenant_hosts: dict[str, Tenant] = {}     # host → förening
+_open_tenants: "OrderedDict[str, Tenant]" = OrderedDict()  # LRU över föreningar med öppna resurser
+_tenants_lock = threading.Lock()
+
+
+def load_tenants(path: Path) -> None:
+    """
+    VARFÖR: Föreningarna ska kunna läggas till utan kodändring.
+    VAD: Läser TENANTS_FILE: {"<namn>": {"hosts": [...], "admin_password_hash": "...",
+         "notify_email": [...]}}. Namnet blir mappen TENANTS_DIR/<namn>.
+    HUR: Körs en gång när modulen laddas; ett fel i filen stoppar starten.
+    """
+    config = json.loads(path.read_text(encoding="utf-8"))
+    for name, entry in config.items():
+        if not re.fullmatch(r"[a-z0-9-]+", name):
+            raise ValueError(f"Ogiltigt föreningsnamn i {path}: {name!r} (a–z, 0–9, -)")
+        root = TENANTS_DIR / name
+        t = Tenant(
+            name, root, root / "data" / "bookings.sqlite", entry["admin_password_hash"],
+            list(entry.get("notify_email", [])),
+            Path(os.environ["BACKUP_DIR"]).resolve() / name if os.environ.get("BACKUP_DIR") else root / "data" / "backups",
+            TENANT_DB_POOL_SIZE,
+        )
+        _tenants[name] = t
+        for host in entry["hosts"]:
+            _tenant_hosts[host.lower()] = t
+
+
+def default_tenant() -> Tenant:
+    """Föreningen utan TENANTS_FILE. Skapas vid första användningen (efter ev. ändrad DB_PATH)."""
+    global _default_tenant
+    if _default_tenant is None:
+        _default_tenant = Tenant("", PROJECT_ROOT, DB_PATH, ADMIN_PASSWORD_HASH, NOTIFY_EMAIL, BACKUP_DIR, DB_POOL_SIZE)
+    return _default_tenant
+
+
+def tenant() -> Tenant:
+    """Föreningen som aktuell request (eller using_tenant i ett bakgrundsjobb) gäller."""
+    current = _tenant_var.get()
+    if current is not None:
+        return current
+    if TENANTS_FILE is not None:
+        raise RuntimeError("Ingen förening vald (anropet saknar request eller using_tenant)")
+    return default_tenant()
+
+
+def all_tenants() -> list[Tenant]:
+    """Alla föreningar — för bakgrundsjobb som ska köras för var och en."""
+    return list(_tenants.values()) if TENANTS_FILE is not None else [default_tenant()]
+
+
+@contextmanager
+def using_tenant(t: Tenant):
+    """Kör with-blocket som föreningen t (i bakgrundstrådar och CLI-kommandon)."""
+    token = _tenant_var.set(t)
+    try:
+        yield t
+    finally:
+        _tenant_var.reset(token)
+
+
+def touch_tenant(t: Tenant) -> None:
+    """
+    VARFÖR: Dussintals föreningar ska kunna dela process utan att var och en håller
+            anslutningar och cache öppna hela tiden.
+    VAD: Markerar t som senast använd; över TENANT_MAX_OPEN stängs den som legat
+         oanvänd längst (Tenant.close).
+    HUR: Anropas av db(). Utan TENANTS_FILE görs ingenting.
+    """
+    if TENANTS_FILE is None:
+        return
+    evicted = []
+    with _tenants_lock:
+        _open_tenants[t.name] = t
+        _open_tenants.move_to_end(t.name)
+        t.is_open = True
+        while len(_open_tenants) > TENANT_MAX_OPEN:
+            evicted.append(_open_tenants.popitem(last=False)[1])
+    for old in evicted:
+        old.close()
+
+
+@app.before_request
+def _select_tenant():
+    """Väljer förening ur Host-headern (med TENANTS_FILE); okänd host → 404."""
+    if TENANTS_FILE is None:
+        return None
+    t = _tenant_hosts.get(request.host.rsplit(":", 1)[0].lower())
+    if t is None:
+        return jsonify({"ok": False, "error": "Okänd webbplats"}), 404
+    g.tenant_token = _tenant_var.set(t)
+    return None
+
+
+@app.teardown_request
+def _reset_tenant(exc):
+    token = g.pop("tenant_token", None)
+    if token is not None:
+        _tenant_var.reset(token)
+
+
+if TENANTS_FILE is not None:
+    load_tenants(TENANTS_FILE)
+
 
 # =========================
 # Hjälpfunktioner
@@ -88,17 +548,128 @@ def allowed_file(filename: str) -> bool:
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+# JPEG-markörer som inleder en bildram (SOF) — där står bildens mått
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def _jpeg_orientation(exif: bytes) -> int:
+    """EXIF-orienteringen (1–8) ur ett APP1-segment, 1 om den saknas."""
+    if not exif.startswith(b"Exif\0\0"):
+        return 1
+    tiff  = exif[6:]
+    order = "<" if tiff[:2] == b"II" else ">"
+    ifd   = struct.unpack(order + "I", tiff[4:8])[0]
+    count = struct.unpack(order + "H", tiff[ifd:ifd + 2])[0]
+    for i in range(count):
+        entry = tiff[ifd + 2 + i * 12: ifd + 14 + i * 12]
+        if struct.unpack(order + "H", entry[:2])[0] == 0x0112:
+            return struct.unpack(order + "H", entry[8:10])[0]
+    return 1
+
+
+def save_upload(file, directory: Path) -> tuple[Path, str, dict | None]:
+    """
+    VARFÖR: Filen ska skrivas innan write() — inte i skrivtråden medan BEGIN IMMEDIATE
+            håller låset för alla andra skrivningar.
+    VAD: Sparar uppladdningen i directory och returnerar (sökväg, image_path, bildinfo).
+    HUR: En fil vars rad aldrig committas blir föräldralös och tas bort av sweep_images
+         (tidigast efter SWEEP_MIN_AGE_SECONDS).
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    save_path = directory / secure_filename(file.filename)
+    file.save(save_path)
+    register_upload(save_path)
+    return save_path, save_path.relative_to(tenant().root).as_posix(), read_image_info(save_path)
+
+
+def remove_image_file(image_path: str | None) -> None:
+    """Tar bort en bildfil som ingen rad längre pekar på (anropas efter att write() lyckats)."""
+    if image_path:
+        (tenant().root / image_path).unlink(missing_ok=True)
+
+
+def read_image_info(path: Path) -> dict | None:
+    """
+    VARFÖR: Sidorna ska kunna reservera plats för bilder innan de laddats, och ingen
+            ska behöva stat:a filer för att veta hur stora de är.
+    VAD: Returnerar {"width", "height", "format", "bytes"} för en JPEG/PNG/GIF/WebP-fil,
+         eller None om formatet inte känns igen.
+    HUR: Läser bara filhuvudet — ingen avkodning av pixeldata. För JPEG hoppar den mellan
+         segmenten tills bildramen (SOF) hittas; EXIF-orientering 5–8 (roterad 90°) byter
+         plats på bredd och höjd eftersom webbläsaren visar bilden roterad.
+    """
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            head = f.read(30)
+
+            if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+                width, height = struct.unpack(">II", head[16:24])
+                return {"width": width, "height": height, "format": "png", "bytes": size}
+
+            if head[:6] in (b"GIF87a", b"GIF89a"):
+                width, height = struct.unpack("<HH", head[6:10])
+                return {"width": width, "height": height, "format": "gif", "bytes": size}
+
+            if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+                chunk = head[12:16]
+                if chunk == b"VP8 ":    # förlustkomprimerad
+                    width, height = (v & 0x3FFF for v in struct.unpack("<HH", head[26:30]))
+                elif chunk == b"VP8L":  # förlustfri: 14 bitar bredd-1, 14 bitar höjd-1
+                    bits   = int.from_bytes(head[21:25], "little")
+                    width  = (bits & 0x3FFF) + 1
+                    height = ((bits >> 14) & 0x3FFF) + 1
+                elif chunk == b"VP8X":  # utökad: 24 bitar bredd-1 och höjd-1
+                    width  = int.from_bytes(head[24:27], "little") + 1
+                    height = int.from_bytes(head[27:30], "little") + 1
+                else:
+                    return None
+                return {"width": width, "height": height, "format": "webp", "bytes": size}
+
+            if head[:2] == b"\xff\xd8":
+                f.seek(2)
+                orientation = 1
+                while True:
+                    if f.read(1) != b"\xff":
+                        return None
+                    marker = f.read(1)
+                    while marker == b"\xff":   # utfyllnad mellan segment
+                        marker = f.read(1)
+                    if not marker or marker[0] in (0xD9, 0xDA):  # slut/bilddata före SOF
+                        return None
+                    if marker[0] == 0x01 or 0xD0 <= marker[0] <= 0xD7:  # markörer utan längd
+                        continue
+                    length = struct.unpack(">H", f.read(2))[0]
+                    if marker[0] in _JPEG_SOF:
+                        height, width = struct.unpack(">xHH", f.read(5))
+                        if orientation >= 5:
+                            width, height = height, width
+                        return {"width": width, "height": height, "format": "jpeg", "bytes": size}
+                    if marker[0] == 0xE1 and orientation == 1:
+                        orientation = _jpeg_orientation(f.read(length - 2))
+                    else:
+                        f.seek(length - 2, os.SEEK_CUR)
+    except (OSError, struct.error, IndexError):
+        return None
+    return None
+
+
 def ensure_db() -> None:
     """
     VARFÖR: Databasen och bildmappar måste finnas innan appen tar emot requests.
     VAD: Skapar SQLite-tabeller och filsystemskataloger om de saknas.
-    HUR: Körs automatiskt innan varje DB-anrop via db()-funktionen.
+    HUR: Körs automatiskt första gången db() lämnar ut en anslutning (en gång per process
+         och förening). En ny förening i TENANTS_FILE får sina mappar och tabeller här.
     """
-    os.makedirs(DATA_DIR, exist_ok=True)
-    os.makedirs(EVENTS_IMG, exist_ok=True)
-    os.makedirs(GALLERY_DIR, exist_ok=True)
+    t = tenant()
+    os.makedirs(t.data_dir, exist_ok=True)
+    os.makedirs(t.events_img, exist_ok=True)
+    os.makedirs(t.gallery_dir, exist_ok=True)
+
+    with sqlite3.connect(t.db_path) as con:
+        # WAL: läsare blockeras inte av skrivare. Inställningen sparas i databasfilen.
+        con.execute("PRAGMA journal_mode=WAL")
 
-    with sqlite3.connect(DB_PATH) as con:
         # Bokningar — används för kalendern och direktbokning
         con.execute(
             """
@@ -117,6 +688,59 @@ def ensure_db() -> None:
             )
             """
         )
+        # Migrering: lägg till resource om tabellen redan finns utan den
+        try:
+            con.execute(f"ALTER TABLE bookings ADD COLUMN resource TEXT NOT NULL DEFAULT '{DEFAULT_RESOURCE}'")
+        except Exception:
+            pass  # kolumnen finns redan
+
+        # Index för kollisionskontroll och kalendern — alltid avgränsat till en resurs
+        con.execute("DROP INDEX IF EXISTS idx_bookings_status_start")
+        con.execute(
+            "CREATE INDEX IF NOT EXISTS idx_bookings_resource_status_start ON bookings (resource, status, start)"
+        )
+
+        # Resurser — lokaler/ytor som kan bokas var för sig (lokalen, köket, utomhus)
+        con.execute(
+            """
+            CREATE TABLE IF NOT EXISTS resources (
+                slug          TEXT PRIMARY KEY,
+                name          TEXT NOT NULL,
+                display_order INTEGER NOT NULL DEFAULT 0,
+                created_at    TEXT NOT NULL
+            )
+            """
+        )
+        con.executemany(
+            "INSERT OR IGNORE INTO resources (slug, name, display_order, created_at) VALUES (?, ?, ?, ?)",
+            [(slug, name, order, utc_now_iso()) for order, (slug, name) in enumerate(DEFAULT_RESOURCES, start=1)],
+        )
+
+        # Arkiverade bokningar — samma kolumner som bookings plus archived_at.
+        # id behålls från bookings så att id:n är unika över båda tabellerna.
+        con.execute(
+            """
+            CREATE TABLE IF NOT EXISTS bookings_archive (
+                id           INTEGER PRIMARY KEY,
+                status       TEXT NOT NULL,
+                title        TEXT NOT NULL,
+                start        TEXT NOT NULL,
+                end          TEXT,
+                name         TEXT,
+                email        TEXT,
+                phone        TEXT,
+                booking_type TEXT,
+                message      TEXT,
+                created_at   TEXT NOT NULL,
+                archived_at  TEXT NOT NULL
+            )
+            """
+        )
+        # Migrering: lägg till resource om arkivtabellen redan finns utan den
+        try:
+            con.execute(f"ALTER TABLE bookings_archive ADD COLUMN resource TEXT NOT NULL DEFAULT '{DEFAULT_RESOURCE}'")
+        except Exception:
+            pass  # kolumnen finns redan
         # Kontaktmeddelanden — sparas från kontaktformuläret
         con.execute(
             """
@@ -174,6 +798,10 @@ def ensure_db() -> None:
             )
             """
         )
+        # Index för api_get_page_sections (WHERE page=? ORDER BY display_order)
+        con.execute(
+            "CREATE INDEX IF NOT EXISTS idx_page_sections_page_order ON page_sections (page, display_order)"
+        )
 
         # Styrelsemedlemmar — roller som admin kan redigera (ordförande, kassör, etc.)
         con.execute(
@@ -209,302 +837,2295 @@ def ensure_db() -> None:
             )
             """
         )
+        # Bildmetadata (mått, format, storlek) per uppladdad fil, läst vid uppladdning.
+        # path är relativ projektroten som image_path; category = mappen under data/images.
+        images_existed = con.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='images'"
+        ).fetchone()
+        con.execute(
+            """
+            CREATE TABLE IF NOT EXISTS images (
+                path       TEXT PRIMARY KEY,
+                category   TEXT NOT NULL,
+                width      INTEGER,
+                height     INTEGER,
+                format     TEXT,
+                bytes      INTEGER NOT NULL,
+                created_at TEXT NOT NULL
+            )
+            """
+        )
+        if not images_existed:
+            _backfill_images(con)
+
+        # Notiser som väntar på leverans (se notify). Skrivs i samma transaktion som
+        # bokningen/meddelandet/medlemmen; levererade rader tas bort, och rader som
+        # gett upp efter NOTIFY_MAX_ATTEMPTS får status 'failed' och ligger kvar.
+        con.execute(
+            """
+            CREATE TABLE IF NOT EXISTS outbox (
+                id           INTEGER PRIMARY KEY AUTOINCREMENT,
+                channel      TEXT NOT NULL,
+                kind         TEXT NOT NULL,
+                payload      TEXT NOT NULL,
+                status       TEXT NOT NULL DEFAULT 'pending',
+                attempts     INTEGER NOT NULL DEFAULT 0,
+                next_attempt REAL NOT NULL,
+                last_error   TEXT,
+                created_at   TEXT NOT NULL
+            )
+            """
+        )
+        con.execute(
+            "CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (next_attempt) WHERE status = 'pending'"
+        )
+
+        # Speglade reservationer (se HOLDS_MIRROR). Utanför ändringsloggen: de är
+        # kortlivade och syns bara i kalendern, aldrig i /api/changes.
+        if HOLDS_MIRROR:
+            con.execute(
+                """
+                CREATE TABLE IF NOT EXISTS holds (
+                    token        TEXT PRIMARY KEY,
+                    resource     TEXT NOT NULL,
+                    day          TEXT NOT NULL,
+                    booking_type TEXT NOT NULL,
+                    time_slot    TEXT NOT NULL,
+                    ip           TEXT NOT NULL,
+                    expires      REAL NOT NULL
+                ) WITHOUT ROWID
+                """
+            )
+            _restore_holds(con)
+
+        _ensure_fts(con)
+        _ensure_change_log(con)
+        _ensure_stats(con)
         con.commit()
 
 
-def db() -> sqlite3.Connection:
-    """
-    VARFÖR: Central plats för att öppna DB-anslutningar med rätt inställningar.
-    VAD: Returnerar en sqlite3-anslutning med row_factory satt till sqlite3.Row,
-         vilket gör att kolumner kan nås med namn (row["title"]) istället för index.
-    HUR: Anropar ensure_db() för att garantera att tabeller finns.
-    """
-    ensure_db()
-    con = sqlite3.connect(DB_PATH)
-    con.row_factory = sqlite3.Row
-    return con
+def _backfill_images(con: sqlite3.Connection) -> None:
+    """Läser in metadata för bilder som laddades upp innan images-tabellen fanns."""
+    for path in sorted(tenant().images_dir.rglob("*")):
+        if path.is_file() and allowed_file(path.name):
+            ImageMetaRepo.record(con, path)
 
 
-def is_admin() -> bool:
+def _ensure_fts(con: sqlite3.Connection) -> None:
     """
-    VARFÖR: Alla admin-endpoints måste skyddas — detta är grindvakten.
-    VAD: Returnerar True om den aktuella sessionen tillhör en inloggad admin.
-    HUR: Läser Flask-sessionens "admin"-nyckel (sätts vid inloggning).
+    VARFÖR: Admin ska kunna söka i gamla meddelanden, medlemmar m.m. utan att hela
+            listorna laddas till webbläsaren — sökkostnaden ska inte växa med tabellen.
+    VAD: Skapar FTS5-tabeller (external content) och triggers som håller dem i synk
+         med källtabellerna vid INSERT, UPDATE och DELETE.
+    HUR: Tabeller och triggers skapas med IF NOT EXISTS. Om FTS-tabellen saknades
+         byggs indexet om från källtabellen ('rebuild') så att befintliga rader blir sökbara.
     """
-    return session.get("admin") is True
+    for table, cols in FTS_TABLES.items():
+        fts = f"{table}_fts"
+        existed = con.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (fts,)
+        ).fetchone()
 
+        col_list = ", ".join(cols)
+        new_vals = ", ".join(f"new.{c}" for c in cols)
+        old_vals = ", ".join(f"old.{c}" for c in cols)
 
-# =========================
-# Auth: Login / Logout
-# =========================
+        con.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+            f"{col_list}, content='{table}', content_rowid='id')"
+        )
+        con.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts} (rowid, {col_list}) VALUES (new.id, {new_vals});
+            END
+            """
+        )
+        con.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {col_list}) VALUES ('delete', old.id, {old_vals});
+            END
+            """
+        )
+        con.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {col_list}) VALUES ('delete', old.id, {old_vals});
+                INSERT INTO {fts} (rowid, {col_list}) VALUES (new.id, {new_vals});
+            END
+            """
+        )
 
-@app.post("/api/login")
-def api_login():
-    """
-    VARFÖR: Adminpanelen kräver autentisering — detta är inloggningsendpointen.
-    VAD: Tar emot ett lösenord (JSON), verifierar mot det hashade lösenordet
-         och sätter en session-cookie vid rätt lösenord.
-    HUR: Använder werkzeug.security.check_password_hash för säker jämförelse.
-    """
-    data = request.get_json(silent=True) or {}
-    password = (data.get("password") or "").strip()
+        if not existed:
+            con.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
 
-    if not password or not check_password_hash(ADMIN_PASSWORD_HASH, password):
-        return jsonify({"ok": False, "error": "Fel lösenord"}), 401
 
-    session["admin"] = True
-    return jsonify({"ok": True})
+def _ensure_change_log(con: sqlite3.Connection) -> None:
+    """
+    VARFÖR: Adminpanelen och externa konsumenter ska kunna hämta bara det som ändrats,
+            och loggen får aldrig missa en ändring eller visa en som rullades tillbaka.
+    VAD: Skapar den append-only tabellen changes och triggers på CHANGE_LOG_TABLES.
+    HUR: Varje INSERT/UPDATE/DELETE lägger till en rad (seq, entity, key, op, changed_at)
+         i samma transaktion som ändringen. seq är AUTOINCREMENT och återanvänds aldrig.
+    """
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS changes (
+            seq        INTEGER PRIMARY KEY AUTOINCREMENT,
+            entity     TEXT NOT NULL,
+            key        TEXT NOT NULL,
+            op         TEXT NOT NULL,
+            changed_at TEXT NOT NULL
+        )
+        """
+    )
+    now = "strftime('%Y-%m-%dT%H:%M:%fZ', 'now')"
+    for table, (entity, key_col) in CHANGE_LOG_TABLES.items():
+        for op, event, ref in (("insert", "INSERT", "new"), ("update", "UPDATE", "new"), ("delete", "DELETE", "old")):
+            con.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_changes_{op} AFTER {event} ON {table} BEGIN
+                    INSERT INTO changes (entity, key, op, changed_at)
+                    VALUES ('{entity}', {ref}.{key_col}, '{op}', {now});
+                END
+                """
+            )
 
 
-@app.post("/api/logout")
-def api_logout():
+# Statistik — SQL som räknar en bokningsrad (r) in i summeringstabellerna med tecknet
+# {sign} (1 eller -1). {rows} är raden/raderna: NEW eller OLD i en trigger, hela
+# tabellen när statistiken byggs om. Bokningar räknas på startdagen; beläggningen på
+# varje dag bokningen upptar (helg: två dagar, end är exklusivt, högst 31 dagar).
+_STATS_LEAD = "CAST(julianday(date(r.start)) - julianday(date(substr(r.created_at, 1, 10))) AS INTEGER)"
+_STATS_SPAN = (
+    "CASE WHEN r.end IS NULL OR length(r.end) > 10 THEN 1 "
+    "ELSE MAX(1, MIN(31, COALESCE(CAST(julianday(r.end) - julianday(date(r.start)) AS INTEGER), 1))) END"
+)
+_STATS_BOOKING_SQL = (
     """
-    VARFÖR: Admin ska kunna logga ut.
-    VAD: Rensar sessionen (tar bort "admin"-nyckeln och alla andra sessionsdata).
-    HUR: Anropar session.clear() och returnerar bekräftelse.
+    INSERT INTO stats_bookings (day, resource, booking_type, bookings, lead_bookings, lead_days)
+    SELECT date(r.start), r.resource, COALESCE(r.booking_type, ''), {sign},
+           {sign} * ({lead} IS NOT NULL), {sign} * COALESCE({lead}, 0)
+    FROM {rows}
+    WHERE r.status = 'approved' AND date(r.start) IS NOT NULL
+    ON CONFLICT (day, resource, booking_type) DO UPDATE SET
+        bookings      = bookings      + excluded.bookings,
+        lead_bookings = lead_bookings + excluded.lead_bookings,
+        lead_days     = lead_days     + excluded.lead_days
+    """,
     """
-    session.clear()
-    return jsonify({"ok": True})
+    INSERT INTO stats_occupancy (day, resource, bookings)
+    SELECT date(r.start, '+' || d.value || ' days'), r.resource, {sign}
+    FROM {rows}, json_each('[0,1,2,3,4,5,6,7,8,9,10,11,12,13,14,15,16,17,18,19,20,21,22,23,24,25,26,27,28,29,30]') AS d
+    WHERE r.status = 'approved' AND date(r.start) IS NOT NULL AND d.value < {span}
+    ON CONFLICT (day, resource) DO UPDATE SET bookings = bookings + excluded.bookings
+    """,
+)
+_STATS_MEMBER_SQL = (
+    """
+    INSERT INTO stats_members (month, members)
+    SELECT substr(r.created_at, 1, 7), {sign}
+    FROM {rows}
+    WHERE r.created_at IS NOT NULL
+    ON CONFLICT (month) DO UPDATE SET members = members + excluded.members
+    """,
+)
+# Källtabell → (SQL, kolumner som SQL:en läser)
+STATS_SOURCES: dict[str, tuple[tuple[str, ...], tuple[str, ...]]] = {
+    "bookings":         (_STATS_BOOKING_SQL, ("status", "start", "end", "resource", "booking_type", "created_at")),
+    "bookings_archive": (_STATS_BOOKING_SQL, ("status", "start", "end", "resource", "booking_type", "created_at")),
+    "members":          (_STATS_MEMBER_SQL,  ("created_at",)),
+}
+
+
+def _stats_sql(template: str, rows: str, sign: int) -> str:
+    return template.format(rows=rows, sign=sign, lead=_STATS_LEAD, span=_STATS_SPAN)
+
+
+def _ensure_stats(con: sqlite3.Connection) -> None:
+    """
+    VARFÖR: Statistiken i adminpanelen ska vara omedelbar, inte en aggregering över hela
+            bokningstabellen och arkivet vid varje anrop.
+    VAD: Skapar summeringstabellerna stats_bookings (per startdag, resurs och typ, med
+         summerad ledtid), stats_occupancy (antal godkända bokningar per upptagen dag och
+         resurs) och stats_members (nya medlemmar per månad), plus triggers som håller
+         dem uppdaterade.
+    HUR: INSERT räknar in NEW, DELETE drar ifrån OLD, UPDATE gör båda — i samma
+         transaktion som ändringen. Arkivering (DELETE ur bookings + INSERT i arkivet)
+         tar ut sig själv, så historiken finns kvar. Första gången byggs tabellerna
+         från befintliga rader (rebuild_stats).
+    """
+    existed = con.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='stats_bookings'"
+    ).fetchone()
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS stats_bookings (
+            day           TEXT NOT NULL,
+            resource      TEXT NOT NULL,
+            booking_type  TEXT NOT NULL,
+            bookings      INTEGER NOT NULL,
+            lead_bookings INTEGER NOT NULL,
+            lead_days     INTEGER NOT NULL,
+            PRIMARY KEY (day, resource, booking_type)
+        ) WITHOUT ROWID
+        """
+    )
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS stats_occupancy (
+            day      TEXT NOT NULL,
+            resource TEXT NOT NULL,
+            bookings INTEGER NOT NULL,
+            PRIMARY KEY (day, resource)
+        ) WITHOUT ROWID
+        """
+    )
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS stats_members (
+            month   TEXT PRIMARY KEY,
+            members INTEGER NOT NULL
+        ) WITHOUT ROWID
+        """
+    )
+
+    for table, (statements, columns) in STATS_SOURCES.items():
+        def row(ref: str) -> str:
+            return "(SELECT " + ", ".join(f"{ref}.{c} AS {c}" for c in columns) + ") AS r"
+
+        for op, event, parts in (
+            ("insert", "INSERT", (("new", 1),)),
+            ("delete", "DELETE", (("old", -1),)),
+            ("update", f"UPDATE OF {', '.join(columns)}", (("old", -1), ("new", 1))),
+        ):
+            body = "".join(
+                _stats_sql(sql, row(ref), sign) + ";" for ref, sign in parts for sql in statements
+            )
+            con.execute(f"CREATE TRIGGER IF NOT EXISTS {table}_stats_{op} AFTER {event} ON {table} BEGIN {body} END")
 
+    if not existed:
+        rebuild_stats(con)
 
-# =========================
-# API: Bokningar (publik)
-# =========================
 
-@app.get("/api/bookings")
-def api_get_bookings():
+def rebuild_stats(con: sqlite3.Connection) -> None:
+    """Räknar om summeringstabellerna från bokningar, arkiv och medlemmar."""
+    for table in ("stats_bookings", "stats_occupancy", "stats_members"):
+        con.execute(f"DELETE FROM {table}")
+    for table, (statements, _) in STATS_SOURCES.items():
+        for sql in statements:
+            con.execute(_stats_sql(sql, f"{table} AS r", 1))
+
+
+def fts_query(text: str) -> str:
     """
-    VARFÖR: Kalendern på boka.html behöver veta vilka datum som är bokade.
-    VAD: Returnerar alla godkända bokningar som FullCalendar-kompatibla event-objekt.
-    HUR: Hämtar status='approved'-rader och bygger JSON-lista med id, title, start, end.
+    VARFÖR: FTS5 har ett eget frågespråk — fritext från admin (t.ex. citattecken
+            eller "AND") får inte ge syntaxfel.
+    VAD: Gör om fritext till en säker MATCH-fråga där alla ord måste finnas (prefixsökning).
+    HUR: Plockar ut ordtecken, citerar varje ord och lägger till * för prefixmatchning.
+         Returnerar tom sträng om inga sökbara ord finns.
     """
-    try:
-        with db() as con:
-            rows = con.execute(
-                "SELECT id, title, start, end, booking_type FROM bookings WHERE status='approved' ORDER BY start ASC"
-            ).fetchall()
-
-        events = []
-        for r in rows:
-            item = {
-                "id": r["id"],
-                "title": r["title"],
-                "start": r["start"],
-            }
-            if r["end"]:
-                item["end"] = r["end"]
-            if r["booking_type"]:
-                item["booking_type"] = r["booking_type"]
-            events.append(item)
+    words = re.findall(r"\w+", text)
+    return " ".join(f'"{w}"*' for w in words)
 
-        return jsonify({"ok": True, "events": events})
-    except Exception:
-        return jsonify({"ok": False, "error": "Kunde inte hämta bokningar"}), 500
 
+# Skyddar föreningarnas pooler av lediga anslutningar (Tenant.pool, LIFO: senast
+# använda anslutningen är varmast)
+_db_pool_lock = threading.Lock()
 
-# =========================
-# API: Direktbokning (publik)
-# =========================
 
-@app.post("/api/book")
-def api_book():
+def _open_connection() -> sqlite3.Connection:
     """
-    VARFÖR: Besökare ska kunna boka lokalen direkt från kalendern utan att vänta på godkännande.
-    VAD: Tar emot bokningsdata (namn, e-post, telefon, datum, bokningstyp), kontrollerar
-         att datumet är ledigt och sparar direkt som 'approved'.
-    HUR:
-      - booking_type "2h" → 10:00–12:00 samma dag
-      - "heldag" → heldagsevent utan sluttid
-      - "helg" → lördag + söndag (FullCalendar exclusive end = datum+2 dagar)
-      Kollisionskontroll via SQL mot befintliga approved-bokningar.
+    Öppnar en ny anslutning till aktuell förenings databas med sqlite3.Row och en större
+    cache av förberedda satser. Med TENANTS_FILE begränsas sidcachen till TENANT_CACHE_KB.
     """
-    data = request.get_json(silent=True) or {}
-    name         = (data.get("name")         or "").strip()
-    email        = (data.get("email")        or "").strip()
-    phone        = (data.get("phone")        or "").strip()
-    date_str     = (data.get("date")         or "").strip()
-    booking_type = (data.get("booking_type") or "").strip()
-    time_slot    = (data.get("time_slot")    or "").strip()  # bara för 2h-bokningar
+    con = sqlite3.connect(tenant().db_path, check_same_thread=False, cached_statements=256)
+    con.row_factory = sqlite3.Row
+    if TENANTS_FILE is not None:
+        con.execute(f"PRAGMA cache_size=-{TENANT_CACHE_KB}")
+    return con
 
-    if not name or not email or not date_str:
-        return jsonify({"ok": False, "error": "Namn, e-post och datum krävs"}), 400
 
-    if booking_type not in ("2h", "heldag", "helg"):
-        return jsonify({"ok": False, "error": "Ogiltig bokningstyp"}), 400
+@contextmanager
+def db():
+    """
+    VARFÖR: Central plats för DB-anslutningar med rätt inställningar. Att öppna en ny
+            anslutning per request kastar bort SQLites förberedda satser varje gång.
+    VAD: Lånar ut en anslutning (row_factory = sqlite3.Row, så att kolumner kan nås
+         med namn) under ett with-block: `with db() as con: ...`
+    HUR:
+      - Anslutningen går till aktuell förening (tenant()); varje förening har sin pool
+      - ensure_db() körs första gången, sedan återanvänds anslutningar från poolen
+      - Lyckat block → commit, undantag → rollback; anslutningen lämnas sedan tillbaka
+      - Högst DB_POOL_SIZE (TENANT_DB_POOL_SIZE per förening) lediga anslutningar
+        sparas, övriga stängs — liksom de som lämnas tillbaka till en stängd förening
+    """
+    t = tenant()
+    touch_tenant(t)
+    if not t.ready:
+        ensure_db()
+        t.ready = True
 
-    # Tillgängliga tidsluckor för 2h-bokningar (matchar de i calendar.js)
-    SLOTS: dict[str, tuple[str, str]] = {
-        "09:00": ("09:00", "11:00"),
-        "12:00": ("12:00", "14:00"),
-        "15:00": ("15:00", "17:00"),
-        "18:00": ("18:00", "20:00"),
-    }
+    with _db_pool_lock:
+        con = t.pool.pop() if t.pool else None
+    if con is None:
+        con = _open_connection()
 
     try:
-        chosen_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-    except ValueError:
-        return jsonify({"ok": False, "error": "Ogiltigt datumformat"}), 400
+        yield con
+        con.commit()
+    except BaseException:
+        con.rollback()
+        raise
+    finally:
+        with _db_pool_lock:
+            if t.is_open and len(t.pool) < t.pool_size:
+                t.pool.append(con)
+                con = None
+        if con is not None:
+            con.close()
 
-    # Beräkna start/end utifrån bokningstyp
-    if booking_type == "2h":
-        if time_slot not in SLOTS:
-            return jsonify({"ok": False, "error": "Ogiltig tidslucka"}), 400
-        start_t, end_t = SLOTS[time_slot]
-        start = f"{date_str}T{start_t}:00"
-        end   = f"{date_str}T{end_t}:00"
-        title = f"{name} ({start_t}–{end_t})"
-    elif booking_type == "heldag":
-        start = date_str
-        end   = None
-        title = f"{name} (heldag)"
-    else:  # helg
-        start    = date_str
-        end_date = chosen_date + timedelta(days=2)  # FullCalendar exclusive end
-        end      = end_date.isoformat()
-        title    = f"{name} (helhelg)"
 
-    try:
+# =========================
+# Skrivkö (group commit)
+# =========================
+#
+# Varje skrivning som committar för sig väntar på SQLites skrivlås och gör en egen
+# fsync. Under en rusning (många bokningar samtidigt) blir det kön som avgör
+# genomströmningen. Därför körs routes skrivningar av en enda skrivtråd:
+#   - write(op) lägger op i kön och väntar på just sitt eget resultat
+#   - Skrivtråden tar det som hunnit köas (inom WRITE_BATCH_WINDOW_MS) och kör allt i
+#     en BEGIN IMMEDIATE-transaktion med en commit
+#   - Varje op körs i en egen SAVEPOINT: ett undantag rullar bara tillbaka den op:en
+#     och kastas hos dess anropare; övriga i samma transaktion påverkas inte
+# Operationerna körs efter varandra på samma anslutning, så varje op ser de tidigare
+# op:arnas rader — kollisionskontrollen i api_book fungerar precis som förut.
+# Med TENANTS_FILE delar alla föreningar skrivtråden: batchen delas per förening och
+# varje del körs på föreningens egen anslutning (högst TENANT_MAX_OPEN hålls öppna).
+
+_write_queue: queue.SimpleQueue = queue.SimpleQueue()
+_writer_pid: int | None = None
+_writer_lock = threading.Lock()
+
+
+def write(op):
+    """
+    VARFÖR: Samtidiga skrivningar ska dela transaktion och fsync istället för att köa
+            på skrivlåset en och en.
+    VAD: Kör op(con) i en skrivtransaktion och returnerar op:s returvärde, eller kastar
+         op:s undantag. Resultatet är committat när write returnerar.
+    HUR: op får inte själv anropa commit/rollback, BEGIN eller write. Med WRITE_QUEUE=0
+         körs op direkt i en BEGIN IMMEDIATE-transaktion via db().
+    """
+    if not WRITE_QUEUE:
         with db() as con:
-            # ── Kollisionskontroll ──
-            # Logik:
-            #   2h     → blockeras av: exakt samma tidslucka, eller heldag/helg samma dag
-            #   heldag → blockeras av: annan heldag/helg eller befintliga 2h-bokningar
-            #   helg   → blockeras av: heldag/helg eller 2h-bokningar lör eller sön
-
-            if booking_type == "2h":
-                # Exakt samma tidslucka (samma start-datetime)
-                slot_conflict = con.execute(
-                    "SELECT COUNT(*) as cnt FROM bookings WHERE status='approved' AND start=?",
-                    (start,),
-                ).fetchone()["cnt"]
-                # Heldag/helg som täcker detta datum
-                fullday_conflict = con.execute(
-                    """
-                    SELECT COUNT(*) as cnt FROM bookings
-                    WHERE status='approved'
-                    AND booking_type IN ('heldag', 'helg')
-                    AND (start = ? OR (start <= ? AND end > ?))
-                    """,
-                    (date_str, date_str, date_str),
-                ).fetchone()["cnt"]
-                conflicts = slot_conflict + fullday_conflict
-
-            elif booking_type == "heldag":
-                # Alla befintliga bokningar på detta datum (2h, heldag eller helg)
-                conflicts = con.execute(
-                    """
-                    SELECT COUNT(*) as cnt FROM bookings
-                    WHERE status='approved'
-                    AND (start = ? OR start LIKE ? OR (start <= ? AND end > ?))
-                    """,
-                    (date_str, f"{date_str}T%", date_str, date_str),
-                ).fetchone()["cnt"]
-
-            else:  # helg: kolla lördag + söndag
-                day1 = date_str
-                day2 = (chosen_date + timedelta(days=1)).isoformat()
-                conflicts = con.execute(
-                    """
-                    SELECT COUNT(*) as cnt FROM bookings
-                    WHERE status='approved'
-                    AND (
-                        start = ? OR start = ?
-                        OR start LIKE ? OR start LIKE ?
-                        OR (start <= ? AND end > ?)
-                        OR (start <= ? AND end > ?)
-                    )
-                    """,
-                    (day1, day2, f"{day1}T%", f"{day2}T%", day1, day1, day2, day2),
-                ).fetchone()["cnt"]
-
-            if conflicts > 0:
-                return jsonify({"ok": False, "error": "Datumet/tiden är redan bokat"}), 409
+            con.execute("BEGIN IMMEDIATE")
+            result = op(con)
+        if READ_REPLICA:
+            with db() as con:
+                refresh_replica(con)
+        return result
+
+    _ensure_writer()
+    future = Future()
+    _write_queue.put((op, future, tenant()))
+    return future.result()
+
+
+def _ensure_writer() -> None:
+    """Startar skrivtråden första gången i varje process (även efter fork)."""
+    global _write_queue, _writer_pid
+    if _writer_pid == os.getpid():
+        return
+    with _writer_lock:
+        if _writer_pid != os.getpid():
+            _write_queue = queue.SimpleQueue()
+            threading.Thread(target=_writer_loop, args=(_write_queue,), name="sqlite-writer", daemon=True).start()
+            _writer_pid = os.getpid()
+
+
+def _writer_connection(connections: "OrderedDict[Tenant, sqlite3.Connection]", t: Tenant) -> sqlite3.Connection:
+    """Skrivtrådens anslutning till föreningen t; den som använts minst nyligen stängs vid behov."""
+    con = connections.get(t)
+    if con is None:
+        with using_tenant(t):
+            with db():
+                pass  # ensure_db innan skrivtrådens egen anslutning öppnas
+            con = connections[t] = _open_connection()
+        con.isolation_level = None  # transaktionerna styrs explicit i run_write_batch
+        if len(connections) > TENANT_MAX_OPEN:
+            connections.popitem(last=False)[1].close()
+    connections.move_to_end(t)
+    return con
 
-            con.execute(
-                """
-                INSERT INTO bookings
-                (status, title, start, end, name, email, phone, booking_type, message, created_at)
-                VALUES
-                ('approved', ?, ?, ?, ?, ?, ?, ?, NULL, ?)
-                """,
-                (title, start, end, name, email, phone, booking_type, utc_now_iso()),
-            )
-            con.commit()
 
-        return jsonify({"ok": True, "message": "Bokning bekräftad!"})
-    except Exception:
-        return jsonify({"ok": False, "error": "Kunde inte spara bokning"}), 500
+def _writer_loop(pending: queue.SimpleQueue) -> None:
+    """Skrivtråden: samlar köade op:ar till batchar och kör dem med run_write_batch (per förening)."""
+    connections: OrderedDict[Tenant, sqlite3.Connection] = OrderedDict()
+    window = WRITE_BATCH_WINDOW_MS / 1000
+
+    while True:
+        batch    = [pending.get()]
+        deadline = time.monotonic() + window
+        while len(batch) < WRITE_BATCH_MAX:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(pending.get(timeout=remaining) if remaining > 0 else pending.get_nowait())
+            except queue.Empty:
+                break
+
+        by_tenant: dict[Tenant, list[tuple]] = {}
+        for op, future, t in batch:
+            by_tenant.setdefault(t, []).append((op, future))
+        for t, ops in by_tenant.items():
+            try:
+                con = _writer_connection(connections, t)
+            except Exception as e:
+                for _, future in ops:
+                    future.set_exception(e)
+                continue
+            with using_tenant(t):
+                run_write_batch(con, ops)
+
+
+def run_write_batch(con: sqlite3.Connection, batch: list[tuple]) -> None:
+    """
+    VARFÖR: En transaktion och en commit för hela batchen, men ett eget utfall per op.
+    VAD: Kör varje (op, future) i batch och sätter futurens resultat eller undantag.
+    HUR: BEGIN IMMEDIATE → per op SAVEPOINT / RELEASE (ROLLBACK TO vid undantag) → COMMIT.
+         Resultaten lämnas först efter COMMIT (och efter att läsrepliken uppdaterats,
+         så att anroparens nästa publika läsning ser skrivningen). Misslyckas BEGIN eller COMMIT (t.ex.
+         låset upptaget av en annan process längre än timeouten) får alla i batchen felet.
+    """
+    outcomes = []
+    try:
+        con.execute("BEGIN IMMEDIATE")
+        for op, future in batch:
+            con.execute("SAVEPOINT write_op")
+            try:
+                outcomes.append((future, op(con), None))
+            except Exception as e:
+                con.execute("ROLLBACK TO write_op")
+                outcomes.append((future, None, e))
+            con.execute("RELEASE write_op")
+        con.execute("COMMIT")
+    except Exception as e:
+        if con.in_transaction:
+            con.execute("ROLLBACK")
+        for _, future in batch:
+            future.set_exception(e)
+        return
+
+    refresh_replica(con)
+    for future, result, error in outcomes:
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
 
 
 # =========================
-# API: Kontakt (sparas i DB)
+# Läsreplik (RAM)
 # =========================
+#
+# Med READ_REPLICA=1 läser publika GET-anrop från en :memory:-databas istället för
+# filen: inga fillås, ingen sidcache att tävla om med skrivningarna. Repliken fylls
+# med backup-API:t första gången den behövs; allt som inte är publikt (meddelanden,
+# medlemmar, ej godkända bokningar, arkiv, sökindex, ändringslogg) tas bort. Därefter
+# hålls den i synk med ändringsloggen (changes): raderna för varje ändrad nyckel läses
+# om från disk. Skrivningar går alltid till disk.
+
+_replica: sqlite3.Connection | None = None
+_replica_seq = 0        # senaste seq i ändringsloggen som finns i repliken
+_replica_synced = 0.0   # time.monotonic() vid senaste synk
+_replica_lock = threading.Lock()
+
+
+def _load_replica(disk: sqlite3.Connection) -> None:
+    """Kopierar databasen till RAM med backup-API:t och behåller bara de publika raderna."""
+    global _replica, _replica_seq
+    seq = ChangeRepo.latest(disk)  # läses före kopian: senare ändringar förs över vid synk
+    mem = sqlite3.connect(":memory:", check_same_thread=False)
+    mem.row_factory = sqlite3.Row
+    disk.backup(mem)
+
+    for (name,) in mem.execute("SELECT name FROM sqlite_master WHERE type='trigger'").fetchall():
+        mem.execute(f'DROP TRIGGER "{name}"')
+    for (name,) in mem.execute("SELECT name FROM sqlite_master WHERE type='table' AND sql LIKE 'CREATE VIRTUAL%'").fetchall():
+        mem.execute(f'DROP TABLE "{name}"')
+    keep = set(REPLICA_TABLES) | {"images"}
+    for (name,) in mem.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'").fetchall():
+        if name not in keep:
+            mem.execute(f'DROP TABLE "{name}"')
+    for table, (_, public) in REPLICA_TABLES.items():
+        mem.execute(f"DELETE FROM {table} WHERE NOT ({public})")
+    mem.commit()
+
+    if _replica is not None:
+        _replica.close()
+    _replica, _replica_seq = mem, seq
+
+
+def _apply_to_replica(disk: sqlite3.Connection, changes: list[sqlite3.Row]) -> None:
+    """Läser om raderna för de ändrade nycklarna från disk och ersätter dem i repliken."""
+    touched: dict[str, set[str]] = {}
+    for change in changes:
+        touched.setdefault(change["entity"], set()).add(change["key"])
+
+    def copy(table: str, key_col: str, keys: set[str], public: str = "1") -> list[sqlite3.Row]:
+        keys_json = json.dumps(sorted(keys))
+        _replica.execute(f"DELETE FROM {table} WHERE {key_col} IN (SELECT value FROM json_each(?))", (keys_json,))
+        cur  = disk.execute(
+            f"SELECT * FROM {table} WHERE {key_col} IN (SELECT value FROM json_each(?)) AND {public}", (keys_json,)
+        )
+        cols = [d[0] for d in cur.description]
+        rows = cur.fetchall()
+        _replica.executemany(
+            f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' for _ in cols)})", rows
+        )
+        return rows
 
-@app.post("/api/contact")
-def api_contact():
+    t = tenant()
+    image_paths = {f"{t.gallery_dir.relative_to(t.root).as_posix()}/{k}" for k in touched.get("gallery", ())}
+    for table, (key_col, public) in REPLICA_TABLES.items():
+        if table in touched:
+            rows = copy(table, key_col, touched[table], public)
+            if rows and "image_path" in rows[0].keys():
+                image_paths.update(r["image_path"] for r in rows if r["image_path"])
+    if image_paths:
+        copy("images", "path", image_paths)
+    _replica.commit()
+
+
+def sync_replica(disk: sqlite3.Connection) -> None:
     """
-    VARFÖR: Kontaktformuläret ska inte kräva e-postserver — meddelanden sparas direkt i DB.
-    VAD: Tar emot namn, e-post och meddelande och sparar i messages-tabellen.
-    HUR: Validerar att alla fält är ifyllda, sparar med tidsstämpel, returnerar JSON.
+    VARFÖR: Repliken ska visa samma publika data som disken, utan att kopieras om vid
+            varje skrivning.
+    VAD: Laddar repliken första gången, och för sedan över alla ändringar i
+         ändringsloggen efter _replica_seq.
+    HUR: Har loggen rensats förbi repliken (samma villkor som reset i /api/changes)
+         laddas den om från början.
     """
-    data    = request.get_json(silent=True) or {}
-    name    = (data.get("name")    or "").strip()
-    email   = (data.get("email")   or "").strip()
-    message = (data.get("message") or "").strip()
+    global _replica_seq, _replica_synced
+    with _replica_lock:
+        if _replica is None:
+            _load_replica(disk)
+        else:
+            latest = ChangeRepo.latest(disk)
+            oldest = ChangeRepo.oldest(disk) or latest + 1
+            if _replica_seq + 1 < oldest and _replica_seq < latest:
+                _load_replica(disk)
+        while True:
+            page = ChangeRepo.since(disk, _replica_seq, 1000)
+            if not page:
+                break
+            _apply_to_replica(disk, page)
+            _replica_seq = page[-1]["seq"]
+        _replica_synced = time.monotonic()
+
+
+def refresh_replica(disk: sqlite3.Connection) -> None:
+    """Synkar en redan laddad replik efter en skrivning. Fel loggas — skrivningen är redan gjord."""
+    if not READ_REPLICA or _replica is None:
+        return
+    try:
+        sync_replica(disk)
+    except Exception:
+        app.logger.exception("Kunde inte uppdatera läsrepliken")
 
-    if not name or not email or not message:
-        return jsonify({"ok": False, "error": "Alla fält måste fyllas i"}), 400
 
-    try:
+@contextmanager
+def read_db():
+    """
+    VARFÖR: Publika GET-anrop ska kunna läsa ur RAM medan skrivningarna går till disk.
+    VAD: Anslutning för publika läsningar: `with read_db() as con: ...`. Läsrepliken
+         om READ_REPLICA=1, annars en vanlig anslutning från db().
+    HUR: Repliken synkas om den är äldre än READ_REPLICA_SYNC_SECONDS. Den är en enda
+         anslutning, så läsningarna turas om under _replica_lock — de tar mikrosekunder
+         och de flesta publika svar kommer dessutom ur cachen.
+    """
+    if not READ_REPLICA:
         with db() as con:
-            con.execute(
-                "INSERT INTO messages (name, email, message, created_at) VALUES (?, ?, ?, ?)",
-                (name, email, message, utc_now_iso()),
-            )
-            con.commit()
+            yield con
+        return
+
+    if _replica is None or time.monotonic() - _replica_synced > READ_REPLICA_SYNC_SECONDS:
+        with db() as disk:
+            sync_replica(disk)
+    with _replica_lock:
+        yield _replica
+
+
+def is_admin() -> bool:
+    """
+    VARFÖR: Alla admin-endpoints måste skyddas — detta är grindvakten.
+    VAD: Returnerar True om den aktuella sessionen tillhör en inloggad admin för
+         aktuell förening.
+    HUR: Läser Flask-sessionens "admin"- och "tenant"-nycklar (sätts vid inloggning).
+         Alla föreningar delar secret_key, så en session från en annan förenings
+         webbplats släpps inte igenom.
+    """
+    return session.get("admin") is True and session.get("tenant", "") == tenant().name
 
-        return jsonify({"ok": True, "message": "Tack! Ditt meddelande har skickats."})
-    except Exception:
-        return jsonify({"ok": False, "error": "Kunde inte spara meddelande"}), 500
+
+def admin_required(view):
+    """
+    VARFÖR: Varje admin-endpoint ska ha exakt samma skydd utan att upprepa kontrollen.
+    VAD: Dekorator som svarar 401 om sessionen inte tillhör en inloggad admin.
+    HUR: Läggs under @app.<metod>(...) så att Flask registrerar den skyddade funktionen.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not is_admin():
+            return jsonify({"ok": False, "error": "Unauthorized"}), 401
+        return view(*args, **kwargs)
+    return wrapper
 
 
 # =========================
-# API: Medlemsanmälan (publik)
+# Dataåtkomst: radtyper
 # =========================
 
-@app.post("/api/members")
-def api_members():
+# Kodare för enskilda JSON-värden (samma escaping som jsonify)
+_json_value = json.JSONEncoder(ensure_ascii=True, separators=(",", ":")).encode
+
+
+class Row:
     """
-    VARFÖR: Besökare ska kunna anmäla intresse för medlemskap via webbsidan.
-    VAD: Sparar namn, e-post och telefon i members-tabellen.
-    HUR: Validerar att namn och e-post finns, sparar med tidsstämpel, returnerar JSON.
-         Ingen e-post skickas — admin läser anmälningarna i adminpanelen.
-         GDPR: Uppgifterna lagras lokalt i SQLite och admin kan radera dem.
+    VARFÖR: Listendpoints ska inte skapa en dict per rad bara för att serialisera den.
+    VAD: Bas för lätta radtyper med __slots__. Underklasser anger sina kolumner i
+         __slots__ i samma ordning som SELECT-satsen.
+    HUR:
+      - from_db används som row_factory på cursorn och fyller slotarna direkt
+      - to_json skriver raden som JSON-objekt utan mellanliggande dict
+      - row["kolumn"] fungerar som för sqlite3.Row (används av SSR-renderarna)
+      - OMIT_NONE: kolumner som utelämnas ur JSON när värdet är NULL
+      - BOOL_FIELDS: kolumner som lagras som 0/1 men ska bli true/false
     """
-    data  = request.get_json(silent=True) or {}
-    name  = (data.get("name")  or "").strip()
-    email = (data.get("email") or "").strip()
-    phone = (data.get("phone") or "").strip() or None
+    __slots__ = ()
+    OMIT_NONE: frozenset[str] = frozenset()
+    BOOL_FIELDS: frozenset[str] = frozenset()
 
-    if not name or not email:
-        return jsonify({"ok": False, "error": "Namn och e-post krävs"}), 400
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._json_keys = tuple((name, _json_value(name) + ":") for name in cls.__slots__)
 
-    try:
+    @classmethod
+    def from_db(cls, cursor: sqlite3.Cursor, values: tuple) -> "Row":
+        row = cls.__new__(cls)
+        for name, value in zip(cls.__slots__, values):
+            object.__setattr__(row, name, value)
+        for name in cls.BOOL_FIELDS:
+            object.__setattr__(row, name, bool(getattr(row, name)))
+        return row
+
+    @classmethod
+    def cursor(cls, con: sqlite3.Connection, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        """Kör sql och returnerar cursorn; raderna blir instanser av cls när de hämtas."""
+        cur = con.execute(sql, params)
+        cur.row_factory = cls.from_db
+        return cur
+
+    @classmethod
+    def fetch_all(cls, con: sqlite3.Connection, sql: str, params: tuple = ()) -> list:
+        """Kör sql och returnerar alla rader som instanser av cls."""
+        return cls.cursor(con, sql, params).fetchall()
+
+    @classmethod
+    def fetch_one(cls, con: sqlite3.Connection, sql: str, params: tuple = ()):
+        """Kör sql och returnerar första raden som cls, eller None."""
+        return cls.cursor(con, sql, params).fetchone()
+
+    def __getitem__(self, key: str):
+        return getattr(self, key)
+
+    def to_json(self) -> str:
+        parts = []
+        for name, key in self._json_keys:
+            value = getattr(self, name)
+            if value is None and name in self.OMIT_NONE:
+                continue
+            parts.append(key + _json_value(value))
+        return "{" + ",".join(parts) + "}"
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class ResourceRow(Row):
+    __slots__ = ("slug", "name")
+
+
+class CalendarBookingRow(Row):
+    """Publik kalenderpost (FullCalendar): end och booking_type utelämnas om de saknas."""
+    __slots__ = ("id", "title", "start", "end", "booking_type")
+    OMIT_NONE = frozenset({"end", "booking_type"})
+
+
+class HoldRow(Row):
+    """Reserverad tid i den publika kalendern (samma fält som CalendarBookingRow, utan id)."""
+    __slots__ = ("title", "start", "end", "booking_type", "held")
+    OMIT_NONE = frozenset({"end"})
+
+
+class AdminBookingRow(Row):
+    __slots__ = (
+        "id", "resource", "status", "title", "start", "end", "name", "email",
+        "phone", "booking_type", "message", "created_at", "archived",
+    )
+    BOOL_FIELDS = frozenset({"archived"})
+
+
+class MessageRow(Row):
+    __slots__ = ("id", "name", "email", "message", "created_at")
+
+
+class MemberRow(Row):
+    __slots__ = ("id", "member_number", "name", "email", "phone", "created_at")
+
+
+# Bildfälten (image_width … image_bytes) kommer från images-tabellen och är null utan bild
+IMAGE_META_SLOTS = ("image_width", "image_height", "image_format", "image_bytes")
+
+
+class EventRow(Row):
+    __slots__ = ("id", "title", "date", "description", "image_path", *IMAGE_META_SLOTS)
+
+
+class BoardMemberRow(Row):
+    __slots__ = ("id", "role", "name", "contact", "image_path", *IMAGE_META_SLOTS)
+
+
+class SponsorRow(Row):
+    __slots__ = ("id", "name", "description", "url", "image_path", *IMAGE_META_SLOTS)
+
+
+class PageSectionRow(Row):
+    __slots__ = ("id", "title", "content")
+
+
+# Radtyper för /api/changes: som de publika men med sortering (och sida), så att en
+# klient kan placera raden rätt utan att hämta om hela listan.
+class BoardMemberChangeRow(Row):
+    __slots__ = (*BoardMemberRow.__slots__, "display_order")
+
+
+class SponsorChangeRow(Row):
+    __slots__ = (*SponsorRow.__slots__, "display_order")
+
+
+class PageSectionChangeRow(Row):
+    __slots__ = ("id", "page", "title", "content", "display_order")
+
+
+def rows_json(rows) -> str:
+    """Serialiserar en lista radtyper till en JSON-array."""
+    return "[" + ",".join(r.to_json() for r in rows) + "]"
+
+
+def json_rows_response(key: str, rows, **extra):
+    """
+    VARFÖR: Listsvar ska byggas direkt från radtyperna, utan en dict per rad.
+    VAD: Returnerar {"ok": true, <extra>..., "<key>": [rader]} som application/json.
+    HUR: rows kan vara en lista radtyper eller en redan serialiserad JSON-array (str).
+    """
+    body = rows if isinstance(rows, str) else rows_json(rows)
+    head = "".join(f"{_json_value(k)}:{_json_value(v)}," for k, v in extra.items())
+    return app.response_class(f'{{"ok":true,{head}{_json_value(key)}:{body}}}', mimetype="application/json")
+
+
+def stream_rows_response(key: str, select, **extra):
+    """
+    VARFÖR: Adminlistor (bokningar, meddelanden, medlemmar) växer med åren. Att läsa hela
+            tabellen till en lista innan svaret skickas gör att minnet växer med tabellen.
+    VAD: Samma JSON som json_rows_response, men skickad i bitar medan cursorn läses.
+    HUR: select(con) returnerar en cursor med radtyp (t.ex. MessageRepo.select). En
+         generator lånar en anslutning från db(), läser STREAM_BATCH_ROWS rader i taget med
+         fetchmany och skickar varje batch som en JSON-bit. Anslutningen hålls bara medan
+         svaret skickas och lämnas tillbaka även om klienten kopplar ner.
+         Svaret innehåller "seq" (ändringsloggens position innan listan lästes) så att
+         klienten kan fortsätta med /api/changes?since=<seq>.
+    """
+    head = "".join(f"{_json_value(k)}:{_json_value(v)}," for k, v in extra.items())
+
+    t = tenant()  # generatorn körs efter teardown_request, då förening inte längre är vald
+
+    def generate():
+        with using_tenant(t), db() as con:
+            seq = ChangeRepo.latest(con)
+            cur = select(con)
+            yield f'{{"ok":true,"seq":{seq},{head}{_json_value(key)}:['
+            sep = ""
+            while True:
+                batch = cur.fetchmany(STREAM_BATCH_ROWS)
+                if not batch:
+                    break
+                yield sep + ",".join(r.to_json() for r in batch)
+                sep = ","
+            yield "]}"
+
+    return app.response_class(generate(), mimetype="application/json")
+
+
+# =========================
+# Dataåtkomst: repositories
+# =========================
+#
+# En klass per tabell samlar all SQL för tabellen. SQL-texterna är konstanter så att
+# varje poolad anslutning kan återanvända sina förberedda satser. Metoderna tar en
+# anslutning från db() eller write() så att flera anrop kan dela transaktion.
+
+class TableRepo:
+    """Gemensamma operationer för tabeller med id-primärnyckel."""
+    TABLE = ""
+
+    @classmethod
+    def delete(cls, con: sqlite3.Connection, row_id: int) -> bool:
+        """Raderar raden; returnerar False om den inte fanns."""
+        return con.execute(f"DELETE FROM {cls.TABLE} WHERE id=?", (row_id,)).rowcount > 0
+
+
+class ImageRepo(TableRepo):
+    """Tabeller med en uppladdad bild i kolumnen image_path (events, styrelse, sponsorer)."""
+
+    @classmethod
+    def get_image_path(cls, con: sqlite3.Connection, row_id: int):
+        """Returnerar (finns, image_path) för raden."""
+        row = con.execute(f"SELECT image_path FROM {cls.TABLE} WHERE id=?", (row_id,)).fetchone()
+        return (False, None) if row is None else (True, row[0])
+
+    @classmethod
+    def set_image_path(cls, con: sqlite3.Connection, row_id: int, rel_path: str | None) -> None:
+        con.execute(f"UPDATE {cls.TABLE} SET image_path=? WHERE id=?", (rel_path, row_id))
+
+
+class OrderedRepo(ImageRepo):
+    """Tabeller som admin sorterar med display_order (styrelse, sponsorer, sidsektioner)."""
+
+    @classmethod
+    def next_order(cls, con: sqlite3.Connection, where: str = "", params: tuple = ()) -> int:
+        return con.execute(
+            f"SELECT COALESCE(MAX(display_order), 0) + 1 FROM {cls.TABLE} {where}", params
+        ).fetchone()[0]
+
+    @classmethod
+    def reorder(cls, ids: object, where: str = "", params: tuple = ()):
+        """
+        VARFÖR: Ordningen ska kunna ändras i ett svep istället för ett anrop per rad.
+        VAD: Skriver om display_order så att raderna får ordningen i ids (1, 2, 3 …).
+             Returnerar None vid lyckad ändring, annars ett felmeddelande.
+        HUR: ids måste innehålla exakt alla id:n i samlingen (där `where` avgränsar
+             samlingen, t.ex. en sida). Alla UPDATE körs med en executemany i samma skrivning (write).
+        """
+        if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            return "ids måste vara en lista med heltal"
+        if len(set(ids)) != len(ids):
+            return "ids innehåller dubbletter"
+
+        def apply(con):
+            existing = {r[0] for r in con.execute(f"SELECT id FROM {cls.TABLE} {where}", params)}
+            if existing != set(ids):
+                return "ids måste innehålla exakt alla rader i samlingen"
+            con.executemany(
+                f"UPDATE {cls.TABLE} SET display_order=? WHERE id=?",
+                [(order, row_id) for order, row_id in enumerate(ids, start=1)],
+            )
+            return None
+
+        return write(apply)
+
+
+class ResourceRepo:
+    LIST   = "SELECT slug, name FROM resources ORDER BY display_order ASC, slug ASC"
+    EXISTS = "SELECT 1 FROM resources WHERE slug=?"
+
+    @classmethod
+    def list(cls, con: sqlite3.Connection) -> list[ResourceRow]:
+        return ResourceRow.fetch_all(con, cls.LIST)
+
+    @classmethod
+    def exists(cls, con: sqlite3.Connection, slug: str) -> bool:
+        return con.execute(cls.EXISTS, (slug,)).fetchone() is not None
+
+    @classmethod
+    def create(cls, con: sqlite3.Connection, slug: str, name: str) -> None:
+        max_order = con.execute("SELECT COALESCE(MAX(display_order), 0) FROM resources").fetchone()[0]
+        con.execute(
+            "INSERT INTO resources (slug, name, display_order, created_at) VALUES (?, ?, ?, ?)",
+            (slug, name, max_order + 1, utc_now_iso()),
+        )
+
+
+class BookingRepo(TableRepo):
+    TABLE = "bookings"
+
+    CALENDAR = """
+        SELECT id, title, start, end, booking_type FROM bookings
+        WHERE resource=? AND status='approved'
+        ORDER BY start ASC
+    """
+    ADMIN_LIST = """
+        SELECT id, resource, status, title, start, end, name, email, phone, booking_type, message, created_at,
+               0 AS archived
+        FROM bookings
+        UNION ALL
+        SELECT id, resource, status, title, start, end, name, email, phone, booking_type, message, created_at,
+               1 AS archived
+        FROM bookings_archive
+        ORDER BY created_at DESC
+    """
+    INSERT = """
+        INSERT INTO bookings
+        (resource, status, title, start, end, name, email, phone, booking_type, message, created_at)
+        VALUES
+        (?, 'approved', ?, ?, ?, ?, ?, ?, ?, NULL, ?)
+    """
+
+    @classmethod
+    def calendar(cls, con: sqlite3.Connection, resource: str) -> list[CalendarBookingRow]:
+        """Godkända bokningar för en resurs (index (resource, status, start))."""
+        return CalendarBookingRow.fetch_all(con, cls.CALENDAR, (resource,))
+
+    @classmethod
+    def select_admin(cls, con: sqlite3.Connection) -> sqlite3.Cursor:
+        """Alla bokningar inklusive arkiverade, nyaste först (cursor med AdminBookingRow)."""
+        return AdminBookingRow.cursor(con, cls.ADMIN_LIST)
+
+    @classmethod
+    def insert_approved(cls, con: sqlite3.Connection, rows: list[tuple]) -> None:
+        """
+        Infogar godkända bokningar. Varje rad:
+        (resource, title, start, end, name, email, phone, booking_type, created_at)
+        """
+        con.executemany(cls.INSERT, rows)
+
+    @classmethod
+    def delete(cls, con: sqlite3.Connection, row_id: int) -> bool:
+        """Raderar bokningen, även om den har arkiverats."""
+        deleted  = con.execute("DELETE FROM bookings WHERE id=?", (row_id,)).rowcount
+        deleted += con.execute("DELETE FROM bookings_archive WHERE id=?", (row_id,)).rowcount
+        return deleted > 0
+
+    @classmethod
+    def set_status(cls, con: sqlite3.Connection, row_id: int, status: str) -> None:
+        con.execute("UPDATE bookings SET status=? WHERE id=?", (status, row_id))
+
+
+class HoldRepo:
+    """Spegling av reservationerna i minnet (bara med HOLDS_MIRROR=1, se Hold)."""
+    INSERT = """
+        INSERT OR REPLACE INTO holds (token, resource, day, booking_type, time_slot, ip, expires)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """
+    DELETE = "DELETE FROM holds WHERE token=?"
+    PURGE  = "DELETE FROM holds WHERE expires<=?"
+    ACTIVE = "SELECT token, resource, day, booking_type, time_slot, ip, expires FROM holds WHERE expires>?"
+
+    @classmethod
+    def insert(cls, con: sqlite3.Connection, hold: "Hold") -> None:
+        """Sparar holden och rensar samtidigt bort utgångna rader."""
+        con.execute(cls.PURGE, (time.time(),))
+        con.execute(cls.INSERT, (
+            hold.token, hold.resource, hold.day.isoformat(), hold.booking_type,
+            hold.time_slot, hold.ip, hold.expires,
+        ))
+
+    @classmethod
+    def delete(cls, con: sqlite3.Connection, token: str) -> None:
+        con.execute(cls.DELETE, (token,))
+
+    @classmethod
+    def active(cls, con: sqlite3.Connection, now: float) -> list[tuple]:
+        """Holds som inte gått ut: (token, resource, day, booking_type, time_slot, ip, expires)."""
+        return con.execute(cls.ACTIVE, (now,)).fetchall()
+
+
+class OutboxRepo:
+    """Notiser som väntar på leverans (se notify och deliver_notifications)."""
+    INSERT = """
+        INSERT INTO outbox (channel, kind, payload, next_attempt, created_at)
+        VALUES (?, ?, ?, 0, ?)
+    """
+    DUE = """
+        SELECT id, channel, kind, payload, attempts, created_at FROM outbox
+        WHERE status = 'pending' AND next_attempt <= ?
+        ORDER BY next_attempt, id
+        LIMIT ?
+    """
+    NEXT = "SELECT MIN(next_attempt) FROM outbox WHERE status = 'pending'"
+    RETRY = """
+        UPDATE outbox
+        SET attempts = attempts + 1, next_attempt = ?, last_error = ?,
+            status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END
+        WHERE id = ?
+    """
+
+    @classmethod
+    def add(cls, con: sqlite3.Connection, kind: str, payload: dict, channels: list[str]) -> None:
+        data = json.dumps(payload, ensure_ascii=False)
+        now  = utc_now_iso()
+        con.executemany(cls.INSERT, [(channel, kind, data, now) for channel in channels])
+
+    @classmethod
+    def due(cls, con: sqlite3.Connection, now: float, limit: int) -> list[sqlite3.Row]:
+        """Väntande notiser vars nästa försök är nu eller tidigare, äldst först."""
+        return con.execute(cls.DUE, (now, limit)).fetchall()
+
+    @classmethod
+    def next_attempt(cls, con: sqlite3.Connection) -> float | None:
+        """Tidigaste nästa försök bland väntande notiser (None om inga väntar)."""
+        return con.execute(cls.NEXT).fetchone()[0]
+
+    @classmethod
+    def record(cls, con: sqlite3.Connection, sent: list[int], failed: list[tuple]) -> None:
+        """
+        Tar bort levererade notiser och schemalägger om misslyckade.
+        failed: (id, nästa försök som unix-tid, felmeddelande)
+        """
+        con.executemany("DELETE FROM outbox WHERE id=?", [(row_id,) for row_id in sent])
+        con.executemany(
+            cls.RETRY,
+            [(next_attempt, error[:500], NOTIFY_MAX_ATTEMPTS, row_id) for row_id, next_attempt, error in failed],
+        )
+
+
+class MessageRepo(TableRepo):
+    TABLE = "messages"
+    LIST  = "SELECT id, name, email, message, created_at FROM messages ORDER BY created_at DESC"
+
+    @classmethod
+    def select(cls, con: sqlite3.Connection) -> sqlite3.Cursor:
+        """Alla meddelanden, nyaste först (cursor med MessageRow)."""
+        return MessageRow.cursor(con, cls.LIST)
+
+    @classmethod
+    def create(cls, con: sqlite3.Connection, name: str, email: str, message: str) -> None:
+        con.execute(
+            "INSERT INTO messages (name, email, message, created_at) VALUES (?, ?, ?, ?)",
+            (name, email, message, utc_now_iso()),
+        )
+
+
+class MemberRepo(TableRepo):
+    TABLE = "members"
+    LIST  = "SELECT id, member_number, name, email, phone, created_at FROM members ORDER BY created_at DESC"
+
+    @classmethod
+    def select(cls, con: sqlite3.Connection) -> sqlite3.Cursor:
+        """Alla anmälningar, nyaste först (cursor med MemberRow)."""
+        return MemberRow.cursor(con, cls.LIST)
+
+    @classmethod
+    def create(cls, con: sqlite3.Connection, name: str, email: str, phone: str | None) -> str:
+        """
+        Sparar en anmälan och returnerar det nya medlemsnumret: YY + löpande nummer
+        inom året. Exempel: första medlemmen 2026 → "2601", andra → "2602".
+        """
+        year_short = datetime.now().strftime("%y")  # "26" för år 2026
+        count = con.execute(
+            "SELECT COUNT(*) FROM members WHERE member_number LIKE ?",
+            (f"{year_short}%",),
+        ).fetchone()[0]
+        member_number = f"{year_short}{count + 1:02d}"
+
+        con.execute(
+            "INSERT INTO members (member_number, name, email, phone, created_at) VALUES (?, ?, ?, ?, ?)",
+            (member_number, name, email, phone, utc_now_iso()),
+        )
+        return member_number
+
+
+class EventRepo(ImageRepo):
+    TABLE = "events"
+    LIST  = """
+        SELECT e.id, e.title, e.date, e.description, e.image_path, i.width, i.height, i.format, i.bytes
+        FROM events e LEFT JOIN images i ON i.path = e.image_path
+        ORDER BY e.date ASC, e.id ASC
+    """
+
+    @classmethod
+    def list(cls, con: sqlite3.Connection) -> list[EventRow]:
+        return EventRow.fetch_all(con, cls.LIST)
+
+    @classmethod
+    def create(cls, con: sqlite3.Connection, title: str, date: str | None, description: str | None) -> int:
+        cur = con.execute(
+            "INSERT INTO events (title, date, description, image_path, created_at) VALUES (?, ?, ?, NULL, ?)",
+            (title, date, description, utc_now_iso()),
+        )
+        return cur.lastrowid
+
+    @classmethod
+    def update(cls, con: sqlite3.Connection, row_id: int, title: str, date: str | None, description: str | None) -> None:
+        con.execute(
+            "UPDATE events SET title=?, date=?, description=? WHERE id=?",
+            (title, date, description, row_id),
+        )
+
+
+class BoardRepo(OrderedRepo):
+    TABLE = "board_members"
+    LIST  = """
+        SELECT b.id, b.role, b.name, b.contact, b.image_path, i.width, i.height, i.format, i.bytes
+        FROM board_members b LEFT JOIN images i ON i.path = b.image_path
+        ORDER BY b.display_order ASC, b.id ASC
+    """
+
+    @classmethod
+    def list(cls, con: sqlite3.Connection) -> list[BoardMemberRow]:
+        return BoardMemberRow.fetch_all(con, cls.LIST)
+
+    @classmethod
+    def create(cls, con: sqlite3.Connection, role: str, name: str, contact: str | None) -> None:
+        # Nya medlemmen hamnar sist (högsta display_order + 1)
+        con.execute(
+            "INSERT INTO board_members (role, name, contact, display_order, created_at) VALUES (?, ?, ?, ?, ?)",
+            (role, name, contact, cls.next_order(con), utc_now_iso()),
+        )
+
+    @classmethod
+    def update(cls, con: sqlite3.Connection, row_id: int, role: str, name: str, contact: str | None) -> None:
+        con.execute(
+            "UPDATE board_members SET role=?, name=?, contact=? WHERE id=?",
+            (role, name, contact, row_id),
+        )
+
+
+class SponsorRepo(OrderedRepo):
+    TABLE = "sponsors"
+    LIST  = """
+        SELECT s.id, s.name, s.description, s.url, s.image_path, i.width, i.height, i.format, i.bytes
+        FROM sponsors s LEFT JOIN images i ON i.path = s.image_path
+        ORDER BY s.display_order ASC, s.id ASC
+    """
+
+    @classmethod
+    def list(cls, con: sqlite3.Connection) -> list[SponsorRow]:
+        return SponsorRow.fetch_all(con, cls.LIST)
+
+    @classmethod
+    def create(cls, con: sqlite3.Connection, name: str, description: str | None, url: str | None) -> None:
+        # Nya sponsorn hamnar sist (högsta display_order + 1)
+        con.execute(
+            "INSERT INTO sponsors (name, description, url, display_order, created_at) VALUES (?, ?, ?, ?, ?)",
+            (name, description, url, cls.next_order(con), utc_now_iso()),
+        )
+
+    @classmethod
+    def update(cls, con: sqlite3.Connection, row_id: int, name: str, description: str | None, url: str | None) -> None:
+        con.execute(
+            "UPDATE sponsors SET name=?, description=?, url=? WHERE id=?",
+            (name, description, url, row_id),
+        )
+
+
+class PageSectionRepo(OrderedRepo):
+    TABLE = "page_sections"
+    LIST  = "SELECT id, title, content FROM page_sections WHERE page=? ORDER BY display_order ASC, id ASC"
+    PAGES = "SELECT DISTINCT page FROM page_sections ORDER BY page"
+
+    @classmethod
+    def list(cls, con: sqlite3.Connection, page: str) -> list[PageSectionRow]:
+        return PageSectionRow.fetch_all(con, cls.LIST, (page,))
+
+    @classmethod
+    def pages(cls, con: sqlite3.Connection) -> list[str]:
+        return [r[0] for r in con.execute(cls.PAGES)]
+
+    @classmethod
+    def create(cls, con: sqlite3.Connection, page: str, title: str, content: str) -> None:
+        # Nya sektionen hamnar sist på sin sida
+        con.execute(
+            "INSERT INTO page_sections (page, title, content, display_order, created_at) VALUES (?, ?, ?, ?, ?)",
+            (page, title, content, cls.next_order(con, "WHERE page=?", (page,)), utc_now_iso()),
+        )
+
+    @classmethod
+    def update(cls, con: sqlite3.Connection, row_id: int, title: str, content: str) -> None:
+        con.execute(
+            "UPDATE page_sections SET title=?, content=? WHERE id=?",
+            (title, content, row_id),
+        )
+
+
+class ImageMetaRepo:
+    """Bildmetadata i images-tabellen (se read_image_info)."""
+
+    @classmethod
+    def record(cls, con: sqlite3.Connection, path: Path, info: dict | None = None) -> dict | None:
+        """
+        Sparar metadata för en fil i föreningens data/images och returnerar den. info =
+        redan läst read_image_info (så att en write-op inte läser filen), annars läses filhuvudet.
+        """
+        t = tenant()
+        if info is None:
+            info = read_image_info(path)
+        if info is None:
+            return None
+        con.execute(
+            """
+            INSERT OR REPLACE INTO images (path, category, width, height, format, bytes, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                path.relative_to(t.root).as_posix(), path.relative_to(t.images_dir).parts[0],
+                info["width"], info["height"], info["format"], info["bytes"], utc_now_iso(),
+            ),
+        )
+        return info
+
+    @classmethod
+    def forget(cls, con: sqlite3.Connection, rel_path: str) -> None:
+        con.execute("DELETE FROM images WHERE path=?", (rel_path,))
+
+    @classmethod
+    def gallery(cls, con: sqlite3.Connection) -> dict[str, dict]:
+        """Metadata för galleribilderna: {filnamn: {"width", "height", "format", "bytes"}}."""
+        rows = con.execute(
+            "SELECT path, width, height, format, bytes FROM images WHERE category='gallery'"
+        ).fetchall()
+        return {
+            r["path"].rsplit("/", 1)[-1]: {"width": r["width"], "height": r["height"], "format": r["format"], "bytes": r["bytes"]}
+            for r in rows
+        }
+
+
+class ChangeRepo:
+    """
+    Ändringsloggen (changes). Raderna skrivs av triggers (se _ensure_change_log);
+    här finns läsning, rensning och loggning av ändringar som inte görs i SQL (galleriet).
+    """
+    # entity → (radtyp, SELECT för aktuella rader där {keys} ersätts med platshållare)
+    CURRENT: dict[str, tuple[type, str]] = {
+        "bookings": (AdminBookingRow, """
+            SELECT id, resource, status, title, start, end, name, email, phone, booking_type, message, created_at,
+                   0 AS archived
+            FROM bookings WHERE id IN ({keys})
+            UNION ALL
+            SELECT id, resource, status, title, start, end, name, email, phone, booking_type, message, created_at,
+                   1 AS archived
+            FROM bookings_archive WHERE id IN ({keys})
+        """),
+        "messages":      (MessageRow, "SELECT id, name, email, message, created_at FROM messages WHERE id IN ({keys})"),
+        "members":       (MemberRow, "SELECT id, member_number, name, email, phone, created_at FROM members WHERE id IN ({keys})"),
+        "events": (EventRow, """
+            SELECT e.id, e.title, e.date, e.description, e.image_path, i.width, i.height, i.format, i.bytes
+            FROM events e LEFT JOIN images i ON i.path = e.image_path WHERE e.id IN ({keys})
+        """),
+        "board_members": (BoardMemberChangeRow, """
+            SELECT b.id, b.role, b.name, b.contact, b.image_path, i.width, i.height, i.format, i.bytes, b.display_order
+            FROM board_members b LEFT JOIN images i ON i.path = b.image_path WHERE b.id IN ({keys})
+        """),
+        "sponsors": (SponsorChangeRow, """
+            SELECT s.id, s.name, s.description, s.url, s.image_path, i.width, i.height, i.format, i.bytes, s.display_order
+            FROM sponsors s LEFT JOIN images i ON i.path = s.image_path WHERE s.id IN ({keys})
+        """),
+        "page_sections": (PageSectionChangeRow,
+                          "SELECT id, page, title, content, display_order FROM page_sections WHERE id IN ({keys})"),
+        "resources":     (ResourceRow, "SELECT slug, name FROM resources WHERE slug IN ({keys})"),
+    }
+
+    @classmethod
+    def latest(cls, con: sqlite3.Connection) -> int:
+        """Senast utdelade seq (0 om loggen aldrig skrivits). Rensade rader räknas också."""
+        row = con.execute("SELECT seq FROM sqlite_sequence WHERE name='changes'").fetchone()
+        return row[0] if row else 0
+
+    @classmethod
+    def oldest(cls, con: sqlite3.Connection) -> int | None:
+        return con.execute("SELECT MIN(seq) FROM changes").fetchone()[0]
+
+    @classmethod
+    def since(cls, con: sqlite3.Connection, seq: int, limit: int) -> list[sqlite3.Row]:
+        return con.execute(
+            "SELECT seq, entity, key, op, changed_at FROM changes WHERE seq > ? ORDER BY seq ASC LIMIT ?",
+            (seq, limit),
+        ).fetchall()
+
+    @classmethod
+    def record(cls, con: sqlite3.Connection, entity: str, key: str, op: str) -> None:
+        """Loggar en ändring som inte går via en tabell med trigger (t.ex. en galleribild)."""
+        con.execute(
+            "INSERT INTO changes (entity, key, op, changed_at) VALUES (?, ?, ?, strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))",
+            (entity, key, op),
+        )
+
+    @classmethod
+    def prune(cls, con: sqlite3.Connection, before: str) -> int:
+        """Raderar loggposter äldre än before (ISO-tid). Returnerar antal raderade."""
+        return con.execute("DELETE FROM changes WHERE changed_at < ?", (before,)).rowcount
+
+    @classmethod
+    def current(cls, con: sqlite3.Connection, entity: str, keys: list[str]) -> dict[str, dict]:
+        """Aktuellt innehåll för de givna nycklarna: {nyckel: rad}. Saknade nycklar är raderade."""
+        if entity == "gallery":
+            meta = ImageMetaRepo.gallery(con)
+            return {k: gallery_item(k, meta.get(k)) for k in keys if (tenant().gallery_dir / k).is_file()}
+        if entity not in cls.CURRENT:
+            return {}
+        row_type, sql = cls.CURRENT[entity]
+        key_col = row_type.__slots__[0]
+        placeholders = ", ".join("?" for _ in keys)
+        rows = row_type.fetch_all(con, sql.format(keys=placeholders), tuple(keys) * sql.count("{keys}"))
+        return {str(getattr(r, key_col)): r.to_dict() for r in rows}
+
+
+class StatsRepo:
+    """Läsning ur summeringstabellerna för statistiken (se _ensure_stats)."""
+    BOOKINGS = """
+        SELECT day, booking_type, SUM(bookings), SUM(lead_bookings), SUM(lead_days)
+        FROM stats_bookings
+        WHERE day BETWEEN :first AND :last AND (:resource IS NULL OR resource = :resource)
+        GROUP BY day, booking_type
+        ORDER BY day
+    """
+    OCCUPIED = """
+        SELECT substr(day, 1, 7), COUNT(*)
+        FROM stats_occupancy
+        WHERE day BETWEEN :first AND :last AND (:resource IS NULL OR resource = :resource) AND bookings > 0
+        GROUP BY 1
+    """
+    MEMBERS = """
+        SELECT month, members FROM stats_members
+        WHERE month BETWEEN :first AND :last AND members > 0
+        ORDER BY month
+    """
+
+    @classmethod
+    def bookings(cls, con: sqlite3.Connection, first: str, last: str, resource: str | None) -> list[tuple]:
+        """(dag, typ, bokningar, bokningar med ledtid, summa ledtid i dagar) per startdag och typ."""
+        return con.execute(cls.BOOKINGS, {"first": first, "last": last, "resource": resource}).fetchall()
+
+    @classmethod
+    def occupied_days(cls, con: sqlite3.Connection, first: str, last: str, resource: str | None) -> dict[str, int]:
+        """{månad: antal upptagna resursdagar}."""
+        rows = con.execute(cls.OCCUPIED, {"first": first, "last": last, "resource": resource})
+        return dict(rows.fetchall())
+
+    @classmethod
+    def members(cls, con: sqlite3.Connection, first_month: str, last_month: str) -> list[tuple]:
+        return con.execute(cls.MEMBERS, {"first": first_month, "last": last_month}).fetchall()
+
+
+# =========================
+# Cache för publika frågor
+# =========================
+
+# Publika listor (event, styrelse, sponsorer, sidsektioner) ändras sällan men läses
+# vid varje sidvisning. Resultaten cachas per nyckel tillsammans med den generation
+# de räknades fram i; en lyckad skrivning räknar upp generationen (se
+# _invalidate_after_write) och gör därmed alla gamla poster ogiltiga.
+#
+# Precis efter en skrivning (nytt event som delas i sociala medier) missar alla
+# samtidiga besökare cachen på en gång. Bara den första räknar då fram värdet;
+# övriga som missar samma nyckel i samma generation väntar på den (single-flight).
+# Cachen, generationen och de pågående beräkningarna hör till föreningen
+# (Tenant.cache, cache_generation, inflight) och töms när den stängs.
+_cache_lock = threading.Lock()
+
+
+class _Flight:
+    """En pågående beräkning av en cachenyckel som andra requests kan vänta på."""
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done  = threading.Event()
+        self.value = None
+        self.error = None
+
+
+
+def cached(key: str, compute):
+    """
+    VARFÖR: Samma fråga ska inte köras och serialiseras om vid varje sidvisning — inte
+            heller när hundra requests missar cachen samtidigt.
+    VAD: Returnerar cachat värde för key, eller kör compute() och sparar resultatet.
+    HUR: Värdet är giltigt så länge generationen inte ändrats sedan det beräknades.
+         Generationen läses före compute() så att en skrivning under beräkningen
+         aldrig lämnar kvar ett inaktuellt värde. Samtidiga missar på (key, generation)
+         delar en beräkning; misslyckas den får alla som väntade samma undantag.
+         Cachen är en LRU med högst TENANT_CACHE_ENTRIES nycklar per förening.
+    """
+    t = tenant()
+    with _cache_lock:
+        generation = t.cache_generation
+        hit = t.cache.get(key)
+        if hit is not None and hit[0] == generation:
+            t.cache.move_to_end(key)
+            return hit[1]
+        flight = t.inflight.get((key, generation))
+        leader = flight is None
+        if leader:
+            flight = t.inflight[(key, generation)] = _Flight()
+
+    if not leader:
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    try:
+        flight.value = compute()
+    except Exception as e:
+        flight.error = e
+        raise
+    finally:
+        with _cache_lock:
+            if flight.error is None and generation == t.cache_generation:
+                t.cache[key] = (generation, flight.value)
+                t.cache.move_to_end(key)
+                while len(t.cache) > TENANT_CACHE_ENTRIES:
+                    t.cache.popitem(last=False)
+            del t.inflight[(key, generation)]
+        flight.done.set()
+    return flight.value
+
+
+def invalidate_public_cache() -> None:
+    """Gör aktuell förenings cachade publika frågeresultat ogiltiga (anropas efter skrivningar)."""
+    t = tenant()
+    with _cache_lock:
+        t.cache_generation += 1
+        t.cache.clear()
+
+
+@app.after_request
+def _invalidate_after_write(response):
+    """
+    VARFÖR: Cachen får aldrig visa data som är äldre än senaste lyckade skrivning.
+    VAD: Invaliderar cachen efter varje lyckad POST/PUT/DELETE mot API:et.
+    HUR: Login/logout och holds (ligger i minnet, cachas aldrig) hoppas över. Exporten
+         schemaläggs härifrån, efter invalideringen: after_request-hookar körs i omvänd
+         ordning, så en egen hook för exporten skulle köras före och kunna exportera
+         inaktuella cachade värden.
+    """
+    if (
+        request.method in ("POST", "PUT", "DELETE")
+        and response.status_code < 400
+        and request.path.startswith("/api/")
+        and request.path not in ("/api/login", "/api/logout")
+        and not request.path.startswith("/api/holds")
+    ):
+        invalidate_public_cache()
+        _export_after_write(response)
+    return response
+
+
+# =========================
+# Komprimering + ETag
+# =========================
+
+# Komprimerade kroppar per ETag (innehållshash) — LRU, begränsad till COMPRESS_CACHE_BYTES.
+# Nyckeln är en hash av det okomprimerade innehållet, så en post kan aldrig bli inaktuell.
+_gzip_cache: OrderedDict[str, bytes] = OrderedDict()
+_gzip_cache_bytes = 0
+_gzip_cache_lock = threading.Lock()
+
+
+def gzip_cached(etag: str, data: bytes) -> bytes:
+    """Returnerar gzip av data; återanvänder tidigare komprimering av samma innehåll."""
+    global _gzip_cache_bytes
+    with _gzip_cache_lock:
+        body = _gzip_cache.get(etag)
+        if body is not None:
+            _gzip_cache.move_to_end(etag)
+            return body
+
+    body = gzip.compress(data, compresslevel=COMPRESS_LEVEL, mtime=0)
+
+    if len(body) <= COMPRESS_CACHE_BYTES:
+        with _gzip_cache_lock:
+            if etag not in _gzip_cache:
+                _gzip_cache[etag] = body
+                _gzip_cache_bytes += len(body)
+            while _gzip_cache_bytes > COMPRESS_CACHE_BYTES:
+                _, old = _gzip_cache.popitem(last=False)
+                _gzip_cache_bytes -= len(old)
+    return body
+
+
+def _gzip_stream(chunks):
+    """Komprimerar ett strömmat svar bit för bit (se stream_rows_response)."""
+    z = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    try:
+        for chunk in chunks:
+            out = z.compress(chunk.encode() if isinstance(chunk, str) else chunk)
+            if out:
+                yield out
+        yield z.flush()
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+
+@app.after_request
+def _compress_response(response):
+    """
+    VARFÖR: JSON-listor och SSR-sidor skickades okomprimerade, och samma innehåll
+            skickades om i sin helhet även när klienten redan hade det.
+    VAD: Sätter ETag på textsvar (304 vid If-None-Match) och gzip-komprimerar dem när
+         klienten accepterar det och svaret är minst COMPRESS_MIN_BYTES.
+    HUR:
+      - Filer från disk (send_file, direct_passthrough) och bilder lämnas orörda
+      - ETag = hash av okomprimerat innehåll; gzip-varianten får suffixet "-gz" och
+        cachas i gzip_cached, så en träff på samma innehåll komprimeras inte igen
+      - Strömmade svar (stora adminlistor) komprimeras i bitar, utan ETag
+      - Vary: Accept-Encoding sätts så att proxyer håller isär varianterna
+    """
+    if (
+        response.direct_passthrough
+        or response.status_code != 200
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_TYPES
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    accepts_gzip = COMPRESS_LEVEL > 0 and request.accept_encodings["gzip"] > 0
+
+    if response.is_streamed:
+        if accepts_gzip:
+            response.response = _gzip_stream(response.response)
+            response.headers["Content-Encoding"] = "gzip"
+            response.headers.pop("Content-Length", None)
+        return response
+
+    data = response.get_data()
+    etag = hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    if accepts_gzip and len(data) >= COMPRESS_MIN_BYTES:
+        response.set_data(gzip_cached(etag, data))
+        response.headers["Content-Encoding"] = "gzip"
+        etag += "-gz"
+
+    if request.method in ("GET", "HEAD"):
+        response.set_etag(etag)
+        response.make_conditional(request)
+    return response
+
+
+# =========================
+# Publika frågor
+# =========================
+
+def load_events() -> list[EventRow]:
+    """Alla event sorterade på datum (cachat). Används av /api/events och event.html."""
+    def compute():
+        with read_db() as con:
+            return EventRepo.list(con)
+    return cached("events", compute)
+
+
+def load_board() -> list[BoardMemberRow]:
+    """Styrelsemedlemmar i display_order (cachat). Används av /api/board och styrelsen.html."""
+    def compute():
+        with read_db() as con:
+            return BoardRepo.list(con)
+    return cached("board", compute)
+
+
+def load_sponsors() -> list[SponsorRow]:
+    """Sponsorer i display_order (cachat). Används av /api/sponsors och sponsorer.html."""
+    def compute():
+        with read_db() as con:
+            return SponsorRepo.list(con)
+    return cached("sponsors", compute)
+
+
+def load_page_names() -> frozenset[str]:
+    """Sidorna som har minst en sektion (cachat)."""
+    def compute():
+        with read_db() as con:
+            return frozenset(PageSectionRepo.pages(con))
+    return cached("page-names", compute)
+
+
+def load_page_sections(page_name: str) -> list[PageSectionRow]:
+    """
+    Sektioner för en sida i display_order (cachat). Används av /api/page-sections och
+    information.html. Bara sidor som finns cachas — namnet kommer från URL:en, och
+    påhittade namn ska inte kunna fylla cachen.
+    """
+    if page_name not in load_page_names():
+        return []
+
+    def compute():
+        with read_db() as con:
+            return PageSectionRepo.list(con, page_name)
+    return cached(f"page-sections:{page_name}", compute)
+
+
+def cached_rows_json(key: str, load) -> str:
+    """Den serialiserade JSON-arrayen för load() — cachas bredvid raderna under key + ":json"."""
+    return cached(f"{key}:json", lambda: rows_json(load()))
+
+
+# =========================
+# Anropsbegränsning
+# =========================
+#
+# En bot eller trasig klient som skickar formulär i en loop ska inte kunna fylla
+# skrivkön eller messages-tabellen. Varje (IP, endpoint) har en hink med
+# RATE_LIMITS-kapacitet som fylls på kontinuerligt; varje anrop tar en pollett.
+# Tom hink → 429 med Retry-After, innan någon SQLite-kod körs.
+
+_rate_buckets: "OrderedDict[tuple[str, str], list[float]]" = OrderedDict()  # → [polletter, senast]
+_rate_lock = threading.Lock()
+
+
+def client_ip() -> str:
+    """Klientens IP — bakom RATE_LIMIT_PROXY_HOPS proxyer läses den ur X-Forwarded-For."""
+    if RATE_LIMIT_PROXY_HOPS > 0:
+        hops = [h.strip() for h in request.headers.get("X-Forwarded-For", "").split(",") if h.strip()]
+        if len(hops) >= RATE_LIMIT_PROXY_HOPS:
+            return hops[-RATE_LIMIT_PROXY_HOPS]
+    return request.remote_addr or ""
+
+
+def take_token(key: tuple[str, str], capacity: float, rate: float) -> float:
+    """
+    VARFÖR: Korta toppar (en familj som bokar från samma nät) ska gå igenom, ihållande
+            trafik ska bromsas.
+    VAD: Tar en pollett ur nyckelns hink. Returnerar 0 om det gick, annars antal
+         sekunder tills nästa pollett finns.
+    HUR: Hinken fylls på med rate polletter/s sedan senaste anropet, upp till capacity.
+         Nyckeln flyttas sist i LRU-ordningen; över RATE_LIMIT_MAX_KEYS släpps de som
+         varit inaktiva längst (en släppt hink börjar om full, vilket är ofarligt).
+    """
+    now = time.monotonic()
+    with _rate_lock:
+        bucket = _rate_buckets.get(key)
+        if bucket is None:
+            bucket = _rate_buckets[key] = [capacity, now]
+            while len(_rate_buckets) > RATE_LIMIT_MAX_KEYS:
+                _rate_buckets.popitem(last=False)
+        else:
+            _rate_buckets.move_to_end(key)
+            bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        return (1 - bucket[0]) / rate
+
+
+@app.before_request
+def _rate_limit():
+    """Svarar 429 med Retry-After när klienten har slut på polletter för endpointen."""
+    if not RATE_LIMIT or request.method != "POST":
+        return None
+    limit = RATE_LIMITS.get(request.path)
+    if limit is None:
+        return None
+
+    wait = take_token((client_ip(), request.path), *limit)
+    if not wait:
+        return None
+    response = jsonify({"ok": False, "error": "För många försök — vänta en stund och försök igen"})
+    response.status_code = 429
+    response.headers["Retry-After"] = str(max(1, int(wait + 0.999)))
+    return response
+
+
+# =========================
+# Auth: Login / Logout
+# =========================
+
+@app.post("/api/login")
+def api_login():
+    """
+    VARFÖR: Adminpanelen kräver autentisering — detta är inloggningsendpointen.
+    VAD: Tar emot ett lösenord (JSON), verifierar mot det hashade lösenordet
+         och sätter en session-cookie vid rätt lösenord.
+    HUR: Använder werkzeug.security.check_password_hash för säker jämförelse.
+         Lösenordet är föreningens (ADMIN_PASSWORD_HASH eller TENANTS_FILE).
+    """
+    data = request.get_json(silent=True) or {}
+    password = (data.get("password") or "").strip()
+
+    if not password or not check_password_hash(tenant().password_hash, password):
+        return jsonify({"ok": False, "error": "Fel lösenord"}), 401
+
+    session["admin"]  = True
+    session["tenant"] = tenant().name
+    return jsonify({"ok": True})
+
+
+@app.post("/api/logout")
+def api_logout():
+    """
+    VARFÖR: Admin ska kunna logga ut.
+    VAD: Rensar sessionen (tar bort "admin"-nyckeln och alla andra sessionsdata).
+    HUR: Anropar session.clear() och returnerar bekräftelse.
+    """
+    session.clear()
+    return jsonify({"ok": True})
+
+
+# =========================
+# API: Bokningar (publik)
+# =========================
+
+@app.get("/api/resources")
+def api_get_resources():
+    """
+    VARFÖR: Boka-sidan behöver veta vilka lokaler/ytor som går att boka.
+    VAD: Returnerar alla resurser (slug + namn) i display_order.
+    HUR: Hämtar från resources-tabellen via ResourceRepo.
+    """
+    try:
+        with read_db() as con:
+            rows = ResourceRepo.list(con)
+        return json_rows_response("resources", rows, default=DEFAULT_RESOURCE)
+    except Exception:
+        return jsonify({"ok": False, "error": "Kunde inte hämta resurser"}), 500
+
+
+@app.post("/api/admin/resources")
+@admin_required
+def api_admin_create_resource():
+    """
+    VARFÖR: Föreningen ska kunna börja hyra ut fler ytor utan kodändring.
+    VAD: Skapar en ny bokningsbar resurs med slug (t.ex. "scenen") och namn.
+    HUR: slug får bara innehålla a–z, 0–9 och bindestreck. 409 om slugen redan finns.
+    """
+    data = request.get_json(silent=True) or {}
+    slug = (data.get("slug") or "").strip().lower()
+    name = (data.get("name") or "").strip()
+
+    if not name or not re.fullmatch(r"[a-z0-9-]+", slug):
+        return jsonify({"ok": False, "error": "Namn och giltig slug (a–z, 0–9, -) krävs"}), 400
+
+    def create(con):
+        if ResourceRepo.exists(con, slug):
+            return False
+        ResourceRepo.create(con, slug, name)
+        return True
+
+    if not write(create):
+        return jsonify({"ok": False, "error": "Resursen finns redan"}), 409
+
+    return jsonify({"ok": True})
+
+
+@app.get("/api/bookings")
+@app.get("/api/bookings/<resource>")
+def api_get_bookings(resource: str | None = None):
+    """
+    VARFÖR: Kalendern på boka.html behöver veta vilka datum som är bokade.
+    VAD: Returnerar alla godkända bokningar för en resurs som FullCalendar-kompatibla event-objekt.
+    HUR: /api/bookings/<slug> (eller ?resource=<slug>) väljer resurs (standard DEFAULT_RESOURCE);
+         sökvägsformen är den som den statiska exporten skriver. BookingRepo.calendar hämtar
+         status='approved'-rader via indexet (resource, status, start); end och booking_type
+         utelämnas när de saknas. Aktiva holds läggs till som "Reserverad" med held: true,
+         utom ?hold=<token> (besökarens egen).
+    """
+    resource = (resource or request.args.get("resource") or DEFAULT_RESOURCE).strip()
+    own_hold = (request.args.get("hold") or "").strip()
+    try:
+        with read_db() as con:
+            rows = BookingRepo.calendar(con, resource)
+        return json_rows_response("events", [*rows, *hold_rows(resource, own_hold)])
+    except Exception:
+        return jsonify({"ok": False, "error": "Kunde inte hämta bokningar"}), 500
+
+
+# =========================
+# Bokningsregler (delas av direktbokning och återkommande bokningar)
+# =========================
+
+# Tillgängliga tidsluckor för 2h-bokningar (matchar de i calendar.js)
+BOOKING_SLOTS: dict[str, tuple[str, str]] = {
+    "09:00": ("09:00", "11:00"),
+    "12:00": ("12:00", "14:00"),
+    "15:00": ("15:00", "17:00"),
+    "18:00": ("18:00", "20:00"),
+}
+
+BOOKING_TYPES = ("2h", "heldag", "helg")
+
+# Max antal tillfällen i en återkommande bokning (två år varje vecka)
+MAX_RECURRING_OCCURRENCES = 104
+
+
+def booking_span(name: str, day, booking_type: str, time_slot: str = "") -> tuple[str, str | None, str]:
+    """
+    VARFÖR: Start, slut och titel ska beräknas likadant oavsett hur bokningen skapas.
+    VAD: Returnerar (start, end, title) för en bokning av booking_type på datumet day.
+    HUR:
+      - "2h" → vald tidslucka samma dag (time_slot måste finnas i BOOKING_SLOTS)
+      - "heldag" → heldagsevent utan sluttid
+      - "helg" → lördag + söndag (FullCalendar exclusive end = datum+2 dagar)
+    """
+    date_str = day.isoformat()
+    if booking_type == "2h":
+        start_t, end_t = BOOKING_SLOTS[time_slot]
+        return f"{date_str}T{start_t}:00", f"{date_str}T{end_t}:00", f"{name} ({start_t}–{end_t})"
+    if booking_type == "heldag":
+        return date_str, None, f"{name} (heldag)"
+    # helg
+    return date_str, (day + timedelta(days=2)).isoformat(), f"{name} (helhelg)"
+
+
+def occupied_units(day, booking_type: str, start: str) -> list[tuple[str, str | None]]:
+    """
+    VARFÖR: Bokningar och reservationer ska ta samma tid i anspråk enligt samma regler.
+    VAD: Returnerar de (dag, tidslucka) ett tillfälle upptar; tidslucka None = hela dagen.
+    HUR: 2h → sin lucka (start), heldag → hela dagen, helg → hela lördagen och söndagen.
+    """
+    if booking_type == "2h":
+        return [(day.isoformat(), start)]
+    if booking_type == "heldag":
+        return [(day.isoformat(), None)]
+    return [(day.isoformat(), None), ((day + timedelta(days=1)).isoformat(), None)]
+
+
+def find_conflicts(con: sqlite3.Connection, occurrences: list[tuple], resource: str = DEFAULT_RESOURCE) -> set[int]:
+    """
+    VARFÖR: Kollisionskontrollen ska vara en enda mängdbaserad fråga — även när en
+            återkommande bokning har hundra tillfällen.
+    VAD: Tar en lista (day, booking_type, start) och returnerar index på de tillfällen
+         som krockar med befintliga approved-bokningar på samma resurs.
+    HUR: Tillfällena blir en VALUES-tabell via occupied_units (ett helg-tillfälle blir två dagar)
+         och joinas mot bookings för resursen (index (resource, status, start)). Regler:
+           2h     → blockeras av: exakt samma tidslucka, eller heldag/helg samma dag
+           heldag → blockeras av: annan heldag/helg eller befintliga 2h-bokningar
+           helg   → blockeras av: heldag/helg eller 2h-bokningar lör eller sön
+    """
+    if not occurrences:
+        return set()
+
+    rows = [
+        (idx, unit_day, slot_start)
+        for idx, (day, booking_type, start) in enumerate(occurrences)
+        for unit_day, slot_start in occupied_units(day, booking_type, start)
+    ]
+
+    values = ", ".join("(?, ?, ?)" for _ in rows)
+    params = [v for row in rows for v in row]
+    found  = con.execute(
+        f"""
+        WITH occ(idx, day, slot_start) AS (VALUES {values})
+        SELECT DISTINCT occ.idx
+        FROM occ JOIN bookings b ON b.resource = ? AND b.status = 'approved'
+        WHERE (
+            occ.slot_start IS NOT NULL AND (
+                b.start = occ.slot_start
+                OR (b.booking_type IN ('heldag', 'helg')
+                    AND (b.start = occ.day OR (b.start <= occ.day AND b.end > occ.day)))
+            )
+        ) OR (
+            occ.slot_start IS NULL AND (
+                b.start = occ.day
+                OR b.start LIKE occ.day || 'T%'
+                OR (b.start <= occ.day AND b.end > occ.day)
+            )
+        )
+        """,
+        [*params, resource],
+    ).fetchall()
+    return {r[0] for r in found}
+
+
+# =========================
+# Tillfälliga reservationer (holds)
+# =========================
+#
+# Mellan att en besökare klickar på ett datum och skickar formuläret kan någon annan
+# hinna boka samma tid — då får den första 409 efter att ha fyllt i allt. calendar.js
+# tar därför en hold på vald tid när modalen öppnas (och när bokningstyp eller
+# tidslucka ändras). En hold gäller HOLD_SECONDS och spärrar tiden för alla andra:
+# nya holds, api_book och kalendern (/api/bookings visar den som reserverad).
+#
+# Holds ligger i minnet (gemensamt för alla föreningar, nycklade på föreningens namn):
+#   - _holds: token → Hold
+#   - _holds_by_day: (förening, resurs, dag) → {token: tidslucka, None = hela dagen}
+#   - _hold_heap: min-heap av (utgångstid, token). Utgångna holds plockas från toppen
+#     (O(log n) per hold) vid varje åtkomst; släppta holds ligger kvar i heapen tills
+#     de når toppen och hoppas då över.
+# Med HOLDS_MIRROR=1 skrivs de även till tabellen holds och läses in igen vid start.
+# Admins bokningar (api_admin_add, återkommande) går före och tittar inte på holds.
+
+class Hold:
+    """
+    En reservation av ett bokningstillfälle i aktuell förening; units = de (dag, tidslucka)
+    den upptar.
+    """
+    __slots__ = ("token", "tenant", "resource", "day", "booking_type", "time_slot", "ip", "expires", "units")
+
+    def __init__(self, token: str, resource: str, day, booking_type: str, time_slot: str, ip: str, expires: float):
+        self.token        = token
+        self.tenant       = tenant().name
+        self.resource     = resource
+        self.day          = day
+        self.booking_type = booking_type
+        self.time_slot    = time_slot
+        self.ip           = ip
+        self.expires      = expires
+        self.units        = occupied_units(day, booking_type, booking_span("", day, booking_type, time_slot)[0])
+
+
+_holds: dict[str, Hold] = {}
+_holds_by_day: dict[tuple[str, str, str], dict[str, str | None]] = {}
+_holds_per_ip: dict[tuple[str, str], int] = {}
+_hold_heap: list[tuple[float, str]] = []
+_holds_lock = threading.Lock()
+
+
+def _add_hold(hold: Hold) -> None:
+    """Lägger in holden i alla index (anropas med _holds_lock)."""
+    _holds[hold.token] = hold
+    for day, slot in hold.units:
+        _holds_by_day.setdefault((hold.tenant, hold.resource, day), {})[hold.token] = slot
+    owner = (hold.tenant, hold.ip)
+    _holds_per_ip[owner] = _holds_per_ip.get(owner, 0) + 1
+    heapq.heappush(_hold_heap, (hold.expires, hold.token))
+
+
+def _drop_hold(token: str) -> Hold | None:
+    """Tar bort holden ur alla index utom heapen (anropas med _holds_lock)."""
+    hold = _holds.pop(token, None)
+    if hold is None:
+        return None
+    for day in {day for day, _ in hold.units}:
+        key  = (hold.tenant, hold.resource, day)
+        held = _holds_by_day[key]
+        del held[token]
+        if not held:
+            del _holds_by_day[key]
+    owner = (hold.tenant, hold.ip)
+    _holds_per_ip[owner] -= 1
+    if not _holds_per_ip[owner]:
+        del _holds_per_ip[owner]
+    return hold
+
+
+def _own_hold(token: str) -> Hold | None:
+    """Holden med token om den hör till aktuell förening (anropas med _holds_lock)."""
+    hold = _holds.get(token)
+    return hold if hold is not None and hold.tenant == tenant().name else None
+
+
+def _expire_holds(now: float) -> None:
+    """Släpper alla holds vars tid gått ut (anropas med _holds_lock)."""
+    while _hold_heap and _hold_heap[0][0] <= now:
+        expires, token = heapq.heappop(_hold_heap)
+        hold = _holds.get(token)
+        if hold is not None and hold.expires == expires:
+            _drop_hold(token)
+
+
+def _units_collide(held: dict[str, str | None], slot: str | None, own: str) -> bool:
+    """Krockar tidsluckan slot (None = hela dagen) med någon annans hold samma dag?"""
+    return any(
+        token != own and (slot is None or other is None or slot == other)
+        for token, other in held.items()
+    )
+
+
+def held_conflicts(occurrences: list[tuple], resource: str, own: str = "") -> set[int]:
+    """
+    VARFÖR: En reserverad tid ska vara spärrad på samma sätt som en bokad.
+    VAD: Samma indata som find_conflicts; returnerar index på tillfällen som krockar med
+         någon annans aktiva hold på resursen. own = klientens egen hold (räknas inte).
+    HUR: Slår upp varje (resurs, dag) i _holds_by_day; samma krockregler som
+         find_conflicts (hela dagen krockar med allt, 2h bara med samma lucka).
+    """
+    found = set()
+    name  = tenant().name
+    with _holds_lock:
+        _expire_holds(time.time())
+        for idx, (day, booking_type, start) in enumerate(occurrences):
+            for unit_day, slot in occupied_units(day, booking_type, start):
+                held = _holds_by_day.get((name, resource, unit_day))
+                if held and _units_collide(held, slot, own):
+                    found.add(idx)
+    return found
+
+
+def take_hold(hold: Hold, replace: str = "") -> tuple[str, int] | None:
+    """
+    VARFÖR: Två besökare som öppnar samma tid samtidigt ska inte båda få den.
+    VAD: Lägger in holden om tiden inte redan är reserverad av någon annan och klienten
+         har färre än HOLD_MAX_PER_IP. replace = klientens tidigare hold, som släpps
+         när den nya lyckas. Returnerar None, annars (felmeddelande, statuskod).
+    HUR: Kontroll och inläggning sker under samma lås. Att tiden inte är bokad kontrollerar
+         anroparen innan (api_book gör ändå den slutgiltiga kontrollen i write).
+    """
+    with _holds_lock:
+        _expire_holds(time.time())
+        for day, slot in hold.units:
+            held = _holds_by_day.get((hold.tenant, hold.resource, day))
+            if held and _units_collide(held, slot, replace):
+                return "Tiden är tillfälligt reserverad av någon annan — försök igen om några minuter", 409
+        previous = _own_hold(replace)
+        owned    = _holds_per_ip.get((hold.tenant, hold.ip), 0) - (previous is not None and previous.ip == hold.ip)
+        if owned >= HOLD_MAX_PER_IP:
+            return "För många samtidiga reservationer", 429
+        if previous is not None:
+            _drop_hold(replace)
+        _add_hold(hold)
+    return None
+
+
+def release_hold(token: str) -> Hold | None:
+    """Släpper holden i minnet; returnerar den, eller None om den inte fanns (kvar) i aktuell förening."""
+    with _holds_lock:
+        return _drop_hold(token) if _own_hold(token) is not None else None
+
+
+def hold_rows(resource: str, own: str = "") -> list[HoldRow]:
+    """Aktiva holds på resursen som kalenderposter (utom klientens egen)."""
+    name = tenant().name
+    with _holds_lock:
+        _expire_holds(time.time())
+        holds = [h for h in _holds.values() if h.tenant == name and h.resource == resource and h.token != own]
+    rows = []
+    for hold in sorted(holds, key=lambda h: (h.day, h.time_slot)):
+        start, end, title = booking_span("Reserverad", hold.day, hold.booking_type, hold.time_slot)
+        rows.append(HoldRow.from_db(None, (title, start, end, hold.booking_type, True)))
+    return rows
+
+
+def _restore_holds(con: sqlite3.Connection) -> None:
+    """Läser in speglade holds som inte gått ut (HOLDS_MIRROR=1, körs av ensure_db)."""
+    with _holds_lock:
+        for token, resource, day, booking_type, time_slot, ip, expires in HoldRepo.active(con, time.time()):
+            if token not in _holds:
+                _add_hold(Hold(
+                    token, resource, datetime.strptime(day, "%Y-%m-%d").date(),
+                    booking_type, time_slot, ip, expires,
+                ))
+
+
+@app.post("/api/holds")
+def api_create_hold():
+    """
+    VARFÖR: Besökaren ska kunna fylla i bokningsformuläret utan att tiden hinner tas av någon annan.
+    VAD: Reserverar datum, bokningstyp, tidslucka och resurs i HOLD_SECONDS.
+         Svarar {"ok": true, "hold": <token>, "expires_in": <sekunder>}; tokenen skickas med
+         till /api/book. 409 om tiden är bokad eller reserverad av någon annan.
+    HUR: Samma validering som api_book. "hold" i anropet = klientens tidigare hold, som
+         ersätts (släpps) när den nya tas. Bokningskontrollen läser databasen direkt
+         (inte läsrepliken) så att en nyss gjord bokning syns.
+    """
+    data         = request.get_json(silent=True) or {}
+    date_str     = (data.get("date")         or "").strip()
+    booking_type = (data.get("booking_type") or "").strip()
+    time_slot    = (data.get("time_slot")    or "").strip()
+    resource     = (data.get("resource")     or DEFAULT_RESOURCE).strip()
+    replace      = (data.get("hold")         or "").strip()
+
+    if booking_type not in BOOKING_TYPES:
+        return jsonify({"ok": False, "error": "Ogiltig bokningstyp"}), 400
+
+    try:
+        chosen_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+    except ValueError:
+        return jsonify({"ok": False, "error": "Ogiltigt datumformat"}), 400
+
+    if booking_type == "2h" and time_slot not in BOOKING_SLOTS:
+        return jsonify({"ok": False, "error": "Ogiltig tidslucka"}), 400
+    if booking_type != "2h":
+        time_slot = ""
+
+    hold  = Hold(secrets.token_urlsafe(16), resource, chosen_date, booking_type, time_slot,
+                 client_ip(), time.time() + HOLD_SECONDS)
+    start = booking_span("", chosen_date, booking_type, time_slot)[0]
+    try:
         with db() as con:
-            # Generera ett unikt medlemsnummer: YY + löpande nummer inom året
-            # Exempel: första medlemmen 2026 → "2601", andra → "2602"
-            year_short = datetime.now().strftime("%y")  # "26" för år 2026
-            count = con.execute(
-                "SELECT COUNT(*) FROM members WHERE member_number LIKE ?",
-                (f"{year_short}%",),
-            ).fetchone()[0]
-            member_number = f"{year_short}{count + 1:02d}"
+            if not ResourceRepo.exists(con, resource):
+                return jsonify({"ok": False, "error": "Okänd resurs"}), 400
+            if find_conflicts(con, [(chosen_date, booking_type, start)], resource):
+                return jsonify({"ok": False, "error": "Datumet/tiden är redan bokat"}), 409
+    except Exception:
+        return jsonify({"ok": False, "error": "Kunde inte reservera tiden"}), 500
 
-            con.execute(
-                "INSERT INTO members (member_number, name, email, phone, created_at) VALUES (?, ?, ?, ?, ?)",
-                (member_number, name, email, phone, utc_now_iso()),
-            )
-            con.commit()
+    error = take_hold(hold, replace)
+    if error:
+        message, code = error
+        return jsonify({"ok": False, "error": message}), code
+
+    if HOLDS_MIRROR:
+        try:
+            write(lambda con: (HoldRepo.delete(con, replace), HoldRepo.insert(con, hold)))
+        except Exception:
+            release_hold(hold.token)
+            return jsonify({"ok": False, "error": "Kunde inte reservera tiden"}), 500
+
+    return jsonify({"ok": True, "hold": hold.token, "expires_in": HOLD_SECONDS})
+
+
+@app.delete("/api/holds/<token>")
+def api_release_hold(token: str):
+    """
+    VARFÖR: En besökare som stänger bokningsmodalen ska inte spärra tiden i onödan.
+    VAD: Släpper holden. Svarar ok även om den redan gått ut eller inte finns.
+    HUR: Tokenen är hemlig (bara den som tog holden känner till den).
+    """
+    if release_hold(token) is not None and HOLDS_MIRROR:
+        try:
+            write(lambda con: HoldRepo.delete(con, token))
+        except Exception:
+            pass  # raden går ut av sig själv och rensas vid nästa insert
+    return jsonify({"ok": True})
+
+
+# =========================
+# API: Direktbokning (publik)
+# =========================
+
+@app.post("/api/book")
+def api_book():
+    """
+    VARFÖR: Besökare ska kunna boka lokalen direkt från kalendern utan att vänta på godkännande.
+    VAD: Tar emot bokningsdata (namn, e-post, telefon, datum, bokningstyp, resurs), kontrollerar
+         att datumet är ledigt och sparar direkt som 'approved'.
+    HUR:
+      - Start/slut/titel beräknas av booking_span ("2h", "heldag" eller "helg")
+      - resource är valfri (standard DEFAULT_RESOURCE)
+      - Kollisionskontroll via find_conflicts mot befintliga approved-bokningar på samma resurs,
+        i samma skrivning (write) som infogningen — annars hinner två samtidiga bokningar
+        båda se datumet som ledigt (se stress_booking.py)
+      - Tiden får inte heller vara reserverad av någon annan (held_conflicts). "hold" är
+        besökarens egen hold från /api/holds; den släpps när bokningen är sparad
+      - Admin får en notis (notify) i samma transaktion som bokningen
+      - Svaret har Server-Timing: lock = väntan tills op:en fick skrivlåset (skrivkön och
+        BEGIN IMMEDIATE), book = kollisionskontroll, infogning och commit (se stress_booking.py)
+    """
+    data = request.get_json(silent=True) or {}
+    name         = (data.get("name")         or "").strip()
+    email        = (data.get("email")        or "").strip()
+    phone        = (data.get("phone")        or "").strip()
+    date_str     = (data.get("date")         or "").strip()
+    booking_type = (data.get("booking_type") or "").strip()
+    time_slot    = (data.get("time_slot")    or "").strip()  # bara för 2h-bokningar
+    resource     = (data.get("resource")     or DEFAULT_RESOURCE).strip()
+    hold         = (data.get("hold")         or "").strip()
+
+    if not name or not email or not date_str:
+        return jsonify({"ok": False, "error": "Namn, e-post och datum krävs"}), 400
+
+    if booking_type not in BOOKING_TYPES:
+        return jsonify({"ok": False, "error": "Ogiltig bokningstyp"}), 400
+
+    try:
+        chosen_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+    except ValueError:
+        return jsonify({"ok": False, "error": "Ogiltigt datumformat"}), 400
+
+    if booking_type == "2h" and time_slot not in BOOKING_SLOTS:
+        return jsonify({"ok": False, "error": "Ogiltig tidslucka"}), 400
+
+    start, end, title = booking_span(name, chosen_date, booking_type, time_slot)
+
+    timing = {}
+
+    def book(con):
+        """Returnerar None vid lyckad bokning, annars (felmeddelande, statuskod)."""
+        timing["locked"] = time.perf_counter()
+        if not ResourceRepo.exists(con, resource):
+            return "Okänd resurs", 400
+        if find_conflicts(con, [(chosen_date, booking_type, start)], resource):
+            return "Datumet/tiden är redan bokat", 409
+        if held_conflicts([(chosen_date, booking_type, start)], resource, own=hold):
+            return "Tiden är tillfälligt reserverad av någon annan — försök igen om några minuter", 409
+        BookingRepo.insert_approved(
+            con, [(resource, title, start, end, name, email, phone, booking_type, utc_now_iso())]
+        )
+        notify(con, "booking", {
+            "resource": resource, "title": title, "start": start, "end": end,
+            "name": name, "email": email, "phone": phone, "booking_type": booking_type,
+        })
+        if HOLDS_MIRROR and hold:
+            HoldRepo.delete(con, hold)
+        return None
+
+    started = time.perf_counter()
+    try:
+        error = write(book)
+    except Exception:
+        return jsonify({"ok": False, "error": "Kunde inte spara bokning"}), 500
+    finished = time.perf_counter()
+
+    if error:
+        message, code = error
+        response = jsonify({"ok": False, "error": message})
+        response.status_code = code
+    else:
+        if hold:
+            release_hold(hold)
+        response = jsonify({"ok": True, "message": "Bokning bekräftad!"})
+    locked = timing.get("locked", finished)
+    response.headers["Server-Timing"] = (
+        f"lock;dur={(locked - started) * 1000:.2f}, book;dur={(finished - locked) * 1000:.2f}"
+    )
+    return response
+
+
+# =========================
+# API: Kontakt (sparas i DB)
+# =========================
+
+@app.post("/api/contact")
+def api_contact():
+    """
+    VARFÖR: Kontaktformuläret ska inte kräva e-postserver — meddelanden sparas direkt i DB.
+    VAD: Tar emot namn, e-post och meddelande och sparar i messages-tabellen.
+    HUR: Validerar att alla fält är ifyllda, sparar med tidsstämpel, returnerar JSON.
+         Admin får en notis (notify) om NOTIFY_EMAIL/NOTIFY_WEBHOOK_URL är satt.
+    """
+    data    = request.get_json(silent=True) or {}
+    name    = (data.get("name")    or "").strip()
+    email   = (data.get("email")   or "").strip()
+    message = (data.get("message") or "").strip()
+
+    if not name or not email or not message:
+        return jsonify({"ok": False, "error": "Alla fält måste fyllas i"}), 400
+
+    def save(con):
+        MessageRepo.create(con, name, email, message)
+        notify(con, "message", {"name": name, "email": email, "message": message})
+
+    try:
+        write(save)
+
+        return jsonify({"ok": True, "message": "Tack! Ditt meddelande har skickats."})
+    except Exception:
+        return jsonify({"ok": False, "error": "Kunde inte spara meddelande"}), 500
+
+
+# =========================
+# API: Medlemsanmälan (publik)
+# =========================
+
+@app.post("/api/members")
+def api_members():
+    """
+    VARFÖR: Besökare ska kunna anmäla intresse för medlemskap via webbsidan.
+    VAD: Sparar namn, e-post och telefon i members-tabellen.
+    HUR: Validerar att namn och e-post finns, sparar med tidsstämpel, returnerar JSON.
+         Admin läser anmälningarna i adminpanelen och kan dessutom få en notis (notify).
+         GDPR: Uppgifterna lagras lokalt i SQLite och admin kan radera dem.
+    """
+    data  = request.get_json(silent=True) or {}
+    name  = (data.get("name")  or "").strip()
+    email = (data.get("email") or "").strip()
+    phone = (data.get("phone") or "").strip() or None
+
+    if not name or not email:
+        return jsonify({"ok": False, "error": "Namn och e-post krävs"}), 400
+
+    def join(con):
+        # Unikt medlemsnummer: YY + löpande nummer inom året (se MemberRepo.create)
+        number = MemberRepo.create(con, name, email, phone)
+        notify(con, "member", {"member_number": number, "name": name, "email": email, "phone": phone})
+        return number
+
+    try:
+        member_number = write(join)
         return jsonify({
             "ok": True,
             "member_number": member_number,
@@ -523,27 +3144,11 @@ def api_get_events():
     """
     VARFÖR: event.html behöver hämta årets event dynamiskt från databasen.
     VAD: Returnerar alla event sorterade på datum (närmast datum först).
-    HUR: Hämtar alla rader från events-tabellen, inkluderar image_path om det finns.
+    HUR: Hämtar alla rader från events-tabellen via load_events, inkluderar image_path.
+         Både raderna och den serialiserade JSON-arrayen cachas.
     """
     try:
-        with db() as con:
-            rows = con.execute(
-                "SELECT id, title, date, description, image_path FROM events ORDER BY date ASC, id ASC"
-            ).fetchall()
-
-        items = []
-        for r in rows:
-            items.append({
-                "id":          r["id"],
-                "title":       r["title"],
-                "date":        r["date"],
-                "description": r["description"],
-                # image_path är relativ projektroten, t.ex. "data/images/events/1/bild.jpg"
-                # Vi returnerar den direkt — Flask serverar den via static_files-routern
-                "image_path":  r["image_path"],
-            })
-
-        return jsonify({"ok": True, "events": items})
+        return json_rows_response("events", cached_rows_json("events", load_events))
     except Exception:
         return jsonify({"ok": False, "error": "Kunde inte hämta event"}), 500
 
@@ -552,24 +3157,38 @@ def api_get_events():
 # API: Galleri (publik)
 # =========================
 
+def gallery_item(filename: str, meta: dict | None) -> dict:
+    """En galleribild i API-form: filnamn, URL och metadata (null om den saknas)."""
+    meta = meta or {}
+    return {
+        "filename": filename,
+        "url":      f"/data/images/gallery/{filename}",
+        "width":    meta.get("width"),
+        "height":   meta.get("height"),
+        "format":   meta.get("format"),
+        "bytes":    meta.get("bytes"),
+    }
+
+
 @app.get("/api/gallery")
 def api_get_gallery():
     """
     VARFÖR: galleri.html behöver en lista på alla uppladdade bilder.
-    VAD: Returnerar alla bildfiler i gallery-mappen som en JSON-lista med URL-sökvägar.
-    HUR: Skannar GALLERY_DIR med os.listdir och filtrerar på tillåtna ändelser.
+    VAD: Returnerar alla bildfiler i gallery-mappen som en JSON-lista med URL-sökvägar,
+         bredd, höjd, format och storlek i byte.
+    HUR: Skannar föreningens gallery-mapp med os.listdir och filtrerar på tillåtna ändelser.
+         Metadatan hämtas ur images-tabellen (sparas vid uppladdning).
          URL-sökvägen byggs som "/data/images/gallery/<filnamn>" och serveras av Flask.
     """
     try:
-        ensure_db()  # säkerställer att GALLERY_DIR finns
+        with read_db() as con:  # första anropet går via db(), som också skapar gallery-mappen
+            meta = ImageMetaRepo.gallery(con)
         files = []
-        if GALLERY_DIR.exists():
-            for f in sorted(GALLERY_DIR.iterdir()):
+        gallery_dir = tenant().gallery_dir
+        if gallery_dir.exists():
+            for f in sorted(gallery_dir.iterdir()):
                 if f.is_file() and f.suffix.lower().lstrip(".") in ALLOWED_EXTENSIONS:
-                    files.append({
-                        "filename": f.name,
-                        "url": f"/data/images/gallery/{f.name}",
-                    })
+                    files.append(gallery_item(f.name, meta.get(f.name)))
         return jsonify({"ok": True, "images": files})
     except Exception:
         return jsonify({"ok": False, "error": "Kunde inte hämta galleri"}), 500
@@ -580,163 +3199,253 @@ def api_get_gallery():
 # =========================
 
 @app.get("/api/admin/messages")
+@admin_required
 def api_admin_messages():
     """
     VARFÖR: Admin behöver läsa kontaktmeddelanden som skickats via formuläret.
     VAD: Returnerar alla meddelanden, nyaste först.
-    HUR: Kräver admin-session, hämtar från messages-tabellen.
+    HUR: Kräver admin-session, hämtar från messages-tabellen via MessageRepo.
+         Svaret strömmas (stream_rows_response).
     """
-    if not is_admin():
-        return jsonify({"ok": False, "error": "Unauthorized"}), 401
-
-    with db() as con:
-        rows = con.execute(
-            "SELECT id, name, email, message, created_at FROM messages ORDER BY created_at DESC"
-        ).fetchall()
-
-    return jsonify({"ok": True, "items": [dict(r) for r in rows]})
+    return stream_rows_response("items", MessageRepo.select)
 
 
 @app.get("/api/admin/bookings")
+@admin_required
 def api_admin_list():
     """
     VARFÖR: Adminpanelen visar alla bokningar oavsett status.
-    VAD: Returnerar samtliga bokningsrader med alla fält.
-    HUR: Kräver admin-session, sorterar nyaste först.
+    VAD: Returnerar samtliga bokningsrader med alla fält, inklusive arkiverade.
+    HUR: Kräver admin-session, sorterar nyaste först (BookingRepo.select_admin). Rader ur
+         bookings_archive har archived=true. Svaret strömmas (stream_rows_response).
     """
-    if not is_admin():
-        return jsonify({"ok": False, "error": "Unauthorized"}), 401
+    return stream_rows_response("items", BookingRepo.select_admin)
 
-    with db() as con:
-        rows = con.execute(
-            """
-            SELECT id, status, title, start, end, name, email, phone, booking_type, message, created_at
-            FROM bookings
-            ORDER BY created_at DESC
+
+@app.get("/api/admin/search")
+@admin_required
+def api_admin_search():
+    """
+    VARFÖR: Att hitta ett gammalt ärende ska inte kräva att alla listor laddas i webbläsaren.
+    VAD: Fulltextsöker i meddelanden, medlemmar, bokningar, event och sidsektioner.
+         Returnerar träffar sorterade efter relevans, sida för sida.
+    HUR: Query-parametrar: q (sökord), limit (max 100), offset och valfritt types
+         (kommaseparerad lista, t.ex. "messages,members"). En UNION ALL över FTS5-tabellerna
+         sorteras på bm25-rank; en extra rad hämtas för att avgöra has_more.
+    """
+    match = fts_query(request.args.get("q") or "")
+    if not match:
+        return jsonify({"ok": False, "error": "Sökord krävs"}), 400
+
+    limit  = min(max(request.args.get("limit", 20, type=int), 1), 100)
+    offset = max(request.args.get("offset", 0, type=int), 0)
+
+    types_arg = (request.args.get("types") or "").strip()
+    types = [t for t in types_arg.split(",") if t in FTS_TABLES] if types_arg else list(FTS_TABLES)
+    if not types:
+        return jsonify({"ok": False, "error": "Ogiltig typ"}), 400
+
+    parts  = []
+    params = []
+    for table in types:
+        fts = f"{table}_fts"
+        parts.append(
+            f"""
+            SELECT '{table}' AS type, t.id AS id, t.{FTS_LABEL_COLUMN[table]} AS label,
+                   snippet({fts}, -1, '<mark>', '</mark>', '…', 12) AS snippet,
+                   t.created_at AS created_at, bm25({fts}) AS rank
+            FROM {fts} JOIN {table} t ON t.id = {fts}.rowid
+            WHERE {fts} MATCH ?
             """
-        ).fetchall()
+        )
+        params.append(match)
+
+    sql = " UNION ALL ".join(parts) + " ORDER BY rank ASC, created_at DESC LIMIT ? OFFSET ?"
+    params += [limit + 1, offset]
 
-    return jsonify({"ok": True, "items": [dict(r) for r in rows]})
+    with db() as con:
+        rows = con.execute(sql, params).fetchall()
+
+    items = [
+        {
+            "type":       r["type"],
+            "id":         r["id"],
+            "label":      r["label"],
+            "snippet":    r["snippet"],
+            "created_at": r["created_at"],
+        }
+        for r in rows[:limit]
+    ]
+    return jsonify({"ok": True, "items": items, "has_more": len(rows) > limit, "offset": offset, "limit": limit})
 
 
 @app.post("/api/admin/add")
+@admin_required
 def api_admin_add():
     """
     VARFÖR: Admin ska kunna lägga till bokningar manuellt (t.ex. externa event).
     VAD: Skapar en ny bokning med status 'approved' direkt.
-    HUR: Tar emot titel, start och slut (valfritt), kräver admin-session.
+    HUR: Tar emot titel, start, slut (valfritt) och resurs (valfri), kräver admin-session.
     """
-    if not is_admin():
-        return jsonify({"ok": False, "error": "Unauthorized"}), 401
-
-    data  = request.get_json(silent=True) or {}
-    title = (data.get("title") or "").strip()
-    start = (data.get("start") or "").strip()
-    end   = (data.get("end")   or "").strip() or None
+    data     = request.get_json(silent=True) or {}
+    title    = (data.get("title")    or "").strip()
+    start    = (data.get("start")    or "").strip()
+    end      = (data.get("end")      or "").strip() or None
+    resource = (data.get("resource") or DEFAULT_RESOURCE).strip()
 
     if not title or not start:
         return jsonify({"ok": False, "error": "Titel och start krävs"}), 400
 
-    with db() as con:
-        con.execute(
-            """
-            INSERT INTO bookings
-            (status, title, start, end, name, email, phone, booking_type, message, created_at)
-            VALUES
-            ('approved', ?, ?, ?, NULL, NULL, NULL, NULL, NULL, ?)
-            """,
-            (title, start, end, utc_now_iso()),
+    def add(con):
+        if not ResourceRepo.exists(con, resource):
+            return False
+        BookingRepo.insert_approved(
+            con, [(resource, title, start, end, None, None, None, None, utc_now_iso())]
         )
-        con.commit()
+        return True
+
+    if not write(add):
+        return jsonify({"ok": False, "error": "Okänd resurs"}), 400
 
     return jsonify({"ok": True})
 
 
+@app.post("/api/admin/bookings/recurring")
+@admin_required
+def api_admin_recurring():
+    """
+    VARFÖR: Grupper som hyr varje vecka (kör, yoga) ska inte behöva läggas in ett datum i taget.
+    VAD: Expanderar en regel till tillfällen, sparar de lediga som 'approved' och
+         rapporterar de som krockar.
+    HUR: JSON: name, email, phone, booking_type, time_slot (för 2h), start_date, until,
+         frequency ("weekly" eller "biweekly"), resource (valfri). Alla tillfällen kontrolleras med en enda
+         find_conflicts-fråga och de lediga infogas med en executemany — allt i samma
+         skrivning (write) så att ingen annan bokning hinner emellan.
+    """
+    data         = request.get_json(silent=True) or {}
+    name         = (data.get("name")         or "").strip()
+    email        = (data.get("email")        or "").strip() or None
+    phone        = (data.get("phone")        or "").strip() or None
+    booking_type = (data.get("booking_type") or "").strip()
+    time_slot    = (data.get("time_slot")    or "").strip()
+    frequency    = (data.get("frequency")    or "weekly").strip()
+    resource     = (data.get("resource")     or DEFAULT_RESOURCE).strip()
+
+    if not name:
+        return jsonify({"ok": False, "error": "Namn krävs"}), 400
+    if booking_type not in BOOKING_TYPES:
+        return jsonify({"ok": False, "error": "Ogiltig bokningstyp"}), 400
+    if booking_type == "2h" and time_slot not in BOOKING_SLOTS:
+        return jsonify({"ok": False, "error": "Ogiltig tidslucka"}), 400
+    if frequency not in ("weekly", "biweekly"):
+        return jsonify({"ok": False, "error": "Ogiltig frekvens"}), 400
+
+    try:
+        first = datetime.strptime((data.get("start_date") or "").strip(), "%Y-%m-%d").date()
+        until = datetime.strptime((data.get("until")      or "").strip(), "%Y-%m-%d").date()
+    except ValueError:
+        return jsonify({"ok": False, "error": "Ogiltigt datumformat"}), 400
+    if until < first:
+        return jsonify({"ok": False, "error": "Slutdatum före startdatum"}), 400
+
+    step = timedelta(weeks=1 if frequency == "weekly" else 2)
+    days = []
+    day  = first
+    while day <= until:
+        days.append(day)
+        day += step
+    if len(days) > MAX_RECURRING_OCCURRENCES:
+        return jsonify({"ok": False, "error": f"Högst {MAX_RECURRING_OCCURRENCES} tillfällen per regel"}), 400
+
+    spans = [booking_span(name, d, booking_type, time_slot) for d in days]
+
+    def book(con):
+        """Returnerar index för de tillfällen som krockar, eller None om resursen saknas."""
+        if not ResourceRepo.exists(con, resource):
+            return None
+        conflicts = find_conflicts(con, [(d, booking_type, sp[0]) for d, sp in zip(days, spans)], resource)
+        now = utc_now_iso()
+        rows = [
+            (resource, title, start, end, name, email, phone, booking_type, now)
+            for i, (start, end, title) in enumerate(spans)
+            if i not in conflicts
+        ]
+        BookingRepo.insert_approved(con, rows)
+        return conflicts
+
+    conflicts = write(book)
+    if conflicts is None:
+        return jsonify({"ok": False, "error": "Okänd resurs"}), 400
+
+    return jsonify({
+        "ok":       True,
+        "created":  [d.isoformat() for i, d in enumerate(days) if i not in conflicts],
+        "rejected": [d.isoformat() for i, d in enumerate(days) if i in conflicts],
+    })
+
+
 @app.delete("/api/admin/bookings/<int:booking_id>")
+@admin_required
 def api_admin_delete_booking(booking_id: int):
     """
     VARFÖR: Admin ska kunna ta bort bokningar permanent (t.ex. felaktiga eller gamla).
-    VAD: Raderar en bokning ur databasen.
-    HUR: Kräver admin-session. Returnerar 404 om bokningen inte hittas.
+    VAD: Raderar en bokning ur databasen, även om den har arkiverats.
+    HUR: Kräver admin-session. Returnerar 404 om bokningen inte hittas i någon av tabellerna.
     """
-    if not is_admin():
-        return jsonify({"ok": False, "error": "Unauthorized"}), 401
-
-    with db() as con:
-        result = con.execute("DELETE FROM bookings WHERE id=?", (booking_id,))
-        con.commit()
-        if result.rowcount == 0:
-            return jsonify({"ok": False, "error": "Bokning hittades inte"}), 404
+    if not write(lambda con: BookingRepo.delete(con, booking_id)):
+        return jsonify({"ok": False, "error": "Bokning hittades inte"}), 404
 
     return jsonify({"ok": True})
 
 
 @app.delete("/api/admin/messages/<int:message_id>")
+@admin_required
 def api_admin_delete_message(message_id: int):
     """
     VARFÖR: Admin ska kunna rensa kontaktmeddelanden (t.ex. hanterade ärenden).
     VAD: Raderar ett meddelande ur messages-tabellen.
     HUR: Kräver admin-session. Returnerar 404 om meddelandet inte hittas.
     """
-    if not is_admin():
-        return jsonify({"ok": False, "error": "Unauthorized"}), 401
-
-    with db() as con:
-        result = con.execute("DELETE FROM messages WHERE id=?", (message_id,))
-        con.commit()
-        if result.rowcount == 0:
-            return jsonify({"ok": False, "error": "Meddelande hittades inte"}), 404
+    if not write(lambda con: MessageRepo.delete(con, message_id)):
+        return jsonify({"ok": False, "error": "Meddelande hittades inte"}), 404
 
     return jsonify({"ok": True})
 
 
 @app.get("/api/admin/members")
+@admin_required
 def api_admin_members():
     """
     VARFÖR: Admin behöver se inkomna medlemsanmälningar.
     VAD: Returnerar alla anmälningar, nyaste först.
-    HUR: Kräver admin-session. Hämtar från members-tabellen.
+    HUR: Kräver admin-session. Hämtar från members-tabellen via MemberRepo.
+         Svaret strömmas (stream_rows_response).
     """
-    if not is_admin():
-        return jsonify({"ok": False, "error": "Unauthorized"}), 401
-
-    with db() as con:
-        rows = con.execute(
-            "SELECT id, member_number, name, email, phone, created_at FROM members ORDER BY created_at DESC"
-        ).fetchall()
-
-    return jsonify({"ok": True, "items": [dict(r) for r in rows]})
+    return stream_rows_response("items", MemberRepo.select)
 
 
 @app.delete("/api/admin/members/<int:member_id>")
+@admin_required
 def api_admin_delete_member(member_id: int):
     """
     VARFÖR: Admin ska kunna radera medlemsanmälningar (GDPR-rätt att bli glömd).
     VAD: Raderar en anmälan permanent ur members-tabellen.
     HUR: Kräver admin-session. Returnerar 404 om posten inte hittas.
     """
-    if not is_admin():
-        return jsonify({"ok": False, "error": "Unauthorized"}), 401
-
-    with db() as con:
-        result = con.execute("DELETE FROM members WHERE id=?", (member_id,))
-        con.commit()
-        if result.rowcount == 0:
-            return jsonify({"ok": False, "error": "Anmälan hittades inte"}), 404
+    if not write(lambda con: MemberRepo.delete(con, member_id)):
+        return jsonify({"ok": False, "error": "Anmälan hittades inte"}), 404
 
     return jsonify({"ok": True})
 
 
 @app.post("/api/admin/set-status")
+@admin_required
 def api_admin_set_status():
     """
     VARFÖR: Admin behöver kunna ändra status på bokningar (t.ex. godkänna eller neka).
     VAD: Uppdaterar status-fältet på en specifik bokning.
     HUR: Tar emot {id, status} i JSON, validerar status-värdet, uppdaterar i DB.
     """
-    if not is_admin():
-        return jsonify({"ok": False, "error": "Unauthorized"}), 401
-
     data       = request.get_json(silent=True) or {}
     booking_id = int(data.get("id") or 0)
     status     = (data.get("status") or "").strip()
@@ -744,18 +3453,161 @@ def api_admin_set_status():
     if booking_id <= 0 or status not in ("approved", "pending", "denied"):
         return jsonify({"ok": False, "error": "Ogiltig data"}), 400
 
-    with db() as con:
-        con.execute("UPDATE bookings SET status=? WHERE id=?", (status, booking_id))
-        con.commit()
+    write(lambda con: BookingRepo.set_status(con, booking_id, status))
 
     return jsonify({"ok": True})
 
 
+# =========================
+# API: Ändringsflöde (admin)
+# =========================
+
+@app.get("/api/changes")
+@admin_required
+def api_changes():
+    """
+    VARFÖR: Efter varje ändring ska adminpanelen (eller en extern konsument) inte behöva
+            hämta om hela listor — bara det som faktiskt ändrats.
+    VAD: Returnerar ändringar efter en viss position i ändringsloggen, med radens
+         aktuella innehåll. op är "upsert" (raden finns, row = raden) eller "delete" (row = null).
+    HUR: Query-parametrar: since (seq från förra svaret eller från en adminlista), limit
+         (max 1000). Flera ändringar av samma rad inom svaret slås ihop till den senaste.
+         Svarets seq används som nästa since; has_more=true betyder att det finns fler.
+         reset=true betyder att loggposter efter since har rensats — ladda om listorna.
+    """
+    since = max(request.args.get("since", 0, type=int), 0)
+    limit = min(max(request.args.get("limit", 500, type=int), 1), 1000)
+
+    with db() as con:
+        latest = ChangeRepo.latest(con)
+        oldest = ChangeRepo.oldest(con) or latest + 1
+        rows   = ChangeRepo.since(con, since, limit + 1)
+
+        page = rows[:limit]
+        last_by_row = {(r["entity"], r["key"]): r for r in page}
+
+        keys_by_entity: dict[str, list[str]] = {}
+        for entity, key in last_by_row:
+            keys_by_entity.setdefault(entity, []).append(key)
+        current = {entity: ChangeRepo.current(con, entity, keys) for entity, keys in keys_by_entity.items()}
+
+    changes = []
+    for (entity, key), r in sorted(last_by_row.items(), key=lambda item: item[1]["seq"]):
+        row = current[entity].get(key)
+        changes.append({
+            "seq":        r["seq"],
+            "entity":     entity,
+            "key":        key,
+            "op":         "upsert" if row is not None else "delete",
+            "row":        row,
+            "changed_at": r["changed_at"],
+        })
+
+    return jsonify({
+        "ok":       True,
+        "seq":      page[-1]["seq"] if page else latest,
+        "has_more": len(rows) > limit,
+        "reset":    since + 1 < oldest and since < latest,
+        "changes":  changes,
+    })
+
+
+# =========================
+# API: Statistik (admin)
+# =========================
+
+# Längsta intervall som kan efterfrågas i ett anrop (dagar)
+STATS_MAX_DAYS = 3660
+
+
+def _stats_summary(bucket: dict, capacity: int) -> dict:
+    """Gör om en summering (se api_admin_stats) till svarets form."""
+    days = bucket.pop("days")
+    lead_bookings, lead_days = bucket.pop("lead_bookings"), bucket.pop("lead_days")
+    bucket["lead_days_avg"] = round(lead_days / lead_bookings, 1) if lead_bookings else None
+    bucket["capacity_days"] = days * capacity
+    bucket["occupancy"]     = round(bucket["occupied_days"] / (days * capacity), 4) if days and capacity else None
+    return bucket
+
+
+@app.get("/api/admin/stats")
+@admin_required
+def api_admin_stats():
+    """
+    VARFÖR: Styrelsen vill veta hur ofta lokalen hyrs ut, per typ och månad, utan att
+            exportera bokningslistan och räkna för hand.
+    VAD: Statistik för ett datumintervall: godkända bokningar per dag, månad och typ,
+         beläggning, genomsnittlig ledtid och nya medlemmar per månad.
+    HUR: ?from=YYYY-MM-DD&to=YYYY-MM-DD (standard: innevarande år), ?resource=<slug>
+         (standard: alla resurser). Allt läses ur summeringstabellerna (StatsRepo).
+         - Bokningar räknas på startdagen; typ "manuell" = tillagd av admin utan typ
+         - occupancy = upptagna resursdagar / capacity_days (dagar × antal resurser);
+           en helgbokning upptar två dagar
+         - lead_days_avg = dagar mellan bokningstillfället och startdagen
+    """
+    today = datetime.now().date()
+    try:
+        first = datetime.strptime(request.args.get("from") or f"{today.year}-01-01", "%Y-%m-%d").date()
+        last  = datetime.strptime(request.args.get("to")   or f"{today.year}-12-31", "%Y-%m-%d").date()
+    except ValueError:
+        return jsonify({"ok": False, "error": "Ogiltigt datumformat"}), 400
+    if last < first:
+        return jsonify({"ok": False, "error": "Slutdatum före startdatum"}), 400
+    if (last - first).days >= STATS_MAX_DAYS:
+        return jsonify({"ok": False, "error": f"Högst {STATS_MAX_DAYS} dagar per anrop"}), 400
+    resource = (request.args.get("resource") or "").strip() or None
+
+    first_s, last_s = first.isoformat(), last.isoformat()
+    with db() as con:
+        if resource is not None and not ResourceRepo.exists(con, resource):
+            return jsonify({"ok": False, "error": "Okänd resurs"}), 400
+        capacity = 1 if resource else len(ResourceRepo.list(con))
+        booking_rows = StatsRepo.bookings(con, first_s, last_s, resource)
+        occupied     = StatsRepo.occupied_days(con, first_s, last_s, resource)
+        member_rows  = StatsRepo.members(con, first_s[:7], last_s[:7])
+
+    def bucket() -> dict:
+        return {"bookings": 0, "by_type": {}, "lead_bookings": 0, "lead_days": 0, "occupied_days": 0, "days": 0}
+
+    totals = bucket()
+    months: dict[str, dict] = {}
+    day = first
+    while day <= last:
+        months.setdefault(day.strftime("%Y-%m"), bucket())["days"] += 1
+        day += timedelta(days=1)
+    totals["days"] = (last - first).days + 1
+
+    by_day: dict[str, int] = {}
+    for day_s, booking_type, count, lead_bookings, lead_days in booking_rows:
+        kind = booking_type or "manuell"
+        for target in (totals, months[day_s[:7]]):
+            target["bookings"]      += count
+            target["by_type"][kind]  = target["by_type"].get(kind, 0) + count
+            target["lead_bookings"] += lead_bookings
+            target["lead_days"]     += lead_days
+        by_day[day_s] = by_day.get(day_s, 0) + count
+    for month, count in occupied.items():
+        months[month]["occupied_days"] = count
+        totals["occupied_days"] += count
+
+    return jsonify({
+        "ok":       True,
+        "from":     first_s,
+        "to":       last_s,
+        "resource": resource,
+        "totals":   _stats_summary(totals, capacity),
+        "months":   [{"month": m, **_stats_summary(b, capacity)} for m, b in months.items()],
+        "days":     [{"day": d, "bookings": n} for d, n in by_day.items() if n > 0],
+        "members":  [{"month": m, "members": n} for m, n in member_rows],
+    })
+
+
 # =========================
 # API: Admin — Events
 # =========================
 
 @app.post("/api/admin/events")
+@admin_required
 def api_admin_create_event():
     """
     VARFÖR: Admin ska kunna skapa nya event som visas på event-sidan.
@@ -763,9 +3615,6 @@ def api_admin_create_event():
     HUR: Tar emot JSON, validerar att titel finns, infogar i events-tabellen.
          Bild laddas upp separat via POST /api/admin/events/<id>/image.
     """
-    if not is_admin():
-        return jsonify({"ok": False, "error": "Unauthorized"}), 401
-
     data        = request.get_json(silent=True) or {}
     title       = (data.get("title")       or "").strip()
     date        = (data.get("date")        or "").strip() or None
@@ -774,18 +3623,13 @@ def api_admin_create_event():
     if not title:
         return jsonify({"ok": False, "error": "Titel krävs"}), 400
 
-    with db() as con:
-        cur = con.execute(
-            "INSERT INTO events (title, date, description, image_path, created_at) VALUES (?, ?, ?, NULL, ?)",
-            (title, date, description, utc_now_iso()),
-        )
-        con.commit()
-        event_id = cur.lastrowid
+    event_id = write(lambda con: EventRepo.create(con, title, date, description))
 
     return jsonify({"ok": True, "id": event_id})
 
 
 @app.put("/api/admin/events/<int:event_id>")
+@admin_required
 def api_admin_update_event(event_id: int):
     """
     VARFÖR: Admin ska kunna redigera befintliga event (ändra titel, datum, beskrivning).
@@ -793,9 +3637,6 @@ def api_admin_update_event(event_id: int):
     HUR: Tar emot JSON med de fält som ska ändras, kör UPDATE på rätt rad via event_id.
          Bild hanteras separat via POST /api/admin/events/<id>/image.
     """
-    if not is_admin():
-        return jsonify({"ok": False, "error": "Unauthorized"}), 401
-
     data        = request.get_json(silent=True) or {}
     title       = (data.get("title")       or "").strip()
     date        = (data.get("date")        or "").strip() or None
@@ -804,44 +3645,40 @@ def api_admin_update_event(event_id: int):
     if not title:
         return jsonify({"ok": False, "error": "Titel krävs"}), 400
 
-    with db() as con:
-        con.execute(
-            "UPDATE events SET title=?, date=?, description=? WHERE id=?",
-            (title, date, description, event_id),
-        )
-        con.commit()
+    write(lambda con: EventRepo.update(con, event_id, title, date, description))
 
     return jsonify({"ok": True})
 
 
 @app.delete("/api/admin/events/<int:event_id>")
+@admin_required
 def api_admin_delete_event(event_id: int):
     """
     VARFÖR: Admin ska kunna ta bort gamla event.
     VAD: Tar bort eventet ur databasen och raderar eventuell bild från filsystemet.
-    HUR: Hämtar image_path från DB, tar bort bildfilen om den finns, sedan DELETE på raden.
+    HUR: Hämtar image_path och tar bort raden i write; bildfilen tas bort när det är committat.
     """
-    if not is_admin():
-        return jsonify({"ok": False, "error": "Unauthorized"}), 401
+    def delete(con):
+        found, image_path = EventRepo.get_image_path(con, event_id)
+        if not found:
+            return False, None
 
-    with db() as con:
-        row = con.execute("SELECT image_path FROM events WHERE id=?", (event_id,)).fetchone()
-        if not row:
-            return jsonify({"ok": False, "error": "Event hittades inte"}), 404
+        if image_path:
+            ImageMetaRepo.forget(con, image_path)
 
-        # Ta bort bildfil om den finns
-        if row["image_path"]:
-            img_file = PROJECT_ROOT / row["image_path"]
-            if img_file.is_file():
-                img_file.unlink()
+        EventRepo.delete(con, event_id)
+        return True, image_path
 
-        con.execute("DELETE FROM events WHERE id=?", (event_id,))
-        con.commit()
+    found, image_path = write(delete)
+    if not found:
+        return jsonify({"ok": False, "error": "Event hittades inte"}), 404
 
+    remove_image_file(image_path)  # först när raden är borta
     return jsonify({"ok": True})
 
 
 @app.post("/api/admin/events/<int:event_id>/image")
+@admin_required
 def api_admin_event_image(event_id: int):
     """
     VARFÖR: Varje event kan ha en bild som visas på event-sidan.
@@ -849,47 +3686,43 @@ def api_admin_event_image(event_id: int):
          Uppdaterar events.image_path i databasen med sökvägen till filen.
     HUR:
       - Filen sparas i data/images/events/<event_id>/<säkertfilnamn>
-      - Eventuell gammal bild tas bort
+      - Filen sparas innan write(); eventuell gammal bild tas bort när den nya raden är committad
       - image_path sparas relativt projektroten (t.ex. "data/images/events/3/foto.jpg")
         så att Flask kan serva den via /<path:filename>-routern
+      - Mått, format och storlek läses ur filhuvudet och sparas i images
     """
-    if not is_admin():
-        return jsonify({"ok": False, "error": "Unauthorized"}), 401
-
     if "image" not in request.files:
         return jsonify({"ok": False, "error": "Ingen fil skickades"}), 400
 
     file = request.files["image"]
     if not file.filename or not allowed_file(file.filename):
         return jsonify({"ok": False, "error": "Otillåten filtyp"}), 400
+    if image_quota_exceeded(request.content_length or 0):
+        return jsonify({"ok": False, "error": "Lagringsutrymmet för bilder är fullt"}), 507
 
-    # Kontrollera att eventet finns
-    with db() as con:
-        row = con.execute("SELECT image_path FROM events WHERE id=?", (event_id,)).fetchone()
-        if not row:
-            return jsonify({"ok": False, "error": "Event hittades inte"}), 404
-
-        # Ta bort gammal bild om det finns en
-        if row["image_path"]:
-            old_file = PROJECT_ROOT / row["image_path"]
-            if old_file.is_file():
-                old_file.unlink()
-
-        # Spara ny bild i events/<event_id>/
-        event_dir = EVENTS_IMG / str(event_id)
-        event_dir.mkdir(parents=True, exist_ok=True)
+    # Spara ny bild i events/<event_id>/ innan write — op:en nedan kör bara SQL
+    save_path, rel_path, image = save_upload(file, tenant().events_img / str(event_id))
 
-        filename  = secure_filename(file.filename)
-        save_path = event_dir / filename
-        file.save(save_path)
+    def save(con):
+        found, image_path = EventRepo.get_image_path(con, event_id)
+        if not found:
+            return False, None
 
-        # Sökväg relativt projektroten — används som URL-stig
-        rel_path = save_path.relative_to(PROJECT_ROOT).as_posix()
+        if image_path:
+            ImageMetaRepo.forget(con, image_path)
+        ImageMetaRepo.record(con, save_path, image)
+        EventRepo.set_image_path(con, event_id, rel_path)
+        return True, image_path
 
-        con.execute("UPDATE events SET image_path=? WHERE id=?", (rel_path, event_id))
-        con.commit()
+    found, old_path = write(save)
+    if not found:
+        save_path.unlink(missing_ok=True)  # ingen rad kan peka på den
+        return jsonify({"ok": False, "error": "Event hittades inte"}), 404
 
-    return jsonify({"ok": True, "image_path": rel_path})
+    # Den gamla bilden tas bort först när den nya raden är committad
+    if old_path != rel_path:
+        remove_image_file(old_path)
+    return jsonify({"ok": True, "image_path": rel_path, "image": image})
 
 
 # =========================
@@ -897,6 +3730,7 @@ def api_admin_event_image(event_id: int):
 # =========================
 
 @app.post("/api/admin/gallery")
+@admin_required
 def api_admin_gallery_upload():
     """
     VARFÖR: Admin ska kunna ladda upp foton till ett bildgalleri på hemsidan.
@@ -904,22 +3738,21 @@ def api_admin_gallery_upload():
     HUR:
       - Filen sparas i data/images/gallery/<säkertfilnamn>
       - Om ett filnamn redan finns läggs ett suffix till för att undvika kollision
-      - Returnerar filnamnet och URL:en för den sparade bilden
+      - Returnerar filnamnet, URL:en och bildens metadata (mått, format, storlek)
     """
-    if not is_admin():
-        return jsonify({"ok": False, "error": "Unauthorized"}), 401
-
     if "image" not in request.files:
         return jsonify({"ok": False, "error": "Ingen fil skickades"}), 400
 
     file = request.files["image"]
     if not file.filename or not allowed_file(file.filename):
         return jsonify({"ok": False, "error": "Otillåten filtyp"}), 400
+    if image_quota_exceeded(request.content_length or 0):
+        return jsonify({"ok": False, "error": "Lagringsutrymmet för bilder är fullt"}), 507
 
-    ensure_db()  # säkerställer att GALLERY_DIR finns
+    ensure_db()  # säkerställer att gallery-mappen finns
 
     filename  = secure_filename(file.filename)
-    save_path = GALLERY_DIR / filename
+    save_path = tenant().gallery_dir / filename
 
     # Undvik kollision: lägg till _1, _2 osv. om filnamnet redan finns
     if save_path.exists():
@@ -927,20 +3760,25 @@ def api_admin_gallery_upload():
         suffix = save_path.suffix
         counter = 1
         while save_path.exists():
-            save_path = GALLERY_DIR / f"{stem}_{counter}{suffix}"
+            save_path = tenant().gallery_dir / f"{stem}_{counter}{suffix}"
             counter += 1
         filename = save_path.name
 
     file.save(save_path)
+    register_upload(save_path)
+    image = read_image_info(save_path)
 
-    return jsonify({
-        "ok":       True,
-        "filename": filename,
-        "url":      f"/data/images/gallery/{filename}",
-    })
+    def record(con):
+        ChangeRepo.record(con, "gallery", filename, "insert")
+        return ImageMetaRepo.record(con, save_path, image)
+
+    write(record)
+
+    return jsonify({"ok": True, **gallery_item(filename, image)})
 
 
 @app.delete("/api/admin/gallery/<filename>")
+@admin_required
 def api_admin_gallery_delete(filename: str):
     """
     VARFÖR: Admin ska kunna ta bort bilder från galleriet.
@@ -950,16 +3788,19 @@ def api_admin_gallery_delete(filename: str):
         (t.ex. att någon försöker radera "../../../etc/passwd")
       - Returnerar 404 om filen inte finns
     """
-    if not is_admin():
-        return jsonify({"ok": False, "error": "Unauthorized"}), 401
-
     safe_name = secure_filename(filename)
-    file_path = GALLERY_DIR / safe_name
+    file_path = tenant().gallery_dir / safe_name
 
     if not file_path.is_file():
         return jsonify({"ok": False, "error": "Filen hittades inte"}), 404
 
-    file_path.unlink()
+    def forget(con):
+        ImageMetaRepo.forget(con, file_path.relative_to(tenant().root).as_posix())
+        ChangeRepo.record(con, "gallery", safe_name, "delete")
+
+    write(forget)
+    file_path.unlink(missing_ok=True)
+
     return jsonify({"ok": True})
 
 
@@ -972,15 +3813,13 @@ def api_get_page_sections(page_name: str):
     """
     VARFÖR: Information-sidan (och eventuellt andra sidor) behöver ladda innehåll dynamiskt.
     VAD: Returnerar alla sektioner för en specifik sida, sorterade efter display_order.
-    HUR: Hämtar från page_sections-tabellen där page = page_name.
+    HUR: Hämtar från page_sections-tabellen där page = page_name (cachat via load_page_sections).
+         En sida utan sektioner ger en tom lista, utan att något cachas.
     """
     try:
-        with db() as con:
-            rows = con.execute(
-                "SELECT id, title, content FROM page_sections WHERE page=? ORDER BY display_order ASC, id ASC",
-                (page_name,),
-            ).fetchall()
-        return jsonify({"ok": True, "sections": [dict(r) for r in rows]})
+        if page_name not in load_page_names():
+            return json_rows_response("sections", [])
+        return json_rows_response("sections", cached_rows_json(f"page-sections:{page_name}", lambda: load_page_sections(page_name)))
     except Exception:
         return jsonify({"ok": False, "error": "Kunde inte hämta sidinnehåll"}), 500
 
@@ -994,14 +3833,10 @@ def api_get_board():
     """
     VARFÖR: Styrelsen-sidan behöver lista alla roller och kontaktpersoner.
     VAD: Returnerar alla styrelsemedlemmar sorterade efter display_order.
-    HUR: Hämtar från board_members-tabellen, ordnade så admin kan bestämma ordning.
+    HUR: Hämtar från board_members-tabellen via load_board (cachat), ordnade så admin kan bestämma ordning.
     """
     try:
-        with db() as con:
-            rows = con.execute(
-                "SELECT id, role, name, contact, image_path FROM board_members ORDER BY display_order ASC, id ASC"
-            ).fetchall()
-        return jsonify({"ok": True, "members": [dict(r) for r in rows]})
+        return json_rows_response("members", cached_rows_json("board", load_board))
     except Exception:
         return jsonify({"ok": False, "error": "Kunde inte hämta styrelsen"}), 500
 
@@ -1011,15 +3846,13 @@ def api_get_board():
 # =========================
 
 @app.post("/api/admin/board")
+@admin_required
 def api_admin_create_board_member():
     """
     VARFÖR: Admin ska kunna lägga till nya styrelseroller (t.ex. Suppliant).
     VAD: Skapar en ny styrelsemedlem med roll, namn och kontaktinfo.
     HUR: Tar emot JSON, sätter display_order till max+1 för att hamna sist.
     """
-    if not is_admin():
-        return jsonify({"ok": False, "error": "Unauthorized"}), 401
-
     data    = request.get_json(silent=True) or {}
     role    = (data.get("role")    or "").strip()
     name    = (data.get("name")    or "").strip()
@@ -1028,28 +3861,34 @@ def api_admin_create_board_member():
     if not role or not name:
         return jsonify({"ok": False, "error": "Roll och namn krävs"}), 400
 
-    with db() as con:
-        # Hitta högsta display_order och sätt nya medlemmen sist
-        max_order = con.execute("SELECT COALESCE(MAX(display_order), 0) FROM board_members").fetchone()[0]
-        con.execute(
-            "INSERT INTO board_members (role, name, contact, display_order, created_at) VALUES (?, ?, ?, ?, ?)",
-            (role, name, contact, max_order + 1, utc_now_iso()),
-        )
-        con.commit()
+    write(lambda con: BoardRepo.create(con, role, name, contact))
+
+    return jsonify({"ok": True})
 
+
+@app.put("/api/admin/board/order")
+@admin_required
+def api_admin_reorder_board():
+    """
+    VARFÖR: Admin ska kunna ändra ordningen på styrelsen (t.ex. ordförande först).
+    VAD: Tar emot {"ids": [...]} med alla styrelsemedlemmar i önskad ordning.
+    HUR: OrderedRepo.reorder skriver om display_order i en transaktion.
+    """
+    data  = request.get_json(silent=True) or {}
+    error = BoardRepo.reorder(data.get("ids"))
+    if error:
+        return jsonify({"ok": False, "error": error}), 400
     return jsonify({"ok": True})
 
 
 @app.put("/api/admin/board/<int:board_id>")
+@admin_required
 def api_admin_update_board_member(board_id: int):
     """
     VARFÖR: Admin ska kunna redigera befintliga styrelsemedlemmar (byta namn/kontakt).
     VAD: Uppdaterar en styrelsemedlems uppgifter.
     HUR: PUT med JSON-kropp, uppdaterar DB-raden via board_id.
     """
-    if not is_admin():
-        return jsonify({"ok": False, "error": "Unauthorized"}), 401
-
     data    = request.get_json(silent=True) or {}
     role    = (data.get("role")    or "").strip()
     name    = (data.get("name")    or "").strip()
@@ -1058,45 +3897,41 @@ def api_admin_update_board_member(board_id: int):
     if not role or not name:
         return jsonify({"ok": False, "error": "Roll och namn krävs"}), 400
 
-    with db() as con:
-        con.execute(
-            "UPDATE board_members SET role=?, name=?, contact=? WHERE id=?",
-            (role, name, contact, board_id),
-        )
-        con.commit()
+    write(lambda con: BoardRepo.update(con, board_id, role, name, contact))
 
     return jsonify({"ok": True})
 
 
 @app.delete("/api/admin/board/<int:board_id>")
+@admin_required
 def api_admin_delete_board_member(board_id: int):
     """
     VARFÖR: Admin ska kunna ta bort en styrelseroll (t.ex. när någon slutar).
     VAD: Raderar en styrelsemedlem permanent och tar bort eventuell bild.
-    HUR: DELETE-request, tar bort raden från board_members.
+    HUR: DELETE-request, tar bort raden från board_members; bilden tas bort när det är committat.
     """
-    if not is_admin():
-        return jsonify({"ok": False, "error": "Unauthorized"}), 401
-
-    with db() as con:
+    def delete(con):
         # Hämta image_path för att kunna radera bilden
-        row = con.execute("SELECT image_path FROM board_members WHERE id=?", (board_id,)).fetchone()
-        if not row:
-            return jsonify({"ok": False, "error": "Styrelsemedlem hittades inte"}), 404
+        found, image_path = BoardRepo.get_image_path(con, board_id)
+        if not found:
+            return False, None
 
-        # Ta bort bildfil om den finns
-        if row["image_path"]:
-            img_file = PROJECT_ROOT / row["image_path"]
-            if img_file.is_file():
-                img_file.unlink()
+        if image_path:
+            ImageMetaRepo.forget(con, image_path)
 
-        result = con.execute("DELETE FROM board_members WHERE id=?", (board_id,))
-        con.commit()
+        BoardRepo.delete(con, board_id)
+        return True, image_path
+
+    found, image_path = write(delete)
+    if not found:
+        return jsonify({"ok": False, "error": "Styrelsemedlem hittades inte"}), 404
 
+    remove_image_file(image_path)  # först när raden är borta
     return jsonify({"ok": True})
 
 
 @app.post("/api/admin/board/<int:board_id>/image")
+@admin_required
 def api_admin_board_image(board_id: int):
     """
     VARFÖR: Styrelsemedlemmar kan ha profilbilder (t.ex. porträtt).
@@ -1104,46 +3939,42 @@ def api_admin_board_image(board_id: int):
          Uppdaterar board_members.image_path i databasen.
     HUR:
       - Filen sparas i data/images/board/<board_id>/<säkertfilnamn>
-      - Eventuell gammal bild tas bort
+      - Filen sparas innan write(); eventuell gammal bild tas bort när den nya raden är committad
       - image_path sparas relativt projektroten
+      - Mått, format och storlek läses ur filhuvudet och sparas i images
     """
-    if not is_admin():
-        return jsonify({"ok": False, "error": "Unauthorized"}), 401
-
     if "image" not in request.files:
         return jsonify({"ok": False, "error": "Ingen fil skickades"}), 400
 
     file = request.files["image"]
     if not file.filename or not allowed_file(file.filename):
         return jsonify({"ok": False, "error": "Otillåten filtyp"}), 400
+    if image_quota_exceeded(request.content_length or 0):
+        return jsonify({"ok": False, "error": "Lagringsutrymmet för bilder är fullt"}), 507
 
-    # Kontrollera att styrelsemedlemmen finns
-    with db() as con:
-        row = con.execute("SELECT image_path FROM board_members WHERE id=?", (board_id,)).fetchone()
-        if not row:
-            return jsonify({"ok": False, "error": "Styrelsemedlem hittades inte"}), 404
-
-        # Ta bort gammal bild om det finns en
-        if row["image_path"]:
-            old_file = PROJECT_ROOT / row["image_path"]
-            if old_file.is_file():
-                old_file.unlink()
-
-        # Spara ny bild i board/<board_id>/
-        board_dir = IMAGES_DIR / "board" / str(board_id)
-        board_dir.mkdir(parents=True, exist_ok=True)
+    # Spara ny bild i board/<board_id>/ innan write — op:en nedan kör bara SQL
+    save_path, rel_path, image = save_upload(file, tenant().images_dir / "board" / str(board_id))
 
-        filename  = secure_filename(file.filename)
-        save_path = board_dir / filename
-        file.save(save_path)
+    def save(con):
+        found, image_path = BoardRepo.get_image_path(con, board_id)
+        if not found:
+            return False, None
 
-        # Sökväg relativt projektroten
-        rel_path = save_path.relative_to(PROJECT_ROOT).as_posix()
+        if image_path:
+            ImageMetaRepo.forget(con, image_path)
+        ImageMetaRepo.record(con, save_path, image)
+        BoardRepo.set_image_path(con, board_id, rel_path)
+        return True, image_path
 
-        con.execute("UPDATE board_members SET image_path=? WHERE id=?", (rel_path, board_id))
-        con.commit()
+    found, old_path = write(save)
+    if not found:
+        save_path.unlink(missing_ok=True)  # ingen rad kan peka på den
+        return jsonify({"ok": False, "error": "Styrelsemedlem hittades inte"}), 404
 
-    return jsonify({"ok": True, "image_path": rel_path})
+    # Den gamla bilden tas bort först när den nya raden är committad
+    if old_path != rel_path:
+        remove_image_file(old_path)
+    return jsonify({"ok": True, "image_path": rel_path, "image": image})
 
 
 # =========================
@@ -1155,14 +3986,10 @@ def api_get_sponsors():
     """
     VARFÖR: Sponsorer-sidan behöver lista alla sponsorer som stödjer bygdegården.
     VAD: Returnerar alla sponsorer sorterade efter display_order.
-    HUR: Hämtar från sponsors-tabellen med namn, beskrivning, URL och logotyp.
+    HUR: Hämtar från sponsors-tabellen via load_sponsors (cachat) med namn, beskrivning, URL och logotyp.
     """
     try:
-        with db() as con:
-            rows = con.execute(
-                "SELECT id, name, description, url, image_path FROM sponsors ORDER BY display_order ASC, id ASC"
-            ).fetchall()
-        return jsonify({"ok": True, "sponsors": [dict(r) for r in rows]})
+        return json_rows_response("sponsors", cached_rows_json("sponsors", load_sponsors))
     except Exception:
         return jsonify({"ok": False, "error": "Kunde inte hämta sponsorer"}), 500
 
@@ -1172,15 +3999,13 @@ def api_get_sponsors():
 # =========================
 
 @app.post("/api/admin/sponsors")
+@admin_required
 def api_admin_create_sponsor():
     """
     VARFÖR: Admin ska kunna lägga till nya sponsorer.
     VAD: Skapar en ny sponsor med namn, beskrivning och URL.
     HUR: Tar emot JSON, sätter display_order till max+1 för att hamna sist.
     """
-    if not is_admin():
-        return jsonify({"ok": False, "error": "Unauthorized"}), 401
-
     data        = request.get_json(silent=True) or {}
     name        = (data.get("name")        or "").strip()
     description = (data.get("description") or "").strip() or None
@@ -1189,28 +4014,34 @@ def api_admin_create_sponsor():
     if not name:
         return jsonify({"ok": False, "error": "Namn krävs"}), 400
 
-    with db() as con:
-        # Hitta högsta display_order och sätt nya sponsorn sist
-        max_order = con.execute("SELECT COALESCE(MAX(display_order), 0) FROM sponsors").fetchone()[0]
-        con.execute(
-            "INSERT INTO sponsors (name, description, url, display_order, created_at) VALUES (?, ?, ?, ?, ?)",
-            (name, description, url, max_order + 1, utc_now_iso()),
-        )
-        con.commit()
+    write(lambda con: SponsorRepo.create(con, name, description, url))
+
+    return jsonify({"ok": True})
 
+
+@app.put("/api/admin/sponsors/order")
+@admin_required
+def api_admin_reorder_sponsors():
+    """
+    VARFÖR: Admin ska kunna ändra ordningen på sponsorerna.
+    VAD: Tar emot {"ids": [...]} med alla sponsorer i önskad ordning.
+    HUR: OrderedRepo.reorder skriver om display_order i en transaktion.
+    """
+    data  = request.get_json(silent=True) or {}
+    error = SponsorRepo.reorder(data.get("ids"))
+    if error:
+        return jsonify({"ok": False, "error": error}), 400
     return jsonify({"ok": True})
 
 
 @app.put("/api/admin/sponsors/<int:sponsor_id>")
+@admin_required
 def api_admin_update_sponsor(sponsor_id: int):
     """
     VARFÖR: Admin ska kunna redigera befintliga sponsorer.
     VAD: Uppdaterar en sponsors uppgifter.
     HUR: PUT med JSON-kropp, uppdaterar DB-raden via sponsor_id.
     """
-    if not is_admin():
-        return jsonify({"ok": False, "error": "Unauthorized"}), 401
-
     data        = request.get_json(silent=True) or {}
     name        = (data.get("name")        or "").strip()
     description = (data.get("description") or "").strip() or None
@@ -1219,45 +4050,41 @@ def api_admin_update_sponsor(sponsor_id: int):
     if not name:
         return jsonify({"ok": False, "error": "Namn krävs"}), 400
 
-    with db() as con:
-        con.execute(
-            "UPDATE sponsors SET name=?, description=?, url=? WHERE id=?",
-            (name, description, url, sponsor_id),
-        )
-        con.commit()
+    write(lambda con: SponsorRepo.update(con, sponsor_id, name, description, url))
 
     return jsonify({"ok": True})
 
 
 @app.delete("/api/admin/sponsors/<int:sponsor_id>")
+@admin_required
 def api_admin_delete_sponsor(sponsor_id: int):
     """
     VARFÖR: Admin ska kunna ta bort sponsorer.
     VAD: Raderar en sponsor permanent och tar bort eventuell logotyp.
-    HUR: DELETE-request, tar bort raden från sponsors.
+    HUR: DELETE-request, tar bort raden från sponsors; logotypen tas bort när det är committat.
     """
-    if not is_admin():
-        return jsonify({"ok": False, "error": "Unauthorized"}), 401
-
-    with db() as con:
+    def delete(con):
         # Hämta image_path för att kunna radera logotypen
-        row = con.execute("SELECT image_path FROM sponsors WHERE id=?", (sponsor_id,)).fetchone()
-        if not row:
-            return jsonify({"ok": False, "error": "Sponsor hittades inte"}), 404
+        found, image_path = SponsorRepo.get_image_path(con, sponsor_id)
+        if not found:
+            return False, None
 
-        # Ta bort logotyp om den finns
-        if row["image_path"]:
-            img_file = PROJECT_ROOT / row["image_path"]
-            if img_file.is_file():
-                img_file.unlink()
+        if image_path:
+            ImageMetaRepo.forget(con, image_path)
 
-        result = con.execute("DELETE FROM sponsors WHERE id=?", (sponsor_id,))
-        con.commit()
+        SponsorRepo.delete(con, sponsor_id)
+        return True, image_path
+
+    found, image_path = write(delete)
+    if not found:
+        return jsonify({"ok": False, "error": "Sponsor hittades inte"}), 404
 
+    remove_image_file(image_path)  # först när raden är borta
     return jsonify({"ok": True})
 
 
 @app.post("/api/admin/sponsors/<int:sponsor_id>/image")
+@admin_required
 def api_admin_sponsor_image(sponsor_id: int):
     """
     VARFÖR: Sponsorer kan ha logotyper.
@@ -1265,46 +4092,42 @@ def api_admin_sponsor_image(sponsor_id: int):
          Uppdaterar sponsors.image_path i databasen.
     HUR:
       - Filen sparas i data/images/sponsors/<sponsor_id>/<säkertfilnamn>
-      - Eventuell gammal bild tas bort
+      - Filen sparas innan write(); eventuell gammal bild tas bort när den nya raden är committad
       - image_path sparas relativt projektroten
+      - Mått, format och storlek läses ur filhuvudet och sparas i images
     """
-    if not is_admin():
-        return jsonify({"ok": False, "error": "Unauthorized"}), 401
-
     if "image" not in request.files:
         return jsonify({"ok": False, "error": "Ingen fil skickades"}), 400
 
     file = request.files["image"]
     if not file.filename or not allowed_file(file.filename):
         return jsonify({"ok": False, "error": "Otillåten filtyp"}), 400
+    if image_quota_exceeded(request.content_length or 0):
+        return jsonify({"ok": False, "error": "Lagringsutrymmet för bilder är fullt"}), 507
 
-    # Kontrollera att sponsorn finns
-    with db() as con:
-        row = con.execute("SELECT image_path FROM sponsors WHERE id=?", (sponsor_id,)).fetchone()
-        if not row:
-            return jsonify({"ok": False, "error": "Sponsor hittades inte"}), 404
-
-        # Ta bort gammal bild om det finns en
-        if row["image_path"]:
-            old_file = PROJECT_ROOT / row["image_path"]
-            if old_file.is_file():
-                old_file.unlink()
-
-        # Spara ny bild i sponsors/<sponsor_id>/
-        sponsor_dir = IMAGES_DIR / "sponsors" / str(sponsor_id)
-        sponsor_dir.mkdir(parents=True, exist_ok=True)
+    # Spara ny bild i sponsors/<sponsor_id>/ innan write — op:en nedan kör bara SQL
+    save_path, rel_path, image = save_upload(file, tenant().images_dir / "sponsors" / str(sponsor_id))
 
-        filename  = secure_filename(file.filename)
-        save_path = sponsor_dir / filename
-        file.save(save_path)
+    def save(con):
+        found, image_path = SponsorRepo.get_image_path(con, sponsor_id)
+        if not found:
+            return False, None
 
-        # Sökväg relativt projektroten
-        rel_path = save_path.relative_to(PROJECT_ROOT).as_posix()
+        if image_path:
+            ImageMetaRepo.forget(con, image_path)
+        ImageMetaRepo.record(con, save_path, image)
+        SponsorRepo.set_image_path(con, sponsor_id, rel_path)
+        return True, image_path
 
-        con.execute("UPDATE sponsors SET image_path=? WHERE id=?", (rel_path, sponsor_id))
-        con.commit()
+    found, old_path = write(save)
+    if not found:
+        save_path.unlink(missing_ok=True)  # ingen rad kan peka på den
+        return jsonify({"ok": False, "error": "Sponsor hittades inte"}), 404
 
-    return jsonify({"ok": True, "image_path": rel_path})
+    # Den gamla bilden tas bort först när den nya raden är committad
+    if old_path != rel_path:
+        remove_image_file(old_path)
+    return jsonify({"ok": True, "image_path": rel_path, "image": image})
 
 
 # =========================
@@ -1312,15 +4135,13 @@ def api_admin_sponsor_image(sponsor_id: int):
 # =========================
 
 @app.post("/api/admin/page-sections")
+@admin_required
 def api_admin_create_page_section():
     """
     VARFÖR: Admin ska kunna lägga till nya sektioner på information-sidan.
     VAD: Skapar en ny sektion med titel och innehåll.
     HUR: Tar emot JSON med page, title, content. Sätter display_order till max+1.
     """
-    if not is_admin():
-        return jsonify({"ok": False, "error": "Unauthorized"}), 401
-
     data    = request.get_json(silent=True) or {}
     page    = (data.get("page")    or "").strip()
     title   = (data.get("title")   or "").strip()
@@ -1329,30 +4150,33 @@ def api_admin_create_page_section():
     if not page or not title or not content:
         return jsonify({"ok": False, "error": "Sida, titel och innehåll krävs"}), 400
 
-    with db() as con:
-        # Hitta högsta display_order för denna sida och sätt nya sektionen sist
-        max_order = con.execute(
-            "SELECT COALESCE(MAX(display_order), 0) FROM page_sections WHERE page=?",
-            (page,),
-        ).fetchone()[0]
-        con.execute(
-            "INSERT INTO page_sections (page, title, content, display_order, created_at) VALUES (?, ?, ?, ?, ?)",
-            (page, title, content, max_order + 1, utc_now_iso()),
-        )
-        con.commit()
+    write(lambda con: PageSectionRepo.create(con, page, title, content))
+
+    return jsonify({"ok": True})
 
+
+@app.put("/api/admin/page-sections/<page_name>/order")
+@admin_required
+def api_admin_reorder_page_sections(page_name: str):
+    """
+    VARFÖR: Admin ska kunna ändra ordningen på sektionerna på en sida.
+    VAD: Tar emot {"ids": [...]} med alla sektioner på page_name i önskad ordning.
+    HUR: OrderedRepo.reorder skriver om display_order i en transaktion, avgränsat till sidan.
+    """
+    data  = request.get_json(silent=True) or {}
+    error = PageSectionRepo.reorder(data.get("ids"), "WHERE page=?", (page_name,))
+    if error:
+        return jsonify({"ok": False, "error": error}), 400
     return jsonify({"ok": True})
 
 
 @app.put("/api/admin/page-sections/<int:section_id>")
+@admin_required
 def api_admin_update_page_section(section_id: int):
     """
     VARFÖR: Admin ska kunna redigera befintliga sektioner.
     VAD: Uppdaterar en sektions titel och innehåll.
     """
-    if not is_admin():
-        return jsonify({"ok": False, "error": "Unauthorized"}), 401
-
     data    = request.get_json(silent=True) or {}
     title   = (data.get("title")   or "").strip()
     content = (data.get("content") or "").strip()
@@ -1360,55 +4184,1196 @@ def api_admin_update_page_section(section_id: int):
     if not title or not content:
         return jsonify({"ok": False, "error": "Titel och innehåll krävs"}), 400
 
-    with db() as con:
-        con.execute(
-            "UPDATE page_sections SET title=?, content=? WHERE id=?",
-            (title, content, section_id),
-        )
-        con.commit()
+    write(lambda con: PageSectionRepo.update(con, section_id, title, content))
 
     return jsonify({"ok": True})
 
 
 @app.delete("/api/admin/page-sections/<int:section_id>")
+@admin_required
 def api_admin_delete_page_section(section_id: int):
     """
     VARFÖR: Admin ska kunna ta bort sektioner.
     VAD: Raderar en sektion permanent.
     """
-    if not is_admin():
-        return jsonify({"ok": False, "error": "Unauthorized"}), 401
+    if not write(lambda con: PageSectionRepo.delete(con, section_id)):
+        return jsonify({"ok": False, "error": "Sektion hittades inte"}), 404
+
+    return jsonify({"ok": True})
+
+
+# =========================
+# Underhåll: arkivering + databasvård
+# =========================
+
+_maintenance_thread: threading.Thread | None = None
+_maintenance_lock = threading.Lock()
+
+
+def archive_bookings(con: sqlite3.Connection, before: str) -> int:
+    """
+    VARFÖR: Gamla bokningar ska inte belasta kollisionskontroll och kalender.
+    VAD: Flyttar bokningar vars datum (end, annars start) ligger före `before`
+         till bookings_archive. Returnerar antal flyttade rader.
+    HUR: INSERT ... SELECT följt av DELETE i anroparens transaktion.
+         ISO-strängar jämförs lexikografiskt, så både "2025-01-01" och
+         "2025-01-01T10:00:00" fungerar mot ett datum.
+    """
+    con.execute(
+        """
+        INSERT INTO bookings_archive
+        (id, resource, status, title, start, end, name, email, phone, booking_type, message, created_at, archived_at)
+        SELECT id, resource, status, title, start, end, name, email, phone, booking_type, message, created_at, ?
+        FROM bookings
+        WHERE COALESCE(end, start) < ?
+        """,
+        (utc_now_iso(), before),
+    )
+    return con.execute("DELETE FROM bookings WHERE COALESCE(end, start) < ?", (before,)).rowcount
+
+
+def run_maintenance() -> dict:
+    """
+    VARFÖR: Den heta bokningstabellen ska hållas liten och databasfilen ska inte svälla.
+    VAD: Arkiverar gamla bokningar, rensar ändringsloggen (CHANGES_KEEP_DAYS) och kör ANALYZE,
+         inkrementell VACUUM och WAL-checkpoint. Städar sedan en batch föräldralösa bilder
+         (sweep_images). Returnerar en rapport (antal arkiverade, frigjorda sidor,
+         checkpoint-resultat, städade bilder).
+    HUR:
+      - Arkivering och rensning av ändringsloggen är en vanlig skrivning (write), så de
+        delar kö och lås med övriga skrivningar och läsrepliken hålls i synk
+      - ANALYZE, VACUUM och checkpoint körs på en egen anslutning i autocommit-läge
+        (VACUUM kan inte köras i en transaktion)
+      - Första körningen slår på auto_vacuum=INCREMENTAL, vilket kräver en full VACUUM en gång
+    """
+    ensure_db()
+    cutoff         = (datetime.now().date() - timedelta(days=ARCHIVE_AFTER_DAYS)).isoformat()
+    changes_cutoff = (datetime.now(timezone.utc) - timedelta(days=CHANGES_KEEP_DAYS)).strftime("%Y-%m-%dT%H:%M:%S")
+
+    archived, pruned = write(lambda con: (archive_bookings(con, cutoff), ChangeRepo.prune(con, changes_cutoff)))
+    if archived:
+        invalidate_public_cache()
+
+    con = sqlite3.connect(tenant().db_path, isolation_level=None)
+    try:
+        con.execute("ANALYZE")
+
+        if con.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            con.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            con.execute("VACUUM")
+
+        freed = con.execute("PRAGMA freelist_count").fetchone()[0]
+        con.execute("PRAGMA incremental_vacuum")
+
+        busy, log_pages, checkpointed = con.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+    finally:
+        con.close()
+
+    sweep = sweep_images()
+
+    return {
+        "archived":        archived,
+        "archive_before":  cutoff,
+        "changes_pruned":  pruned,
+        "images_swept":    len(sweep["removed_files"]),
+        "freed_pages":     freed,
+        "checkpoint":      {"busy": busy, "log": log_pages, "checkpointed": checkpointed},
+    }
+
+
+def _maintenance_worker() -> None:
+    """Bakgrundstråd: kör run_maintenance för varje förening var MAINTENANCE_INTERVAL_HOURS:e timme."""
+    while True:
+        time.sleep(MAINTENANCE_INTERVAL_HOURS * 3600)
+        for t in all_tenants():
+            try:
+                with using_tenant(t):
+                    report = run_maintenance()
+                app.logger.info("Underhåll klart%s: %s", f" ({t.name})" if t.name else "", report)
+            except Exception:
+                app.logger.exception("Underhåll misslyckades%s", f" ({t.name})" if t.name else "")
 
+
+@app.before_request
+def _start_maintenance_schedule():
+    """
+    VARFÖR: Underhållet ska schemaläggas oavsett hur appen startas (dev-server eller WSGI).
+    VAD: Startar underhållstråden vid första requesten.
+    HUR: Efter start är kontrollen en enda None-jämförelse per request.
+    """
+    global _maintenance_thread
+    if _maintenance_thread is not None or MAINTENANCE_INTERVAL_HOURS <= 0:
+        return
+    with _maintenance_lock:
+        if _maintenance_thread is None:
+            _maintenance_thread = threading.Thread(target=_maintenance_worker, name="db-maintenance", daemon=True)
+            _maintenance_thread.start()
+
+
+@app.post("/api/admin/maintenance")
+@admin_required
+def api_admin_maintenance():
+    """
+    VARFÖR: Admin ska kunna köra arkivering och databasvård direkt, utan att vänta på schemat.
+    VAD: Kör run_maintenance och returnerar rapporten.
+    HUR: Kräver admin-session.
+    """
+    try:
+        return jsonify({"ok": True, **run_maintenance()})
+    except Exception:
+        app.logger.exception("Underhåll misslyckades")
+        return jsonify({"ok": False, "error": "Underhållet misslyckades"}), 500
+
+
+# =========================
+# Notiser (outbox)
+# =========================
+#
+# Nya bokningar, meddelanden och medlemsanmälningar ska nå admin utan att admin
+# behöver titta i adminpanelen — men ett långsamt eller nere SMTP-konto får aldrig
+# göra en bokning långsam eller få den att misslyckas. Därför:
+#   - notify(con, ...) skriver notisen i outbox-tabellen i anroparens transaktion
+#     (samma write som bokningen): antingen sparas båda eller ingen
+#   - En bakgrundstråd väcks, väntar NOTIFY_BATCH_SECONDS så att fler notiser hinner
+#     samlas, och levererar sedan allt som är förfallet med en SMTP-anslutning och en
+#     HTTP-anslutning per batch (deliver_notifications)
+#   - Misslyckade leveranser försöks igen med exponentiell backoff; leveransen är
+#     "minst en gång" (webhook-mottagaren kan känna igen omförsök på "id")
+# Med TENANTS_FILE har varje förening sin outbox och sina mottagare (notify_email);
+# webhooken är gemensam och får föreningens namn i "tenant". Tråden håller reda på
+# när varje förening har något förfallet, så att den inte öppnar alla databaser vid
+# varje kontroll.
+# Lokalt kan leveransen provas mot server/smtp_sink.py (SMTP_PORT=1025).
+
+NOTIFY_SUBJECTS = {
+    "booking": "Ny bokning: {title}",
+    "message": "Nytt meddelande från {name}",
+    "member":  "Ny medlem: {name} ({member_number})",
+}
+
+_outbox_wake = threading.Event()
+_outbox_due: dict[Tenant, float] = {}  # förening → tidigaste nästa försök (unix-tid)
+_outbox_thread: threading.Thread | None = None
+_outbox_lock = threading.Lock()
+
+
+def notify_channels() -> list[str]:
+    """Kanalerna som är konfigurerade för aktuell förening ("email", "webhook")."""
+    return [name for name, on in (("email", tenant().notify_email), ("webhook", NOTIFY_WEBHOOK_URL)) if on]
+
+
+def notify(con: sqlite3.Connection, kind: str, data: dict) -> None:
+    """
+    VARFÖR: En notis ska skickas om och endast om det den handlar om blev sparat.
+    VAD: Lägger notisen (kind = nyckel i NOTIFY_SUBJECTS) i outboxen, en rad per kanal.
+    HUR: Körs i anroparens transaktion (op i write) och väcker leveranstråden. Gör
+         ingenting om ingen kanal är konfigurerad.
+    """
+    channels = notify_channels()
+    if channels:
+        OutboxRepo.add(con, kind, data, channels)
+        with _outbox_lock:
+            _outbox_due[tenant()] = 0.0
+        _outbox_wake.set()
+
+
+def notification_email(kind: str, data: dict) -> EmailMessage:
+    """Mejlet för en notis: ämne ur NOTIFY_SUBJECTS, ett fält per rad, svar går till avsändaren."""
+    msg = EmailMessage()
+    msg["Subject"] = NOTIFY_SUBJECTS[kind].format(**data)
+    msg["From"]    = SMTP_FROM
+    msg["To"]      = ", ".join(tenant().notify_email)
+    if data.get("email"):
+        msg["Reply-To"] = data["email"]
+    msg.set_content("\n".join(f"{key}: {value}" for key, value in data.items() if value not in (None, "")))
+    return msg
+
+
+def _deliver_email(rows: list[sqlite3.Row]) -> dict[int, str | None]:
+    """Skickar mejlen över en SMTP-anslutning. Returnerar id → None (skickat) eller felet."""
+    results: dict[int, str | None] = {}
+    try:
+        with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=NOTIFY_TIMEOUT) as smtp:
+            if SMTP_STARTTLS:
+                smtp.starttls()
+            if SMTP_USER:
+                smtp.login(SMTP_USER, SMTP_PASSWORD)
+            for row in rows:
+                try:
+                    smtp.send_message(notification_email(row["kind"], json.loads(row["payload"])))
+                    results[row["id"]] = None
+                except smtplib.SMTPResponseException as e:  # servern avvisade just det här mejlet
+                    results[row["id"]] = f"SMTP {e.smtp_code}: {e.smtp_error.decode(errors='replace')}"
+                except smtplib.SMTPRecipientsRefused as e:
+                    results[row["id"]] = f"SMTP: mottagarna avvisades ({', '.join(e.recipients)})"
+    except (OSError, smtplib.SMTPException) as e:
+        # Anslutningen föll: det som inte hann skickas försöks igen senare
+        for row in rows:
+            results.setdefault(row["id"], f"SMTP: {e}")
+    return results
+
+
+def _deliver_webhook(rows: list[sqlite3.Row]) -> dict[int, str | None]:
+    """POST:ar notiserna över en HTTP-anslutning (keep-alive). Returnerar som _deliver_email."""
+    url        = urlsplit(NOTIFY_WEBHOOK_URL)
+    path       = (url.path or "/") + (f"?{url.query}" if url.query else "")
+    conn_class = http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+    conn       = conn_class(url.netloc, timeout=NOTIFY_TIMEOUT)
+
+    name = tenant().name
+    results: dict[int, str | None] = {}
+    try:
+        for row in rows:
+            event = {
+                "id":         row["id"],
+                "event":      row["kind"],
+                "created_at": row["created_at"],
+                "data":       json.loads(row["payload"]),
+            }
+            if name:
+                event["tenant"] = name
+            body = json.dumps(event, ensure_ascii=False).encode()
+            headers = {"Content-Type": "application/json"}
+            if NOTIFY_WEBHOOK_SECRET:
+                headers["X-Signature"] = hmac.new(NOTIFY_WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+            conn.request("POST", path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()  # måste läsas ut innan anslutningen kan återanvändas
+            results[row["id"]] = None if 200 <= response.status < 300 else f"HTTP {response.status}"
+    except (OSError, http.client.HTTPException) as e:
+        for row in rows:
+            results.setdefault(row["id"], f"HTTP: {e}")
+    finally:
+        conn.close()
+    return results
+
+
+NOTIFY_DELIVERERS = {"email": _deliver_email, "webhook": _deliver_webhook}
+
+
+def deliver_notifications() -> dict:
+    """
+    VARFÖR: Många notiser på kort tid (en rusning av bokningar) ska dela anslutning
+            istället för att logga in på SMTP-servern en gång per mejl.
+    VAD: Levererar upp till NOTIFY_BATCH_MAX förfallna notiser. Returnerar
+         {"sent": n, "failed": n}.
+    HUR: Raderna grupperas per kanal och skickas med en anslutning per kanal. Levererade
+         rader tas bort; misslyckade får nästa försök efter NOTIFY_RETRY_SECONDS · 2^försök
+         (högst NOTIFY_RETRY_MAX_SECONDS) och status 'failed' efter NOTIFY_MAX_ATTEMPTS.
+         Resultatet sparas med en enda write.
+    """
+    now = time.time()
     with db() as con:
-        result = con.execute("DELETE FROM page_sections WHERE id=?", (section_id,))
-        con.commit()
-        if result.rowcount == 0:
-            return jsonify({"ok": False, "error": "Sektion hittades inte"}), 404
+        rows = OutboxRepo.due(con, now, NOTIFY_BATCH_MAX)
+    if not rows:
+        return {"sent": 0, "failed": 0}
+
+    by_channel: dict[str, list[sqlite3.Row]] = {}
+    for row in rows:
+        by_channel.setdefault(row["channel"], []).append(row)
+
+    results: dict[int, str | None] = {}
+    for channel, channel_rows in by_channel.items():
+        if channel not in notify_channels():
+            results.update((row["id"], f"Kanalen {channel} är inte konfigurerad") for row in channel_rows)
+            continue
+        results.update(NOTIFY_DELIVERERS[channel](channel_rows))
+
+    attempts = {row["id"]: row["attempts"] for row in rows}
+    sent     = [row_id for row_id, error in results.items() if error is None]
+    failed   = [
+        (row_id, now + min(NOTIFY_RETRY_MAX_SECONDS, NOTIFY_RETRY_SECONDS * 2 ** attempts[row_id]), error)
+        for row_id, error in results.items() if error is not None
+    ]
+    write(lambda con: OutboxRepo.record(con, sent, failed))
+    for row_id, _, error in failed:
+        app.logger.warning("Notis %s kunde inte levereras: %s", row_id, error)
+    return {"sent": len(sent), "failed": len(failed)}
+
+
+def _outbox_worker() -> None:
+    """
+    Bakgrundstråd: levererar notiser när notify väcker den, och var NOTIFY_POLL_SECONDS:e
+    för föreningar vars omförsök har förfallit (_outbox_due).
+    """
+    with _outbox_lock:
+        for t in all_tenants():
+            _outbox_due.setdefault(t, 0.0)  # notiser som skrevs innan omstarten
+    while True:
+        if _outbox_wake.wait(NOTIFY_POLL_SECONDS):
+            time.sleep(NOTIFY_BATCH_SECONDS)  # låt fler notiser (och anroparens commit) hinna komma
+            _outbox_wake.clear()
+        now = time.time()
+        with _outbox_lock:
+            due = [t for t, at in _outbox_due.items() if at <= now]
+            for t in due:
+                del _outbox_due[t]
+
+        for t in due:
+            try:
+                with using_tenant(t):
+                    while sum(deliver_notifications().values()) >= NOTIFY_BATCH_MAX:
+                        pass  # fler förfallna än en batch: fortsätt direkt
+                    with db() as con:
+                        next_attempt = OutboxRepo.next_attempt(con)
+            except Exception:
+                app.logger.exception("Leverans av notiser misslyckades")
+                next_attempt = now + NOTIFY_POLL_SECONDS
+            if next_attempt is not None:
+                with _outbox_lock:  # en notis som kom under leveransen har redan satt 0
+                    _outbox_due[t] = min(_outbox_due.get(t, next_attempt), next_attempt)
+
+
+@app.before_request
+def _start_outbox_worker():
+    """
+    VARFÖR: Notiser som skrevs innan en omstart ska levereras även om ingen ny notis kommer.
+    VAD: Startar leveranstråden vid första requesten, om någon kanal är konfigurerad.
+    HUR: Samma mönster som _start_maintenance_schedule.
+    """
+    global _outbox_thread
+    if _outbox_thread is not None or not (NOTIFY_WEBHOOK_URL or any(t.notify_email for t in all_tenants())):
+        return
+    with _outbox_lock:
+        if _outbox_thread is None:
+            _outbox_thread = threading.Thread(target=_outbox_worker, name="notify-outbox", daemon=True)
+            _outbox_thread.start()
 
-    return jsonify({"ok": True})
+
+# =========================
+# Säkerhetskopior
+# =========================
+
+# Endast en backup åt gången (admin-knapp och CLI kan annars krocka)
+_backup_lock = threading.Lock()
+
+
+def verify_backup(db_file: Path) -> str:
+    """
+    VARFÖR: En backup är bara värd något om den går att återställa.
+    VAD: Kör PRAGMA integrity_check på en kopierad databasfil och returnerar resultatet
+         ("ok" om kopian är hel).
+    HUR: Öppnar filen skrivskyddat (mode=ro) så att verifieringen aldrig ändrar kopian.
+    """
+    con = sqlite3.connect(f"{db_file.as_uri()}?mode=ro", uri=True)
+    try:
+        rows = con.execute("PRAGMA integrity_check").fetchall()
+    finally:
+        con.close()
+    return "\n".join(r[0] for r in rows)
+
+
+def _backup_images(dest: Path, previous: Path | None) -> dict:
+    """
+    VARFÖR: Bilder ändras sällan — varje ögonblicksbild ska inte kopiera om allt.
+    VAD: Speglar data/images till dest. Filer som är oförändrade sedan förra
+         ögonblicksbilden hårdlänkas istället för att kopieras.
+    HUR: Oförändrad = samma storlek och mtime som i previous. Om hårdlänkar inte
+         stöds (t.ex. annat filsystem) kopieras filen.
+    """
+    copied = linked = 0
+    images_dir = tenant().images_dir
+    if not images_dir.is_dir():
+        return {"copied": copied, "linked": linked}
+
+    for src in images_dir.rglob("*"):
+        if not src.is_file():
+            continue
+        rel    = src.relative_to(images_dir)
+        target = dest / rel
+        target.parent.mkdir(parents=True, exist_ok=True)
+
+        st = src.stat()
+        old = previous / rel if previous else None
+        if old is not None and old.is_file():
+            ost = old.stat()
+            if ost.st_size == st.st_size and int(ost.st_mtime) == int(st.st_mtime):
+                try:
+                    os.link(old, target)
+                    linked += 1
+                    continue
+                except OSError:
+                    pass
+        shutil.copy2(src, target)
+        copied += 1
+
+    return {"copied": copied, "linked": linked}
+
+
+def list_backups() -> list[Path]:
+    """Färdiga ögonblicksbilder i föreningens backupmapp, äldst först (katalognamnet är en tidsstämpel)."""
+    backup_dir = tenant().backup_dir
+    if not backup_dir.is_dir():
+        return []
+    return sorted(p for p in backup_dir.iterdir() if p.is_dir() and not p.name.endswith(".partial"))
+
+
+def run_backup() -> dict:
+    """
+    VARFÖR: Att kopiera en databasfil som används riskerar att fånga den mitt i en skrivning.
+    VAD: Skapar en ny ögonblicksbild <tidsstämpel>/ i föreningens backupmapp (BACKUP_DIR,
+         med TENANTS_FILE BACKUP_DIR/<förening>) med bookings.sqlite,
+         images/ och manifest.json, verifierar den och roterar bort de äldsta.
+    HUR:
+      - sqlite3 Connection.backup kopierar BACKUP_PAGES_PER_STEP sidor per steg och
+        släpper låset mellan stegen, så skrivare bara väntar ett steg i taget
+      - Kopian kontrolleras med PRAGMA integrity_check innan den räknas som klar
+      - Allt skrivs till <tidsstämpel>.partial och byter namn först när allt lyckats
+      - Högst BACKUP_KEEP ögonblicksbilder sparas
+    """
+    if not _backup_lock.acquire(blocking=False):
+        raise RuntimeError("En säkerhetskopiering pågår redan")
+    try:
+        ensure_db()
+        t = tenant()
+        t.backup_dir.mkdir(parents=True, exist_ok=True)
+
+        stamp    = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        partial  = t.backup_dir / f"{stamp}.partial"
+        final    = t.backup_dir / stamp
+        previous = (list_backups() or [None])[-1]
+        shutil.rmtree(partial, ignore_errors=True)
+        partial.mkdir()
+
+        try:
+            db_copy = partial / t.db_path.name
+            src = sqlite3.connect(t.db_path)
+            dst = sqlite3.connect(db_copy)
+            try:
+                src.backup(dst, pages=BACKUP_PAGES_PER_STEP, sleep=0.01)
+                # Kopian ska vara en fristående fil utan -wal/-shm bredvid sig
+                dst.execute("PRAGMA journal_mode=DELETE")
+            finally:
+                dst.close()
+                src.close()
+
+            integrity = verify_backup(db_copy)
+            if integrity != "ok":
+                raise RuntimeError(f"Integritetskontroll misslyckades: {integrity}")
+
+            images = _backup_images(partial / "images", previous / "images" if previous else None)
+            manifest = {
+                "created_at": utc_now_iso(),
+                "db_bytes":   db_copy.stat().st_size,
+                "integrity":  integrity,
+                "images":     images,
+            }
+            (partial / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+            os.replace(partial, final)
+        except Exception:
+            shutil.rmtree(partial, ignore_errors=True)
+            raise
+
+        snapshots = list_backups()
+        for old in snapshots[:max(len(snapshots) - BACKUP_KEEP, 0)]:
+            shutil.rmtree(old, ignore_errors=True)
+
+        return {"name": stamp, **manifest}
+    finally:
+        _backup_lock.release()
+
+
+@app.post("/api/admin/backup")
+@admin_required
+def api_admin_backup():
+    """
+    VARFÖR: Admin ska kunna ta en säkerhetskopia direkt, t.ex. innan större ändringar.
+    VAD: Kör run_backup och returnerar manifestet för den nya ögonblicksbilden.
+    HUR: Kräver admin-session. 409 om en backup redan pågår.
+    """
+    try:
+        return jsonify({"ok": True, **run_backup()})
+    except RuntimeError as e:
+        return jsonify({"ok": False, "error": str(e)}), 409
+    except Exception:
+        app.logger.exception("Säkerhetskopiering misslyckades")
+        return jsonify({"ok": False, "error": "Säkerhetskopieringen misslyckades"}), 500
+
+
+@app.get("/api/admin/backups")
+@admin_required
+def api_admin_backups():
+    """
+    VARFÖR: Admin ska kunna se vilka säkerhetskopior som finns.
+    VAD: Returnerar namn och manifest för varje ögonblicksbild, nyaste först.
+    HUR: Kräver admin-session. Läser manifest.json i varje katalog.
+    """
+    items = []
+    for snap in reversed(list_backups()):
+        manifest_file = snap / "manifest.json"
+        manifest = json.loads(manifest_file.read_text(encoding="utf-8")) if manifest_file.is_file() else {}
+        items.append({"name": snap.name, **manifest})
+    return jsonify({"ok": True, "items": items})
+
+
+# =========================
+# Bilder: städning och diskanvändning
+# =========================
+
+def image_quota_exceeded(incoming: int) -> bool:
+    """True om IMAGES_QUOTA_BYTES är satt och en uppladdning på incoming byte skulle gå över."""
+    if IMAGES_QUOTA_BYTES <= 0:
+        return False
+    with db() as con:
+        used = con.execute("SELECT COALESCE(SUM(bytes), 0) FROM images").fetchone()[0]
+    return used + incoming > IMAGES_QUOTA_BYTES
+
+
+def _scan_images(referenced: set[str]):
+    """
+    Går igenom filerna i bildkategorierna. Ger (kategori, relativ sökväg, Path, stat, föräldralös).
+    En fil i events/board/sponsors är föräldralös om ingen rad pekar på den; i galleriet
+    om den inte är en tillåten bildtyp (t.ex. rester av en avbruten uppladdning).
+    """
+    t = tenant()
+    for category, table in IMAGE_CATEGORIES.items():
+        root = t.images_dir / category
+        if not root.is_dir():
+            continue
+        for path in root.rglob("*"):
+            if not path.is_file():
+                continue
+            rel = path.relative_to(t.root).as_posix()
+            orphan = rel not in referenced if table else not allowed_file(path.name)
+            yield category, rel, path, path.stat(), orphan
+
+
+def _referenced_images(con: sqlite3.Connection) -> set[str]:
+    """Alla image_path som någon rad pekar på."""
+    referenced: set[str] = set()
+    for table in filter(None, IMAGE_CATEGORIES.values()):
+        referenced.update(r[0] for r in con.execute(f"SELECT image_path FROM {table} WHERE image_path IS NOT NULL"))
+    return referenced
+
+
+def sweep_images(limit: int = SWEEP_BATCH_SIZE, dry_run: bool = False) -> dict:
+    """
+    VARFÖR: När ett event, en styrelsemedlem eller sponsor tas bort blir mappen kvar, och
+            ersatta eller avbrutna uppladdningar kan lämna filer som ingen rad pekar på.
+    VAD: Stämmer av image_path-kolumnerna och galleriet mot data/images:
+      - föräldralösa filer tas bort, högst `limit` per körning ("remaining" = kvar till nästa)
+      - tomma mappar under kategorierna tas bort
+      - image_path som pekar på en fil som saknas nollställs
+      - metadata i images för filer som saknas tas bort
+    HUR: Läser först vad som ska städas, ändrar raderna i en skrivning (write) och tar
+         bort filerna efteråt. Filer och mappar yngre än SWEEP_MIN_AGE_SECONDS rörs inte,
+         så att en uppladdning som precis sparat sin fil men ännu inte committat sin rad
+         inte städas bort. dry_run=True rapporterar vad som skulle göras utan att ändra något.
+    """
+    cutoff = time.time() - SWEEP_MIN_AGE_SECONDS
+    t = tenant()
+
+    with db() as con:
+        referenced = _referenced_images(con)
+        missing = [
+            (table, row["id"], row["image_path"])
+            for table in filter(None, IMAGE_CATEGORIES.values())
+            for row in con.execute(f"SELECT id, image_path FROM {table} WHERE image_path IS NOT NULL")
+            if not (t.root / row["image_path"]).is_file()
+        ]
+        stale = [r[0] for r in con.execute("SELECT path FROM images") if not (t.root / r[0]).is_file()]
+
+    orphans = [
+        (rel, path, st.st_size)
+        for _, rel, path, st, orphan in _scan_images(referenced)
+        if orphan and st.st_mtime < cutoff
+    ]
+    batch = orphans[:limit]
+
+    def sweep(con):
+        # Läget kan ha ändrats sedan läsningen: bara referenser som fortfarande pekar på
+        # en saknad fil nollställs, och bara filer som fortfarande är föräldralösa tas bort
+        cleared = 0
+        for table, row_id, image_path in missing:
+            if not (t.root / image_path).is_file():
+                cleared += con.execute(
+                    f"UPDATE {table} SET image_path=NULL WHERE id=? AND image_path=?", (row_id, image_path)
+                ).rowcount
+        now_referenced = _referenced_images(con)
+        doomed = [(rel, path, size) for rel, path, size in batch if rel not in now_referenced]
+        for rel, _, _ in doomed:
+            ImageMetaRepo.forget(con, rel)
+        for rel in stale:
+            ImageMetaRepo.forget(con, rel)
+        return cleared, doomed
+
+    if dry_run:
+        cleared = len(missing)
+    else:
+        # Filerna tas bort först när raderna är committade; avbryts körningen däremellan
+        # blir filen bara föräldralös igen och tas vid nästa körning
+        cleared, batch = write(sweep)
+        for _, path, _ in batch:
+            path.unlink(missing_ok=True)
+
+    # Tomma mappar, djupast först (kategorimapparna själva behålls)
+    removed_dirs = 0
+    for category in IMAGE_CATEGORIES:
+        root = t.images_dir / category
+        if not root.is_dir():
+            continue
+        for d in sorted((p for p in root.rglob("*") if p.is_dir()), key=lambda p: len(p.parts), reverse=True):
+            if not any(d.iterdir()) and d.stat().st_mtime < cutoff:
+                removed_dirs += 1
+                if not dry_run:
+                    d.rmdir()
+
+    if cleared and not dry_run:
+        invalidate_public_cache()
+
+    return {
+        "dry_run":            dry_run,
+        "removed_files":      [rel for rel, _, _ in batch],
+        "freed_bytes":        sum(size for _, _, size in batch),
+        "remaining":          max(len(orphans) - limit, 0),
+        "removed_dirs":       removed_dirs,
+        "cleared_references": cleared,
+        "stale_metadata":     len(stale),
+    }
+
+
+def image_disk_usage() -> dict:
+    """
+    VARFÖR: Lagringen ska inte växa obemärkt — admin ska se var utrymmet går åt.
+    VAD: Antal filer och byte per bildkategori, varav föräldralösa (som sweep_images tar bort),
+         samt totalen och eventuellt tak (IMAGES_QUOTA_BYTES).
+    HUR: Läser storlekarna från filsystemet, så att även filer utan metadata räknas.
+    """
+    with db() as con:
+        referenced = _referenced_images(con)
+
+    categories = {c: {"files": 0, "bytes": 0, "orphan_files": 0, "orphan_bytes": 0} for c in IMAGE_CATEGORIES}
+    for category, _, _, st, orphan in _scan_images(referenced):
+        usage = categories[category]
+        usage["files"] += 1
+        usage["bytes"] += st.st_size
+        if orphan:
+            usage["orphan_files"] += 1
+            usage["orphan_bytes"] += st.st_size
+
+    return {
+        "categories":  categories,
+        "total_bytes": sum(u["bytes"] for u in categories.values()),
+        "quota_bytes": IMAGES_QUOTA_BYTES or None,
+    }
+
+
+@app.post("/api/admin/images/sweep")
+@admin_required
+def api_admin_sweep_images():
+    """
+    VARFÖR: Admin ska kunna städa bort föräldralösa bilder direkt, utan att vänta på underhållet.
+    VAD: Kör sweep_images och returnerar rapporten.
+    HUR: Kräver admin-session. ?dry_run=1 visar vad som skulle tas bort; ?limit= anger batchstorlek.
+    """
+    limit   = max(request.args.get("limit", SWEEP_BATCH_SIZE, type=int), 1)
+    dry_run = request.args.get("dry_run") == "1"
+    return jsonify({"ok": True, **sweep_images(limit, dry_run)})
+
+
+@app.get("/api/admin/images/usage")
+@admin_required
+def api_admin_image_usage():
+    """
+    VARFÖR: Admin ska kunna följa hur mycket utrymme bilderna tar.
+    VAD: Returnerar diskanvändning per bildkategori (se image_disk_usage).
+    HUR: Kräver admin-session.
+    """
+    return jsonify({"ok": True, **image_disk_usage()})
+
+
+# =========================
+# Server-renderade sidor
+# =========================
+
+# Svenska månadsnamn för datumformatet "15 mars 2026" (samma som events.js visar)
+SV_MONTHS = (
+    "januari", "februari", "mars", "april", "maj", "juni",
+    "juli", "augusti", "september", "oktober", "november", "december",
+)
+
+# Gradient-placeholders för event utan bild (samma som events.js)
+EVENT_GRADIENTS = (
+    "linear-gradient(135deg, rgba(110,231,183,.25), rgba(147,197,253,.15))",
+    "linear-gradient(135deg, rgba(147,197,253,.25), rgba(251,191,36,.10))",
+    "linear-gradient(135deg, rgba(251,191,36,.15), rgba(110,231,183,.20))",
+)
+
+
+def format_date_sv(date_str: str | None) -> str | None:
+    """Omvandlar "2026-03-15" till "15 mars 2026". Ogiltiga datum returneras oförändrade."""
+    if not date_str:
+        return None
+    try:
+        d = datetime.strptime(date_str, "%Y-%m-%d").date()
+    except ValueError:
+        return date_str
+    return f"{d.day} {SV_MONTHS[d.month - 1]} {d.year}"
+
+
+def render_events_html(events: list[dict]) -> str:
+    """Bygger event-korten för #eventsGrid (speglar renderEvents i events.js)."""
+    cards = []
+    for e in events:
+        if e["image_path"]:
+            img = f'<img class="event-img" src="/{escape(e["image_path"])}" alt="{escape(e["title"])}" loading="lazy" />'
+        else:
+            gradient = EVENT_GRADIENTS[(e["id"] - 1) % len(EVENT_GRADIENTS)]
+            img = f'<div class="event-img event-img-placeholder" style="background:{gradient}"></div>'
+        date = f'<p class="event-date">{escape(format_date_sv(e["date"]))}</p>' if e["date"] else ""
+        desc = f'<p class="event-desc">{escape(e["description"])}</p>' if e["description"] else ""
+        cards.append(
+            f'<article class="card event-card">{img}<div class="event-body">'
+            f'{date}<h2 class="event-title">{escape(e["title"])}</h2>{desc}</div></article>'
+        )
+    return "\n".join(cards)
+
+
+def render_board_html(members: list[dict]) -> str:
+    """Bygger styrelsekorten för #boardGrid (speglar board.js)."""
+    cards = []
+    for m in members:
+        if m["image_path"]:
+            img = f'<img src="/{escape(m["image_path"])}" alt="{escape(m["name"])}" class="board-photo" />'
+        else:
+            img = '<div class="board-photo-placeholder"></div>'
+        contact = f'<p class="muted small">{escape(m["contact"])}</p>' if m["contact"] else ""
+        cards.append(
+            f'<article class="card board-card">{img}<div class="board-info">'
+            f'<h2>{escape(m["role"])}</h2><p><strong>{escape(m["name"])}</strong></p>{contact}</div></article>'
+        )
+    return "\n".join(cards)
+
+
+def render_sponsors_html(sponsors: list[dict]) -> str:
+    """Bygger sponsorkorten för #sponsorsGrid (speglar renderSponsors i sponsorer.js)."""
+    cards = []
+    for sp in sponsors:
+        if sp["image_path"]:
+            inner = f'<img class="sponsor-logo" src="/{escape(sp["image_path"])}" alt="{escape(sp["name"])}" loading="lazy" />'
+        else:
+            inner = '<div class="sponsor-logo-placeholder"></div>'
+        desc = f'<p class="muted small">{escape(sp["description"])}</p>' if sp["description"] else ""
+        link = (
+            f'<a href="{escape(sp["url"])}" target="_blank" rel="noopener" class="btn">Besök webbplats</a>'
+            if sp["url"] else ""
+        )
+        cards.append(
+            f'<article class="card sponsor-card"><div class="sponsor-img-wrap">{inner}</div>'
+            f'<div class="sponsor-body"><h2>{escape(sp["name"])}</h2>{desc}{link}</div></article>'
+        )
+    return "\n".join(cards)
+
+
+def render_info_html(sections: list[dict]) -> str:
+    """
+    Bygger informationskorten för #infoGrid (speglar information.js).
+    Innehållet renderas som HTML — admin ansvarar för innehållet, precis som i JS-versionen.
+    """
+    return "\n".join(
+        f'<article class="card"><h2>{escape(sec["title"])}</h2><div class="info-content">{sec["content"]}</div></article>'
+        for sec in sections
+    )
+
+
+# Sidor som renderas på servern: filnamn → (id-prefix i HTML, datakälla, renderare).
+# Prefixet pekar ut elementen <prefix>Loading, <prefix>Empty och <prefix>Grid i sidan.
+SSR_PAGES: dict[str, tuple[str, object, object]] = {
+    "event.html":       ("events",   load_events,                                 render_events_html),
+    "styrelsen.html":   ("board",    load_board,                                  render_board_html),
+    "sponsorer.html":   ("sponsors", load_sponsors,                               render_sponsors_html),
+    "information.html": ("info",     lambda: load_page_sections("information"),   render_info_html),
+}
+
+
+def render_page(filename: str) -> str:
+    """
+    VARFÖR: Innehållet ska synas direkt i HTML:en — första renderingen ska inte vänta
+            på ett extra API-anrop från JavaScript.
+    VAD: Läser sidans HTML-skal och bäddar in färdigrenderade kort i <prefix>Grid.
+         Skelett-loadern döljs och tomt-state visas om listan är tom.
+    HUR: Gridet märks med data-ssr så att sidans JS vet att innehållet redan finns.
+         Hela den renderade sidan cachas och invalideras med övriga publika frågor.
+    """
+    prefix, load, render = SSR_PAGES[filename]
+
+    def compute():
+        html  = (PROJECT_ROOT / filename).read_text(encoding="utf-8")
+        items = load()
+
+        html = html.replace(f'<div id="{prefix}Loading"', f'<div id="{prefix}Loading" style="display:none;"', 1)
+        if not items:
+            html = re.sub(rf'(<p id="{prefix}Empty"[^>]*?) style="display:none;"', r"\1", html, count=1)
+
+        body = render(items)
+        return re.sub(
+            rf'(<div id="{prefix}Grid"[^>]*)>\s*</div>',
+            lambda m: f"{m.group(1)} data-ssr>{body}</div>",
+            html,
+            count=1,
+        )
+
+    return cached(f"page:{filename}", compute)
+
+
+@app.get("/event.html")
+@app.get("/styrelsen.html")
+@app.get("/sponsorer.html")
+@app.get("/information.html")
+def ssr_page():
+    """
+    VARFÖR: Event-, styrelse-, sponsor- och informationssidan ska visa innehåll direkt.
+    VAD: Returnerar den server-renderade versionen av sidan.
+    HUR: Faller tillbaka på det statiska HTML-skalet om renderingen misslyckas —
+         sidans JS hämtar då datan som vanligt.
+    """
+    filename = request.path.lstrip("/")
+    try:
+        return render_page(filename), 200, {"Content-Type": "text/html; charset=utf-8"}
+    except Exception:
+        app.logger.exception("Server-rendering av %s misslyckades", filename)
+        return send_project_file(filename)
+
+
+# =========================
+# Statisk export
+# =========================
+
+# Väcker exporttråden; flera skrivningar i snabb följd ger bara en export
+_export_wakeup = threading.Event()
+_export_thread: threading.Thread | None = None
+_export_thread_lock = threading.Lock()
+
+
+def public_api_paths() -> list[str]:
+    """
+    VARFÖR: Exporten måste veta vilka publika API-svar som ska skrivas till disk.
+    VAD: Returnerar alla publika GET-sökvägar, inklusive en per sida i page_sections.
+         Bokningarna exporteras separat (se export_snapshot).
+    HUR: Fasta listendpoints + de sidor som har sektioner (PageSectionRepo.pages).
+    """
+    with read_db() as con:
+        pages = PageSectionRepo.pages(con)
+    paths = ["/api/resources", "/api/events", "/api/gallery", "/api/board", "/api/sponsors"]
+    paths += [f"/api/page-sections/{page}" for page in pages]
+    return paths
+
+
+def _write_atomic(target: Path, data: bytes) -> None:
+    """
+    VARFÖR: En filserver får aldrig råka serva en halvskriven fil.
+    VAD: Skriver data till en temporär fil bredvid målet och byter sedan namn.
+    HUR: os.replace är atomiskt inom samma filsystem.
+    """
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f".{target.name}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, target)
+
+
+def _mirror_file(src: Path, dest: Path) -> None:
+    """Kopierar src till dest om filen saknas eller storlek/mtime skiljer sig."""
+    st = src.stat()
+    try:
+        dst = dest.stat()
+        if dst.st_size == st.st_size and int(dst.st_mtime) == int(st.st_mtime):
+            return
+    except FileNotFoundError:
+        pass
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copy2(src, dest)
+
+
+def export_snapshot(out_dir: Path) -> None:
+    """
+    VARFÖR: Publika sidor ändras några gånger i månaden — de ska kunna servas statiskt.
+    VAD: Skriver varje publikt API-svar som <out_dir>/api/....json och speglar
+         HTML-sidor, assets, img och uppladdade bilder till out_dir.
+    HUR:
+      - JSON byggs via Flasks testklient så att innehållet är exakt samma som API:et ger
+      - Bokningarna skrivs som en fil per resurs, api/bookings/<slug>.json (och
+        api/bookings.json för DEFAULT_RESOURCE), utan holds: de gäller en besökare i
+        taget och ändras oftare än exporten körs. Kalendern hämtar sökvägsformen, så
+        frågesträngen (?hold=) ignoreras av filservern
+      - Med EXPORT_HTML=1 skrivs server-renderade versioner av SSR_PAGES
+      - Bara ändrade filer kopieras; filer som försvunnit (t.ex. raderade galleribilder)
+        tas bort ur spegeln
+      - Filservern mappar /api/<x> till <x>.json, t.ex. i nginx:
+            location /api/ { default_type application/json; try_files $uri.json @flask; }
+    """
+    client = app.test_client()
+    for path in public_api_paths():
+        res = client.get(path)
+        if res.status_code == 200:
+            _write_atomic(out_dir / f"{path.lstrip('/')}.json", res.get_data())
+
+    with read_db() as con:
+        calendars = {r.slug: BookingRepo.calendar(con, r.slug) for r in ResourceRepo.list(con)}
+    for slug, rows in calendars.items():
+        body = json_rows_response("events", rows).get_data()
+        _write_atomic(out_dir / "api" / "bookings" / f"{slug}.json", body)
+        if slug == DEFAULT_RESOURCE:
+            _write_atomic(out_dir / "api" / "bookings.json", body)
+
+    for html in PROJECT_ROOT.glob("*.html"):
+        if EXPORT_HTML and html.name in SSR_PAGES:
+            res = client.get(f"/{html.name}")
+            if res.status_code == 200:
+                _write_atomic(out_dir / html.name, res.get_data())
+                continue
+        _mirror_file(html, out_dir / html.name)
+
+    for root in EXPORT_STATIC_ROOTS:
+        src_root = PROJECT_ROOT / root
+        dest_root = out_dir / root
+        wanted = set()
+        if src_root.is_dir():
+            for src in src_root.rglob("*"):
+                if src.is_file():
+                    rel = src.relative_to(src_root)
+                    wanted.add(rel)
+                    _mirror_file(src, dest_root / rel)
+        if dest_root.is_dir():
+            for dest in dest_root.rglob("*"):
+                if dest.is_file() and dest.relative_to(dest_root) not in wanted:
+                    dest.unlink()
+
+
+def _export_worker() -> None:
+    """Bakgrundstråd: väntar på signal och kör en export per signal-skur."""
+    while True:
+        _export_wakeup.wait()
+        _export_wakeup.clear()
+        try:
+            export_snapshot(EXPORT_DIR)
+        except Exception:
+            app.logger.exception("Statisk export misslyckades")
+
+
+def schedule_export() -> None:
+    """
+    VARFÖR: Exporten ska inte göra admin-anrop eller bokningar långsammare.
+    VAD: Signalerar exporttråden (startas vid första anropet).
+    HUR: threading.Event — flera signaler innan tråden hunnit köra slås ihop till en export.
+    """
+    global _export_thread
+    if EXPORT_DIR is None:
+        return
+    with _export_thread_lock:
+        if _export_thread is None:
+            _export_thread = threading.Thread(target=_export_worker, name="static-export", daemon=True)
+            _export_thread.start()
+    _export_wakeup.set()
+
+
+def _export_after_write(response) -> None:
+    """
+    VARFÖR: Exporten ska uppdateras när en skrivning har committats.
+    VAD: Schemalägger en export efter lyckade admin-skrivningar och bokningar.
+    HUR: Endast POST/PUT/DELETE under /api/admin/ samt /api/book med status < 400.
+         Anropas av _invalidate_after_write när cachen redan är invaliderad.
+    """
+    if (
+        EXPORT_DIR is not None
+        and request.method in ("POST", "PUT", "DELETE")
+        and response.status_code < 400
+        and (request.path.startswith("/api/admin/") or request.path == "/api/book")
+    ):
+        schedule_export()
 
 
 # =========================
 # Statiska filer (sist i filen)
 # =========================
+#
+# Vilka filer som finns avgörs av en tabell i minnet, inte av filsystemet: en okänd
+# sökväg (skannrar som letar efter /wp-login.php, /.env …) får 404 utan en enda
+# stat, och bara tillåtna rötter kan någonsin nås (se STATIC_ROOTS).
+# Sidorna och assets delas av alla föreningar; uppladdningarna ("data/images/…") hör
+# till föreningen (Tenant.upload_routes, relativt Tenant.root) och läses in första
+# gången en av dem efterfrågas.
+
+_static_routes: dict[str, Path] = {}   # "assets/css/style.css" → absolut sökväg
+_static_scanned = 0.0
+_routes_lock = threading.Lock()
+
+
+def build_static_routes() -> None:
+    """
+    VARFÖR: Filsystemet ska inte frågas om varje sökväg en klient hittar på.
+    VAD: Bygger tabellen över servbara filer: *.html i projektroten och alla filer
+         under STATIC_ROOTS (dolda filer hoppas över).
+    HUR: Körs när modulen laddas. Nya filer i assets/img kräver omstart — i
+         debugläge byggs tabellen om vid en miss istället, högst var
+         STATIC_RESCAN_SECONDS:e sekund (så att 404-sonder inte går igenom trädet varje gång).
+    """
+    global _static_routes, _static_scanned
+    routes = {html.name: html for html in PROJECT_ROOT.glob("*.html")}
+    for root in STATIC_ROOTS:
+        for path in (PROJECT_ROOT / root).rglob("*"):
+            rel = path.relative_to(PROJECT_ROOT)
+            if path.is_file() and not any(part.startswith(".") for part in rel.parts):
+                routes[rel.as_posix()] = path
+    _static_routes  = routes
+    _static_scanned = time.monotonic()
+
+
+def _scan_uploads(t: Tenant) -> None:
+    """Läser in alla bildfiler under UPLOADS_PREFIX i föreningens uppladdningstabell."""
+    root = t.root / UPLOADS_PREFIX
+    routes = {
+        path.relative_to(t.root).as_posix()
+        for path in (root.rglob("*") if root.is_dir() else ())
+        if path.is_file() and path.suffix.lower().lstrip(".") in ALLOWED_EXTENSIONS
+    }
+    with _routes_lock:
+        t.upload_routes   = routes
+        t.uploads_scanned = time.monotonic()
+
+
+def register_upload(path: Path) -> None:
+    """Gör en nyss sparad uppladdning servbar direkt, utan att vänta på en omskanning."""
+    t = tenant()
+    with _routes_lock:
+        t.upload_routes.add(path.relative_to(t.root).as_posix())
+
+
+def static_route(filename: str) -> Path | None:
+    """Den absoluta sökvägen för en servbar fil, eller None (→ 404)."""
+    path = _static_routes.get(filename)
+    if path is not None:
+        return path
+
+    if filename.startswith(UPLOADS_PREFIX + "/"):
+        t = tenant()
+        if filename not in t.upload_routes and time.monotonic() - t.uploads_scanned > UPLOADS_RESCAN_SECONDS:
+            _scan_uploads(t)
+        return t.root / filename if filename in t.upload_routes else None
+
+    if app.debug and time.monotonic() - _static_scanned > STATIC_RESCAN_SECONDS:
+        build_static_routes()
+        return _static_routes.get(filename)
+    return None
+
+
+def send_project_file(filename: str):
+    """
+    VARFÖR: Stora bilder ska inte binda upp en Python-worker under hela överföringen
+            när en proxy (nginx/Apache) kan skicka bytes mycket billigare.
+    VAD: Slår upp sökvägen i tabellen över servbara filer och returnerar filen —
+         antingen som en avlastningsheader (FILE_OFFLOAD) eller med själva innehållet.
+    HUR:
+      - static_route avgör om filen får servas; annars 404 direkt ur minnet
+      - "x-accel": tomt svar med X-Accel-Redirect, nginx gör själva överföringen;
+        en förenings uppladdningar får föreningens namn i sökvägen (se FILE_OFFLOAD)
+      - annars send_file, som hanterar Range (206), ETag/If-None-Match och
+        If-Modified-Since (304) — eller sätter X-Sendfile om USE_X_SENDFILE är på.
+        En fil i tabellen som har tagits bort ger också 404.
+    """
+    path = static_route(filename)
+    if path is None:
+        abort(404)
+
+    if FILE_OFFLOAD == "x-accel":
+        response = app.response_class(mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream")
+        t = tenant()
+        if t.name and path.is_relative_to(t.root):
+            target = f"{t.name}/{path.relative_to(t.root).as_posix()}"
+        else:
+            target = path.relative_to(PROJECT_ROOT).as_posix()
+        response.headers["X-Accel-Redirect"] = FILE_OFFLOAD_PREFIX + quote(target)
+        return response
+
+    try:
+        return send_file(path)
+    except FileNotFoundError:
+        abort(404)
+
 
 @app.get("/")
 def home():
     """Serverar startsidan (index.html) från projektroten."""
-    return send_from_directory("..", "index.html")
+    return send_project_file("index.html")
 
 
 @app.get("/<path:filename>")
 def static_files(filename: str):
     """
     VARFÖR: HTML-sidorna importerar CSS, JS och bilder med relativa sökvägar.
-    VAD: Serverar alla statiska filer från projektroten, inklusive uppladdade bilder.
-    HUR: Flask letar efter filen under PROJECT_ROOT (..) och returnerar den direkt.
-         Uppladdade bilder (t.ex. data/images/gallery/foto.jpg) serveras automatiskt
-         eftersom de ligger inuti projektroten.
+    VAD: Serverar de statiska filerna i tabellen (HTML, assets, img) och uppladdade
+         bilder under data/images.
+    HUR: send_project_file slår upp filen i tabellen och returnerar den (eller lämnar
+         över överföringen till proxyn, se FILE_OFFLOAD). Allt annat är 404.
     """
-    return send_from_directory("..", filename)
+    return send_project_file(filename)
+
+
+build_static_routes()
+
+
+def for_each_tenant(run) -> None:
+    """Kör run() för varje förening (CLI-kommandona nedan; utan TENANTS_FILE en gång)."""
+    for t in all_tenants():
+        with using_tenant(t):
+            if t.name:
+                print(f"[{t.name}]")
+            run()
 
 
 if __name__ == "__main__":
+    # `python server/app.py hash-password [lösenord]` skriver en hash för TENANTS_FILE
+    if len(sys.argv) > 1 and sys.argv[1] == "hash-password":
+        print(generate_password_hash(sys.argv[2] if len(sys.argv) > 2 else getpass.getpass("Lösenord: ")))
+        sys.exit(0)
+
+    # `python server/app.py export [mapp]` skriver en statisk ögonblicksbild och avslutar
+    if len(sys.argv) > 1 and sys.argv[1] == "export":
+        if TENANTS_FILE is not None:
+            sys.exit("Exporten används inte med TENANTS_FILE")
+        target = Path(sys.argv[2]).resolve() if len(sys.argv) > 2 else EXPORT_DIR
+        if target is None:
+            sys.exit("Ange exportmapp: python server/app.py export <mapp> (eller sätt EXPORT_DIR)")
+        export_snapshot(target)
+        print(f"Exporterade till {target}")
+        sys.exit(0)
+
+    # `python server/app.py maintenance` kör arkivering + databasvård en gång och avslutar
+    if len(sys.argv) > 1 and sys.argv[1] == "maintenance":
+        for_each_tenant(lambda: print(run_maintenance()))
+        sys.exit(0)
+
+    # `python server/app.py backup` tar en verifierad ögonblicksbild och avslutar
+    if len(sys.argv) > 1 and sys.argv[1] == "backup":
+        for_each_tenant(lambda: print(json.dumps(run_backup(), indent=2)))
+        sys.exit(0)
+
+    # `python server/app.py verify-backup <fil>` kör integritetskontroll på en kopia
+    if len(sys.argv) > 1 and sys.argv[1] == "verify-backup":
+        if len(sys.argv) < 3:
+            sys.exit("Ange databasfil: python server/app.py verify-backup <backup>/bookings.sqlite")
+        result = verify_backup(Path(sys.argv[2]).resolve())
+        print(result)
+        sys.exit(0 if result == "ok" else 1)
+
+    # `python server/app.py sweep-images [--dry-run]` städar en batch föräldralösa bilder
+    if len(sys.argv) > 1 and sys.argv[1] == "sweep-images":
+        for_each_tenant(lambda: print(json.dumps(sweep_images(dry_run="--dry-run" in sys.argv), indent=2)))
+        sys.exit(0)
+
+    # `python server/app.py deliver-notifications` levererar förfallna notiser en gång
+    if len(sys.argv) > 1 and sys.argv[1] == "deliver-notifications":
+        for_each_tenant(lambda: print(json.dumps(deliver_notifications(), indent=2)))
+        sys.exit(0)
+
+    # `python server/app.py rebuild-stats` räknar om statistiktabellerna från grunden
+    if len(sys.argv) > 1 and sys.argv[1] == "rebuild-stats":
+        def rebuild():
+            with db() as con:
+                rebuild_stats(con)
+            print("Statistiken är omräknad")
+        for_each_tenant(rebuild)
+        sys.exit(0)
+
+    # Fyll exportmappen direkt vid start så att den inte är tom innan första skrivningen
+    schedule_export()
     app.run(host="127.0.0.1", port=8000, debug=True)
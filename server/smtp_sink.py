@@ -0,0 +1,139 @@
+# =============================================================================
+# smtp_sink.py — Lokal SMTP-server för att prova notiserna (outbox i app.py)
+#
+# VARFÖR FINNS DEN HÄR?
+#   Notiserna till admin skickas via SMTP. För att se vad som skickas — och hur
+#   leveransen beter sig när servern krånglar — behövs en SMTP-server som inte
+#   skickar vidare något. Python har ingen inbyggd längre (smtpd togs bort i 3.12).
+#
+# VAD GÖR DEN?
+#   - Tar emot mejl på 127.0.0.1 (standard port 1025) och skriver ut ämne och
+#     mottagare, eller sparar hela mejlet som .eml i --out
+#   - Räknar anslutningar, så att det syns att en batch delar en anslutning
+#   - --fail N: svarar 451 (tillfälligt fel) på de första N mejlen, för att prova
+#     omförsök och backoff
+#
+# HUR FUNGERAR DEN?
+#   python server/smtp_sink.py [--port 1025] [--out mapp] [--fail 0]
+#   Starta sedan servern med t.ex.:
+#     NOTIFY_EMAIL=styrelsen@example.com SMTP_PORT=1025 python server/app.py
+#   Bara det som notiserna behöver finns: EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP,
+#   QUIT. Ingen STARTTLS och ingen inloggning (låt SMTP_STARTTLS/SMTP_USER vara osatta).
+# =============================================================================
+
+import argparse
+import socketserver
+import sys
+import threading
+from email import message_from_bytes
+from email.policy import default as default_policy
+from pathlib import Path
+
+
+class SinkHandler(socketserver.StreamRequestHandler):
+    """En SMTP-session: kommandon rad för rad, DATA läses till en ensam punkt."""
+
+    def reply(self, line: str) -> None:
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self) -> None:
+        server = self.server
+        with server.lock:
+            server.connections += 1
+            connection = server.connections
+        print(f"[anslutning {connection}] {self.client_address[0]}")
+
+        self.reply("220 smtp_sink redo")
+        sender, recipients = "", []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip()
+            verb    = command[:4].upper()
+
+            if verb in ("EHLO", "HELO"):
+                self.reply("250 smtp_sink")
+            elif verb == "MAIL":
+                sender, recipients = command.partition(":")[2].strip(), []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                recipients.append(command.partition(":")[2].strip())
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 Avsluta med <CRLF>.<CRLF>")
+                self.receive(connection, sender, recipients)
+                sender, recipients = "", []
+            elif verb == "RSET":
+                sender, recipients = "", []
+                self.reply("250 OK")
+            elif verb == "NOOP":
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Hej då")
+                return
+            else:
+                self.reply("502 Kommandot stöds inte")
+
+    def receive(self, connection: int, sender: str, recipients: list[str]) -> None:
+        """Läser mejlet efter DATA och sparar det, eller svarar 451 enligt --fail."""
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if not line or line in (b".\r\n", b".\n"):
+                break
+            lines.append(line[1:] if line.startswith(b"..") else line)  # punkt-stuffing
+        raw = b"".join(lines)
+
+        server = self.server
+        with server.lock:
+            server.received += 1
+            number = server.received
+        if number <= server.fail:
+            self.reply("451 Tillfälligt fel (--fail)")
+            print(f"[anslutning {connection}] mejl {number} avvisat (451)")
+            return
+
+        msg = message_from_bytes(raw, policy=default_policy)
+        print(f"[anslutning {connection}] mejl {number}: {msg['Subject']} → {', '.join(recipients)}")
+        if server.out:
+            (server.out / f"{number:05d}.eml").write_bytes(raw)
+        self.reply("250 OK")
+
+
+class SinkServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads      = True
+
+    def __init__(self, address: tuple[str, int], out: Path | None, fail: int):
+        super().__init__(address, SinkHandler)
+        self.out         = out
+        self.fail        = fail
+        self.lock        = threading.Lock()
+        self.connections = 0
+        self.received    = 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Lokal SMTP-server som tar emot men aldrig skickar vidare")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    parser.add_argument("--out", default=None, help="mapp där mejlen sparas som .eml")
+    parser.add_argument("--fail", type=int, default=0, help="avvisa de första N mejlen med 451")
+    args = parser.parse_args()
+
+    out = Path(args.out).resolve() if args.out else None
+    if out:
+        out.mkdir(parents=True, exist_ok=True)
+
+    with SinkServer((args.host, args.port), out, args.fail) as server:
+        print(f"smtp_sink lyssnar på {args.host}:{args.port}" + (f", sparar i {out}" if out else ""))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
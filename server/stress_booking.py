@@ -0,0 +1,328 @@
+# =============================================================================
+# stress_booking.py — Belastningstest för direktbokning (POST /api/book)
+#
+# VARFÖR FINNS DEN HÄR?
+#   När ett populärt datum släpps (midsommarhelgen, julbord) bokar många samtidigt.
+#   Kollisionskontrollen i api_book måste hålla även då — ingen tid får bli
+#   dubbelbokad. Det här skriptet visar att den gör det, och vad det kostar.
+#
+# VAD GÖR DEN?
+#   - Skickar N samtidiga bokningar (trådar eller processer) med överlappande
+#     kombinationer av 2h, heldag och helg mot några få datum
+#   - Kontrollerar efteråt att inga godkända bokningar överlappar, och att antalet
+#     godkända bokningar stämmer med antalet 200-svar
+#   - Rapporterar genomströmning, andel 409 och latens: hela anropet, samt ur svarets
+#     Server-Timing väntan på skrivlåset (lock) och kontroll + infogning + commit (book)
+#
+# HUR FUNGERAR DEN?
+#   python server/stress_booking.py [--mode threads|processes] [--workers 32] [--requests 400]
+#   Standard: appen körs i processen mot en ny databasfil i en temporär mapp
+#   (riktig fil, WAL, samma låsning som i drift). Med --url skickas bokningarna
+#   istället över HTTP till en körande server; ange då --db för kontrollen
+#   (och starta servern med RATE_LIMIT=0, annars stoppas lasten med 429).
+#   Avslutas med kod 1 om något överlappar eller om servern svarat med 5xx.
+# =============================================================================
+
+import argparse
+import json
+import multiprocessing
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import date, timedelta
+from pathlib import Path
+
+
+# Bokningstyper och tidsluckor (samma som i app.py)
+SLOTS = ("09:00", "12:00", "15:00", "18:00")
+
+
+def build_workload(count: int, first_day: date, days: int, seed: int) -> list[dict]:
+    """
+    VARFÖR: Testet ska tvinga fram krockar — alla bokar samma få datum.
+    VAD: Returnerar count bokningar (JSON för /api/book) fördelade över `days` dagar
+         från first_day, blandat 2h (alla luckor), heldag och helg.
+    """
+    rng = random.Random(seed)
+    work = []
+    for i in range(count):
+        day  = first_day + timedelta(days=rng.randrange(days))
+        kind = rng.choice(("2h", "2h", "heldag", "helg"))
+        item = {
+            "name":         f"Stress {i}",
+            "email":        f"stress{i}@example.com",
+            "phone":        "",
+            "date":         day.isoformat(),
+            "booking_type": kind,
+        }
+        if kind == "2h":
+            item["time_slot"] = rng.choice(SLOTS)
+        work.append(item)
+    return work
+
+
+# ─────────────────────────────
+# Klienter
+# ─────────────────────────────
+
+def parse_server_timing(header: str | None) -> dict[str, float]:
+    """Server-Timing ("lock;dur=1.2, book;dur=0.3") → {"lock": 1.2, "book": 0.3} i ms."""
+    timings = {}
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "dur":
+                timings[name] = float(value)
+    return timings
+
+
+def _load_app(db_path: Path):
+    """Importerar app.py och pekar den mot testdatabasen (innan första anslutningen)."""
+    server_dir = str(Path(__file__).parent)
+    if server_dir not in sys.path:
+        sys.path.insert(0, server_dir)
+    import app as app_module
+    app_module.DB_PATH    = db_path
+    app_module.RATE_LIMIT = False  # alla arbetare bokar från samma IP
+    return app_module
+
+
+class InProcessClient:
+    """Bokar via Flasks testklient — hela request-hanteringen, ingen nätverkskostnad."""
+
+    def __init__(self, db_path: Path):
+        self.client = _load_app(db_path).app.test_client()
+
+    def book(self, payload: dict) -> tuple[int, dict[str, float]]:
+        res = self.client.post("/api/book", json=payload)
+        return res.status_code, parse_server_timing(res.headers.get("Server-Timing"))
+
+
+class HttpClient:
+    """Bokar över HTTP mot en körande server."""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/") + "/api/book"
+
+    def book(self, payload: dict) -> tuple[int, dict[str, float]]:
+        req = urllib.request.Request(
+            self.url, data=json.dumps(payload).encode(), headers={"Content-Type": "application/json"}
+        )
+        try:
+            with urllib.request.urlopen(req, timeout=30) as res:
+                return res.status, parse_server_timing(res.headers.get("Server-Timing"))
+        except urllib.error.HTTPError as e:
+            return e.code, parse_server_timing(e.headers.get("Server-Timing"))
+
+
+def _run_worker(make_client, work: list[dict], start: threading.Barrier, results: list) -> None:
+    """Kör en arbetares andel av bokningarna; sparar (status, latens i sekunder, Server-Timing i ms)."""
+    client = make_client()
+    start.wait()
+    for payload in work:
+        t0 = time.perf_counter()
+        try:
+            status, timings = client.book(payload)
+        except Exception:
+            status, timings = 0, {}  # anslutningsfel räknas som fel
+        results.append((status, time.perf_counter() - t0, timings))
+
+
+def _process_main(args: tuple) -> None:
+    """Ingång för --mode processes (måste ligga på modulnivå för multiprocessing)."""
+    db_path, url, work, start, queue = args
+    results: list = []
+    make_client = (lambda: HttpClient(url)) if url else (lambda: InProcessClient(db_path))
+    _run_worker(make_client, work, start, results)
+    queue.put(results)
+
+
+def run_load(mode: str, workers: int, work: list[dict], db_path: Path, url: str | None) -> tuple[list, float]:
+    """Fördelar bokningarna på workers trådar/processer som startar samtidigt. Returnerar (resultat, sekunder)."""
+    shares = [work[i::workers] for i in range(workers)]
+
+    if mode == "threads":
+        start   = threading.Barrier(workers + 1)
+        results: list = []
+        make_client = (lambda: HttpClient(url)) if url else (lambda: InProcessClient(db_path))
+        threads = [
+            threading.Thread(target=_run_worker, args=(make_client, share, start, results))
+            for share in shares
+        ]
+        for t in threads:
+            t.start()
+        start.wait()
+        t0 = time.perf_counter()
+        for t in threads:
+            t.join()
+        return results, time.perf_counter() - t0
+
+    ctx   = multiprocessing.get_context("spawn")
+    start = ctx.Barrier(workers + 1)
+    queue = ctx.Queue()
+    procs = [ctx.Process(target=_process_main, args=((db_path, url, share, start, queue),)) for share in shares]
+    for p in procs:
+        p.start()
+    start.wait()
+    t0 = time.perf_counter()
+    results = []
+    for _ in procs:
+        results.extend(queue.get())
+    elapsed = time.perf_counter() - t0
+    for p in procs:
+        p.join()
+    return results, elapsed
+
+
+# ─────────────────────────────
+# Kontroll
+# ─────────────────────────────
+
+def find_overlaps(db_path: Path) -> list[tuple]:
+    """
+    VARFÖR: Kontrollen ska inte lita på samma kod som den testar (find_conflicts).
+    VAD: Returnerar par av godkända bokningar på samma resurs som tar samma tid i anspråk.
+    HUR: Varje bokning blir de dagar den upptar: 2h en lucka en dag, heldag hela dagen,
+         helg hela start- och nästa dag. Två bokningar samma dag krockar om någon av
+         dem tar hela dagen eller om de har samma lucka.
+    """
+    con = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    rows = con.execute(
+        "SELECT id, resource, start, booking_type FROM bookings WHERE status='approved'"
+    ).fetchall()
+    con.close()
+
+    by_day: dict[tuple[str, str], list[tuple[int, str | None]]] = {}
+    for booking_id, resource, start, booking_type in rows:
+        day = date.fromisoformat(start[:10])
+        if booking_type == "2h":
+            occupied = [(day, start)]
+        elif booking_type == "helg":
+            occupied = [(day, None), (day + timedelta(days=1), None)]
+        else:
+            occupied = [(day, None)]
+        for d, slot in occupied:
+            by_day.setdefault((resource, d.isoformat()), []).append((booking_id, slot))
+
+    overlaps = []
+    for (resource, day), items in by_day.items():
+        for i, (id_a, slot_a) in enumerate(items):
+            for id_b, slot_b in items[i + 1:]:
+                if slot_a is None or slot_b is None or slot_a == slot_b:
+                    overlaps.append((resource, day, id_a, id_b))
+    return overlaps
+
+
+def approved_count(db_path: Path) -> int:
+    con = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        return con.execute("SELECT COUNT(*) FROM bookings WHERE status='approved'").fetchone()[0]
+    finally:
+        con.close()
+
+
+# ─────────────────────────────
+# Rapport
+# ─────────────────────────────
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def report(results: list, elapsed: float, overlaps: list, approved: int | None) -> bool:
+    """Skriver ut rapporten. Returnerar True om testet gick igenom."""
+    statuses: dict[int, int] = {}
+    for status, _, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    latencies = [lat for _, lat, _ in results]
+    lock_ms   = [t["lock"] for _, _, t in results if "lock" in t]
+    book_ms   = [t["book"] for _, _, t in results if "book" in t]
+    total     = len(results)
+    ok        = statuses.get(200, 0)
+    conflicts = statuses.get(409, 0)
+    errors    = sum(n for s, n in statuses.items() if s == 0 or s >= 500)
+
+    print(f"Bokningar:        {total} på {elapsed:.2f} s  ({total / elapsed if elapsed else 0:.0f} req/s)")
+    print(f"Svar:             " + ", ".join(f"{s}: {n}" for s, n in sorted(statuses.items())))
+    print(f"409-andel:        {conflicts / total:.1%}" if total else "409-andel:        –")
+    print(
+        "Latens (ms):      "
+        f"p50 {percentile(latencies, 50) * 1000:.1f}  p95 {percentile(latencies, 95) * 1000:.1f}  "
+        f"p99 {percentile(latencies, 99) * 1000:.1f}  max {max(latencies, default=0) * 1000:.1f}"
+    )
+    for label, values in (("Låsväntan (ms):   ", lock_ms), ("Skrivning (ms):   ", book_ms)):
+        if values:
+            print(
+                f"{label}p50 {percentile(values, 50):.1f}  p95 {percentile(values, 95):.1f}  "
+                f"p99 {percentile(values, 99):.1f}  max {max(values):.1f}"
+            )
+        else:
+            print(f"{label}– (servern skickar ingen Server-Timing)")
+
+    passed = True
+    if approved is not None and approved != ok:
+        print(f"FEL: {approved} godkända bokningar i databasen men {ok} svar med 200")
+        passed = False
+    if overlaps:
+        print(f"FEL: {len(overlaps)} överlappande bokningar, t.ex. {overlaps[:5]}")
+        passed = False
+    if errors:
+        print(f"FEL: {errors} svar med 5xx eller anslutningsfel")
+        passed = False
+    if passed:
+        print("OK: inga överlappande bokningar")
+    return passed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Belastningstest för POST /api/book")
+    parser.add_argument("--mode", choices=("threads", "processes"), default="threads")
+    parser.add_argument("--workers", type=int, default=32, help="samtidiga trådar/processer")
+    parser.add_argument("--requests", type=int, default=400, help="totalt antal bokningar")
+    parser.add_argument("--days", type=int, default=3, help="antal datum som delar på bokningarna")
+    parser.add_argument("--start", default=None, help="första datum (YYYY-MM-DD), standard: en lördag om en månad")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--url", default=None, help="bas-URL till en körande server, t.ex. http://127.0.0.1:8000")
+    parser.add_argument("--db", default=None, help="databasfil att kontrollera (krävs med --url)")
+    args = parser.parse_args()
+
+    if args.start:
+        first_day = date.fromisoformat(args.start)
+    else:
+        first_day = date.today() + timedelta(days=30)
+        first_day += timedelta(days=(5 - first_day.weekday()) % 7)  # nästa lördag
+
+    work = build_workload(args.requests, first_day, args.days, args.seed)
+
+    with tempfile.TemporaryDirectory(prefix="stress-booking-") as tmp:
+        if args.url:
+            db_path = Path(args.db).resolve() if args.db else None
+        else:
+            db_path = Path(tmp) / "bookings.sqlite"
+            _load_app(db_path).ensure_db()  # skapa schemat innan lasten startar
+
+        print(f"Läge: {args.mode}, {args.workers} arbetare, {args.requests} bokningar över "
+              f"{args.days} dagar från {first_day} ({args.url or db_path})")
+        results, elapsed = run_load(args.mode, args.workers, work, db_path, args.url)
+
+        if db_path is None:
+            print("(ingen --db angiven — överlappskontrollen hoppas över)")
+            overlaps, approved = [], None
+        else:
+            overlaps = find_overlaps(db_path)
+            approved = None if args.url else approved_count(db_path)
+
+        return 0 if report(results, elapsed, overlaps, approved) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())